@@ -0,0 +1,224 @@
+"""
+Ficheros estáticos con huella de contenido y precomprimidos
+
+/static sirve los ficheros con su nombre de siempre, así que el navegador no
+puede cachearlos mucho tiempo sin arriesgarse a usar una versión vieja. Al
+arrancar (o con `python -m app.assets`) se copia cada fichero de app/static a
+ASSET_BUILD_DIR con el hash de su contenido en el nombre:
+
+    css/estilos.css  ->  /assets/css/estilos.3f9a1b2c4d5e.css
+
+Esas URLs no cambian mientras no cambie el fichero, así que se sirven con
+caché inmutable de un año: en visitas repetidas no se descarga ningún fichero.
+Las plantillas obtienen la URL con static_url():
+
+    <link rel="stylesheet" href="{{ static_url('css/estilos.css') }}">
+
+Los ficheros de texto (CSS, JS, SVG...) se guardan también comprimidos con
+gzip (.gz) y, si está instalado el paquete brotli, con Brotli (.br). Se envía
+la variante que admita el Accept-Encoding de la petición sin comprimir nada
+al vuelo. Las imágenes ya van comprimidas y se sirven tal cual.
+
+/static se mantiene para las URLs guardadas en la base de datos.
+
+Variables de entorno:
+- ASSET_BUILD_DIR: directorio de los ficheros generados (por defecto build/static)
+- ASSET_BUILD_ON_STARTUP: 1 genera los ficheros al arrancar; 0 usa los ya generados (por defecto 1)
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+
+from fastapi.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se genera .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSET_BUILD_DIR = os.getenv("ASSET_BUILD_DIR", "build/static")
+ASSET_BUILD_ON_STARTUP = os.getenv("ASSET_BUILD_ON_STARTUP", "1") == "1"
+
+STATIC_DIRECTORY = "app/static"
+ASSETS_PREFIX = "/assets"
+MANIFEST_NAME = "manifest.json"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Solo merece la pena comprimir texto, y no ficheros diminutos
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt", ".html", ".xml", ".drawio", ".ico"}
+MIN_COMPRESS_SIZE = 256
+
+# Codificación -> (extensión del fichero, función); en orden de preferencia
+ENCODINGS = {"gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))}
+if brotli is not None:
+    ENCODINGS = {"br": (".br", lambda data: brotli.compress(data, quality=11)), **ENCODINGS}
+
+
+# -------------------------
+# Generación
+# -------------------------
+def _fingerprint(relative_path: str, data: bytes) -> str:
+    name, extension = os.path.splitext(relative_path)
+    return f"{name}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+
+
+def _write(path: str, data: bytes):
+    # Se escribe aparte y se renombra: nunca se sirve un fichero a medias
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+    os.replace(temporary, path)
+
+
+def build_assets(source: str = STATIC_DIRECTORY, target: str = ASSET_BUILD_DIR) -> dict[str, str]:
+    """
+    Genera las copias con huella y sus variantes comprimidas, borra las de
+    versiones anteriores y devuelve el manifiesto {ruta original: ruta con huella}.
+    Los ficheros que ya existen no se vuelven a escribir.
+    """
+    manifest = {}
+    keep = {MANIFEST_NAME}
+
+    for directory, subdirectories, files in os.walk(source):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith("."))
+        for filename in sorted(files):
+            if filename.startswith("."):
+                continue
+
+            path = os.path.join(directory, filename)
+            relative_path = os.path.relpath(path, source).replace(os.sep, "/")
+            with open(path, "rb") as file:
+                data = file.read()
+
+            hashed = _fingerprint(relative_path, data)
+            manifest[relative_path] = hashed
+            keep.add(hashed)
+
+            destination = os.path.join(target, hashed)
+            if not os.path.exists(destination):
+                _write(destination, data)
+
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS or len(data) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, compress in ENCODINGS.values():
+                if os.path.exists(destination + suffix):
+                    keep.add(hashed + suffix)
+                    continue
+                compressed = compress(data)
+                # Si apenas se reduce no compensa que el cliente lo descomprima
+                if len(compressed) < len(data) * 0.9:
+                    _write(destination + suffix, compressed)
+                    keep.add(hashed + suffix)
+
+    _write(os.path.join(target, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    for directory, _, files in os.walk(target):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            if os.path.relpath(path, target).replace(os.sep, "/") not in keep and not filename.endswith(".tmp"):
+                os.remove(path)
+
+    return manifest
+
+
+def load_manifest(target: str = ASSET_BUILD_DIR) -> dict[str, str]:
+    try:
+        with open(os.path.join(target, MANIFEST_NAME)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        logger.warning("No hay %s en %s: se usarán las URLs de /static", MANIFEST_NAME, target)
+        return {}
+
+
+# -------------------------
+# URLs para las plantillas
+# -------------------------
+class AssetManifest:
+    def __init__(self):
+        self.files: dict[str, str] = {}
+
+    def prepare(self):
+        if ASSET_BUILD_ON_STARTUP:
+            self.files = build_assets()
+        else:
+            self.files = load_manifest()
+
+    def url(self, path: str) -> str:
+        """URL con huella de un fichero de app/static; si no está en el manifiesto, la de /static."""
+        path = path.removeprefix("/static/").lstrip("/")
+        hashed = self.files.get(path)
+        if hashed is None:
+            return f"/static/{path}"
+        return f"{ASSETS_PREFIX}/{hashed}"
+
+
+assets = AssetManifest()
+
+
+# -------------------------
+# Servir los ficheros
+# -------------------------
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles para ficheros cuyo nombre cambia con su contenido: se cachean un año."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codificaciones de Accept-Encoding con q > 0."""
+    accepted = set()
+    for item in header.split(","):
+        name, _, parameters = item.strip().partition(";")
+        quality = parameters.strip().removeprefix("q=")
+        try:
+            if parameters and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(ImmutableStaticFiles):
+    """Además sirve el .br o .gz generado si el cliente lo admite."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        compressible = os.path.splitext(str(full_path))[1].lower() in COMPRESSIBLE_EXTENSIONS
+        if not compressible:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        headers = dict(scope["headers"])
+        accepted = accepted_encodings(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        for encoding, (suffix, _) in ENCODINGS.items():
+            compressed = f"{full_path}{suffix}"
+            if encoding in accepted and os.path.exists(compressed):
+                response = super().file_response(compressed, os.stat(compressed), scope, status_code)
+                response.headers["Content-Encoding"] = encoding
+                media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                response.headers["Content-Type"] = media_type
+                break
+        else:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+if __name__ == "__main__":
+    built = build_assets()
+    print(f"{len(built)} ficheros en {ASSET_BUILD_DIR}")
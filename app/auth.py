@@ -0,0 +1,134 @@
+"""
+Sesiones de usuario para la web
+
+Al iniciar sesión se envía una cookie firmada (ver app/security.py) con el id
+y el nick del usuario. Identificar al usuario en cada petición solo requiere
+comprobar la firma: no se consulta la base de datos. El resultado se guarda en
+request.state, así varias dependencias de la misma petición lo calculan una vez.
+
+Las rutas que escriben en el usuario (p. ej. su biblioteca) lo cargan con
+db.get cuando lo necesitan.
+
+Variables de entorno:
+- SESSION_MAX_AGE: segundos de validez de la sesión (por defecto 14 días)
+- SESSION_COOKIE_SECURE: 1 envía la cookie solo por HTTPS (por defecto 0)
+"""
+
+import hmac
+import os
+from functools import cache
+from urllib.parse import quote, urlsplit
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.models.user import UserORM
+from app.security import hash_password, is_password_hash, sign, unsign, verify_password
+
+SESSION_COOKIE = "session"
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(14 * 24 * 3600)))
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "0") == "1"
+
+
+@cache
+def _dummy_hash() -> str:
+    """
+    Para usuarios inexistentes se compara contra este hash: la respuesta tarda
+    lo mismo y no revela qué emails están registrados. Se calcula en el primer
+    login fallido y no al importar (scrypt tarda decenas de milisegundos).
+    """
+    return hash_password("usuario-inexistente")
+
+
+# -------------------------
+# Usuario de la sesión
+# -------------------------
+class SessionUser:
+    """Identidad del usuario conectado, sacada de la cookie."""
+
+    def __init__(self, id: int, nick: str):
+        self.id = id
+        self.nick = nick
+
+
+def _read_session(request: Request) -> SessionUser | None:
+    value = request.cookies.get(SESSION_COOKIE)
+    data = unsign(value) if value else None
+    if data is None or not isinstance(data.get("uid"), int):
+        return None
+    return SessionUser(data["uid"], data.get("nick", ""))
+
+
+def current_user(request: Request) -> SessionUser | None:
+    """Dependencia: el usuario conectado o None."""
+    if not hasattr(request.state, "user"):
+        request.state.user = _read_session(request)
+    return request.state.user
+
+
+def require_user(request: Request) -> SessionUser:
+    """Dependencia: el usuario conectado; sin sesión redirige a /login."""
+    user = current_user(request)
+    if user is None:
+        # Tras un POST se vuelve a la página desde la que se envió el formulario
+        referer = request.headers.get("referer") if request.method != "GET" else None
+        next_url = urlsplit(referer).path if referer else request.url.path
+        raise HTTPException(
+            status_code=status.HTTP_303_SEE_OTHER,
+            detail="Hay que iniciar sesión",
+            headers={"Location": f"/login?next={quote(next_url, safe='')}"}
+        )
+    return user
+
+
+# -------------------------
+# Inicio y cierre de sesión
+# -------------------------
+def authenticate(db: Session, login: str, password: str) -> UserORM | None:
+    """
+    Busca al usuario por email o nick y comprueba la contraseña. Es lenta a
+    propósito (scrypt): llamarla desde un endpoint síncrono o con run_in_threadpool.
+    Las contraseñas que aún estén en claro se pasan a scrypt al acertarlas.
+    """
+    user = db.execute(
+        select(UserORM).where(or_(UserORM.email == login, UserORM.nick == login)).limit(1)
+    ).scalar_one_or_none()
+
+    if user is None:
+        verify_password(password, _dummy_hash())
+        return None
+
+    if user.password is not None and not is_password_hash(user.password):
+        # Contraseña de antes de scrypt, guardada en claro: se acepta una vez y se
+        # guarda ya con hash. Se calcula un scrypt igualmente para tardar lo mismo
+        verify_password(password, _dummy_hash())
+        if not hmac.compare_digest(password.encode(), user.password.encode()):
+            return None
+        user.password = hash_password(password)
+        db.commit()
+        return user
+
+    return user if verify_password(password, user.password) else None
+
+
+def start_session(response: Response, user: UserORM):
+    response.set_cookie(
+        SESSION_COOKIE,
+        sign({"uid": user.id, "nick": user.nick}, SESSION_MAX_AGE),
+        max_age=SESSION_MAX_AGE,
+        httponly=True,
+        samesite="lax",
+        secure=SESSION_COOKIE_SECURE
+    )
+
+
+def end_session(response: Response):
+    response.delete_cookie(SESSION_COOKIE)
+
+
+def safe_next(next_url: str | None) -> str:
+    """Solo se redirige a rutas de esta misma web tras iniciar sesión."""
+    if not next_url or not next_url.startswith("/") or next_url.startswith("//"):
+        return "/"
+    return next_url
@@ -0,0 +1,355 @@
+"""
+Importación y exportación masiva del catálogo (NDJSON y CSV)
+
+La importación lee las filas de una en una, las valida por bloques con los
+mismos esquemas que los POST de la API (VideogameCreate, DevCreate...), comprueba
+las claves ajenas del bloque con una consulta por columna y lo inserta con un
+único executemany en su propia transacción. Las filas no válidas no detienen la
+importación: se devuelven en el informe con su número de línea. Eso incluye
+las líneas que no están en UTF-8 (el texto se lee con errors="surrogateescape"
+y aquí se rechazan las filas con bytes sin decodificar) y los enteros que no
+caben en un INTEGER de SQLite.
+
+La exportación recorre la tabla por bloques (yield_per) y va generando el
+NDJSON o CSV sin cargar la tabla entera en memoria.
+
+Variables de entorno:
+- BULK_CHUNK_SIZE: filas por bloque/transacción (por defecto 1000)
+"""
+
+import csv
+import io
+import json
+import os
+from typing import Iterable, Iterator
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.cache import invalidate_on_commit
+from app.database import utcnow
+from app.models.developer import DevORM
+from app.models.genre import GenreORM
+from app.models.review import ReviewORM
+from app.models.user import UserORM
+from app.models.videogame import VideogameORM
+from app.rating_stats import rebuild_rating_stats
+from app.schemas.developer import DevCreate
+from app.schemas.genre import GenreCreate
+from app.schemas.review import ReviewCreate
+from app.schemas.videogame import VideogameCreate
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+# Un fichero lleno de errores no debe generar un informe gigante
+MAX_REPORTED_ERRORS = 1000
+
+# Rango de un INTEGER de SQLite (64 bits con signo); fuera de él executemany lanza OverflowError
+MAX_ID = 2**63 - 1
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+# -------------------------
+# Entidades importables
+# -------------------------
+class BulkEntity:
+    """
+    Qué tabla se carga, con qué esquema se valida cada fila, qué columnas se
+    exportan y qué claves ajenas hay que comprobar antes de insertar.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        schema: type[BaseModel],
+        columns: list[str],
+        cache_tags: list[str],
+        references: dict[str, Table] | None = None,
+        unique: tuple[str, ...] | None = None
+    ):
+        self.table = table
+        self.schema = schema
+        self.columns = columns
+        self.cache_tags = cache_tags
+        self.references = references or {}
+        self.unique = unique
+
+
+ENTITIES = {
+    "genres": BulkEntity(
+        GenreORM.__table__, GenreCreate,
+        ["id", "name", "description", "image_url"],
+        cache_tags=["genres", "home"]
+    ),
+    "developers": BulkEntity(
+        DevORM.__table__, DevCreate,
+        ["id", "name", "image_url"],
+        cache_tags=["developers"]
+    ),
+    "videogames": BulkEntity(
+        VideogameORM.__table__, VideogameCreate,
+        ["id", "title", "description", "cover_url", "genre_id", "developer_id"],
+        cache_tags=["home"],
+        references={"genre_id": GenreORM.__table__, "developer_id": DevORM.__table__}
+    ),
+    "reviews": BulkEntity(
+        ReviewORM.__table__, ReviewCreate,
+        ["id", "user_id", "videogame_id", "rating", "comment"],
+        cache_tags=["reviews"],
+        references={"user_id": UserORM.__table__, "videogame_id": VideogameORM.__table__},
+        unique=("user_id", "videogame_id")
+    ),
+}
+
+
+# -------------------------
+# Informe de la importación
+# -------------------------
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def reject(self, line: int, errors: list[dict]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _error(field: str | None, message: str) -> dict:
+    return {"field": field, "message": message}
+
+
+# -------------------------
+# Lectura de NDJSON y CSV
+# -------------------------
+def read_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, dict | None]]:
+    """Devuelve (número de línea, fila); la fila es None si la línea no es un objeto JSON."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict | None]]:
+    """La primera línea es la cabecera; las celdas vacías se leen como None."""
+    reader = csv.DictReader(lines)
+    # Una celda entre comillas puede ocupar varias líneas: se informa la primera
+    last_line = 1
+    for row in reader:
+        yield last_line + 1, {key: value if value != "" else None for key, value in row.items()}
+        last_line = reader.line_num
+
+
+READERS = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+}
+
+
+# -------------------------
+# Importar
+# -------------------------
+def _is_utf8(text) -> bool:
+    """False si el texto trae bytes que no se pudieron decodificar (surrogateescape)."""
+    if not isinstance(text, str):
+        return True
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _validate(entity: BulkEntity, line: int, row: dict | None, report: ImportReport) -> dict | None:
+    if row is None:
+        report.reject(line, [_error(None, "La línea no es un objeto JSON válido")])
+        return None
+
+    if not all(_is_utf8(text) for text in (*row.keys(), *row.values())):
+        report.reject(line, [_error(None, "La línea no está codificada en UTF-8")])
+        return None
+
+    try:
+        values = entity.schema.model_validate(row).model_dump()
+    except ValidationError as e:
+        report.reject(line, [
+            _error(".".join(str(part) for part in err["loc"]) or None, err["msg"])
+            for err in e.errors()
+        ])
+        return None
+
+    # El id es opcional: si viene se conserva, para que una exportación se pueda volver a importar
+    if row.get("id") is not None:
+        try:
+            values["id"] = int(row["id"])
+        except (TypeError, ValueError):
+            report.reject(line, [_error("id", "El id debe ser un número entero")])
+            return None
+
+    return values
+
+
+def _existing(db: Session, column, values: set) -> set:
+    if not values:
+        return set()
+    return set(db.scalars(select(column).where(column.in_(values))))
+
+
+def _check_chunk(db: Session, entity: BulkEntity, chunk: list[tuple[int, dict]], report: ImportReport) -> list[dict]:
+    """Descarta las filas que romperían una restricción, con una consulta por comprobación."""
+    table = entity.table
+
+    # Los ids fuera de rango ni siquiera se pueden usar en las consultas de abajo
+    in_range = []
+    for line, values in chunk:
+        errors = [
+            _error(column, f"El {column} debe estar entre 0 y {MAX_ID}")
+            for column in ("id", *entity.references)
+            if column in values and not 0 <= values[column] <= MAX_ID
+        ]
+        if errors:
+            report.reject(line, errors)
+        else:
+            in_range.append((line, values))
+    chunk = in_range
+    if not chunk:
+        return []
+
+    taken_ids = _existing(db, table.c.id, {values["id"] for _, values in chunk if "id" in values})
+    missing = {}
+    for column, target in entity.references.items():
+        wanted = {values[column] for _, values in chunk}
+        missing[column] = wanted - _existing(db, target.c.id, wanted)
+
+    taken_keys = set()
+    if entity.unique:
+        keys = {tuple(values[column] for column in entity.unique) for _, values in chunk}
+        unique_columns = tuple_(*(table.c[column] for column in entity.unique))
+        taken_keys = {tuple(key) for key in db.execute(select(*(table.c[column] for column in entity.unique)).where(unique_columns.in_(keys)))}
+
+    now = utcnow()
+    accepted = []
+    for line, values in chunk:
+        errors = [
+            _error(column, f"No existe ningún registro con {column} {values[column]}")
+            for column in entity.references
+            if values[column] in missing[column]
+        ]
+        if "id" in values and values["id"] in taken_ids:
+            errors.append(_error("id", f"Ya existe un registro con el id {values['id']}"))
+        key = tuple(values[column] for column in entity.unique) if entity.unique else None
+        if key in taken_keys:
+            errors.append(_error(",".join(entity.unique), "Ya existe un registro con estos valores"))
+
+        if errors:
+            report.reject(line, errors)
+            continue
+
+        # Los duplicados dentro del mismo bloque también se rechazan
+        if "id" in values:
+            taken_ids.add(values["id"])
+        if key is not None:
+            taken_keys.add(key)
+        accepted.append({**values, "version": 1, "updated_at": now})
+
+    return accepted
+
+
+def _insert_chunk(db: Session, entity: BulkEntity, chunk: list[tuple[int, dict]], report: ImportReport):
+    rows = _check_chunk(db, entity, chunk, report)
+    if not rows:
+        return
+
+    # executemany necesita las mismas columnas en todas las filas: primero las que traen id
+    with_id = [row for row in rows if "id" in row]
+    without_id = [row for row in rows if "id" not in row]
+    for batch in (with_id, without_id):
+        if batch:
+            db.execute(insert(entity.table), batch)
+
+    tags = list(entity.cache_tags)
+    if entity.table is ReviewORM.__table__:
+        videogame_ids = {row["videogame_id"] for row in rows}
+        rebuild_rating_stats(db, videogame_ids)
+        tags += [f"videogame:{videogame_id}" for videogame_id in videogame_ids]
+    if entity.table is VideogameORM.__table__:
+        tags += {f"genre-games:{row['genre_id']}" for row in rows}
+        tags += {f"developer-games:{row['developer_id']}" for row in rows}
+    invalidate_on_commit(db, *tags)
+
+    db.commit()
+    report.inserted += len(rows)
+
+
+def import_rows(db: Session, entity: BulkEntity, lines: Iterable[str], format: str, chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+    """Importa un fichero NDJSON/CSV ya abierto en modo texto; cada bloque va en su propia transacción."""
+    report = ImportReport()
+    chunk: list[tuple[int, dict]] = []
+
+    for line, row in READERS[format](lines):
+        report.received += 1
+        values = _validate(entity, line, row, report)
+        if values is not None:
+            chunk.append((line, values))
+
+        if len(chunk) >= chunk_size:
+            _insert_chunk(db, entity, chunk, report)
+            chunk = []
+
+    if chunk:
+        _insert_chunk(db, entity, chunk, report)
+
+    return report.as_dict()
+
+
+# -------------------------
+# Exportar
+# -------------------------
+def export_rows(db: Session, entity: BulkEntity, format: str, chunk_size: int = BULK_CHUNK_SIZE) -> Iterator[bytes]:
+    """Genera el fichero por bloques de chunk_size filas, en orden de id."""
+    columns = [entity.table.c[column] for column in entity.columns]
+    result = db.execute(
+        select(*columns)
+        .order_by(entity.table.c.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(entity.columns)
+        for partition in result.partitions():
+            writer.writerows(partition)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+        return
+
+    for partition in result.partitions():
+        yield "".join(
+            json.dumps(dict(row._mapping), ensure_ascii=False) + "\n"
+            for row in partition
+        ).encode()
@@ -0,0 +1,356 @@
+"""
+Caché de respuestas en memoria para las lecturas del catálogo
+
+Guarda el cuerpo ya serializado (JSON o HTML) por clave de ruta y parámetros,
+con expiración por TTL y expulsión LRU. Cada entrada lleva etiquetas
+("genres", "genre:3", "videogame:7", "home"...) y al confirmar una transacción
+que modifica esas entidades se invalidan exactamente las entradas afectadas.
+
+Variables de entorno:
+- RESPONSE_CACHE_SIZE: número máximo de entradas (por defecto 1024, 0 desactiva la caché)
+- RESPONSE_CACHE_TTL: segundos de vida de cada entrada (por defecto 300)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Protocol
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.etag import not_modified, validator_headers
+from app.models.developer import DevORM
+from app.models.genre import GenreORM
+from app.models.review import ReviewORM
+from app.models.user import UserORM
+from app.models.videogame import VideogameORM
+from app.serialization import dumps, trusted_dict
+
+
+# -------------------------
+# Backends
+# -------------------------
+class CacheBackend(Protocol):
+    """
+    Almacén clave/valor con etiquetas. Cualquier objeto con estos métodos sirve,
+    por ejemplo un cliente de una caché compartida entre workers.
+    """
+
+    def get(self, key: str) -> bytes | None: ...
+    def set(self, key: str, value: bytes, ttl: float, tags: list[str]) -> None: ...
+    def invalidate(self, tags: list[str]) -> int: ...
+    def clear(self) -> None: ...
+
+
+class MemoryBackend:
+    """LRU con TTL dentro del proceso."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+        # Índice inverso: al expulsar o caducar una clave se quita de sus etiquetas
+        self._tags_by_key: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _unlink(self, key: str, tags) -> None:
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def _remove(self, key: str) -> bool:
+        self._unlink(key, self._tags_by_key.pop(key, ()))
+        return self._entries.pop(key, None) is not None
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float, tags: list[str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            new_tags = set(tags)
+            self._unlink(key, self._tags_by_key.get(key, set()) - new_tags)
+            self._tags_by_key[key] = new_tags
+            for tag in new_tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags: list[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._keys_by_tag.pop(tag, ()):
+                    if self._remove(key):
+                        removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self._tags_by_key.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# -------------------------
+# Caché con etiquetas y contadores
+# -------------------------
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Cambia en cada invalidación: una respuesta calculada antes de una
+        # escritura no se guarda si la escritura se confirmó mientras tanto
+        self.generation = 0
+        self._listeners: list[Callable] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        if not self.enabled:
+            return None
+
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, tags: list[str], generation: int | None = None):
+        if not self.enabled or (generation is not None and generation != self.generation):
+            return
+
+        self.backend.set(key, value, self.ttl, tags)
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            self.generation += 1
+
+        removed = self.backend.invalidate(list(tags))
+
+        with self._lock:
+            self.invalidations += removed
+
+        for listener in self._listeners:
+            listener(set(tags))
+
+    def subscribe(self, listener: Callable):
+        """listener(etiquetas) se llama en cada invalidación; debe ser rápido."""
+        self._listeners.append(listener)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "invalidations": self.invalidations,
+            "size": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
+
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+response_cache = ResponseCache(
+    MemoryBackend(RESPONSE_CACHE_SIZE),
+    ttl=RESPONSE_CACHE_TTL,
+    enabled=RESPONSE_CACHE_SIZE > 0
+)
+
+
+# -------------------------
+# Uso desde los routers
+# -------------------------
+@lru_cache(maxsize=None)
+def type_adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def serialize(response_model, result) -> bytes:
+    """Valida el resultado (objetos ORM incluidos) con el response_model y lo pasa a JSON."""
+    trusted = trusted_dict(response_model, result)
+    if trusted is not None:
+        # Objeto ORM con serializador de confianza: sin segunda validación
+        return dumps(trusted)
+    adapter = type_adapter(response_model)
+    return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+
+
+# Con validadores, la entrada guarda una línea JSON con ETag/Last-Modified antes del cuerpo
+def _pack(etag: str, last_modified: datetime | None, body: bytes) -> bytes:
+    meta = {"etag": etag, "last_modified": last_modified.isoformat() if last_modified else None}
+    return json.dumps(meta).encode() + b"\n" + body
+
+
+def _unpack(value: bytes) -> tuple[str, datetime | None, bytes]:
+    meta, _, body = value.partition(b"\n")
+    meta = json.loads(meta)
+    last_modified = datetime.fromisoformat(meta["last_modified"]) if meta["last_modified"] else None
+    return meta["etag"], last_modified, body
+
+
+def _json_response(value: bytes, request: Request | None, validators: Callable | None) -> Response:
+    if validators is None:
+        return Response(content=value, media_type="application/json")
+
+    etag, last_modified, body = _unpack(value)
+    return not_modified(request, etag, last_modified) or Response(
+        content=body,
+        media_type="application/json",
+        headers=validator_headers(etag, last_modified)
+    )
+
+
+def _store(key: str, tags: list[str], response_model, result, validators: Callable | None, generation: int) -> bytes:
+    value = serialize(response_model, result)
+    if validators is not None:
+        value = _pack(*validators(result), value)
+    response_cache.set(key, value, tags, generation)
+    return value
+
+
+def cached_json(
+    key: str,
+    tags: list[str],
+    response_model,
+    produce: Callable,
+    request: Request | None = None,
+    validators: Callable | None = None
+) -> Response:
+    """
+    Devuelve el JSON cacheado o lo genera con produce(), lo serializa con el
+    response_model y lo guarda. El router ya no vuelve a validar la respuesta.
+    Con validators(resultado) -> (etag, last_modified) responde también a
+    peticiones condicionales (304) usando los validadores guardados.
+    """
+    value = response_cache.get(key)
+    if value is None:
+        generation = response_cache.generation
+        value = _store(key, tags, response_model, produce(), validators, generation)
+    return _json_response(value, request, validators)
+
+
+async def cached_json_async(
+    key: str,
+    tags: list[str],
+    response_model,
+    produce,
+    request: Request | None = None,
+    validators: Callable | None = None
+) -> Response:
+    """Igual que cached_json, pero produce() es una corrutina."""
+    value = response_cache.get(key)
+    if value is None:
+        generation = response_cache.generation
+        value = _store(key, tags, response_model, await produce(), validators, generation)
+    return _json_response(value, request, validators)
+
+
+def cached_html(key: str, tags: list[str], produce: Callable[[], str]) -> HTMLResponse:
+    """Igual que cached_json para páginas: produce() devuelve el HTML renderizado."""
+    body = response_cache.get(key)
+    if body is None:
+        generation = response_cache.generation
+        body = produce().encode()
+        response_cache.set(key, body, tags, generation)
+    return HTMLResponse(content=body)
+
+
+def invalidate_on_commit(db: Session, *tags: str):
+    """Para escrituras que no pasan por objetos ORM (INSERT/UPDATE directos)."""
+    db.info.setdefault("cache_tags", set()).update(tags)
+
+
+# -------------------------
+# Invalidación automática al confirmar
+# -------------------------
+def _old_value(obj, attribute: str):
+    history = inspect(obj).attrs[attribute].history
+    return history.deleted[0] if history.deleted else None
+
+
+def tags_for(obj) -> set[str]:
+    """Etiquetas de caché afectadas por la escritura de un objeto ORM."""
+    if isinstance(obj, GenreORM):
+        # El inicio filtra por nombre de género
+        return {"genres", f"genre:{obj.id}", "home"}
+    if isinstance(obj, DevORM):
+        return {"developers", f"developer:{obj.id}"}
+    if isinstance(obj, VideogameORM):
+        # Las rejillas de juegos de cada género y desarrolladora (fragmentos de plantilla)
+        tags = {f"videogame:{obj.id}", "home"}
+        for attribute, prefix in (("genre_id", "genre-games"), ("developer_id", "developer-games")):
+            for value in (getattr(obj, attribute), _old_value(obj, attribute)):
+                if value is not None:
+                    tags.add(f"{prefix}:{value}")
+        return tags
+    if isinstance(obj, ReviewORM):
+        # Las reviews y estadísticas van embebidas en el videojuego; "reviews"
+        # avisa a los cálculos hechos sobre todas las valoraciones
+        tags = {f"videogame:{obj.videogame_id}", "reviews"}
+        old_videogame_id = _old_value(obj, "videogame_id")
+        if old_videogame_id is not None:
+            tags.add(f"videogame:{old_videogame_id}")
+        return tags
+    if isinstance(obj, UserORM):
+        # Las listas de reseñas muestran el nick de cada autor
+        if inspect(obj).attrs.nick.history.deleted:
+            return {"reviewers"}
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_cache_tags(session, flush_context):
+    tags = session.info.setdefault("cache_tags", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tags |= tags_for(obj)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cache_tags(session):
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_cache_tags(session):
+    session.info.pop("cache_tags", None)
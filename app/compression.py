@@ -0,0 +1,235 @@
+"""
+Compresión de las respuestas (gzip, Brotli y Zstandard)
+
+Middleware ASGI que comprime las respuestas de texto (HTML, JSON, NDJSON,
+CSS...) con la mejor codificación que admitan a la vez el cliente
+(Accept-Encoding) y el servidor, por orden de COMPRESSION_ENCODINGS:
+
+- Respuestas completas: solo se comprimen a partir de COMPRESSION_MIN_SIZE
+  bytes y si el resultado es más pequeño que el original.
+- Respuestas en streaming (StreamingResponse, NDJSON...): cada trozo se
+  comprime y se vacía al momento (sync flush), así el cliente recibe cada
+  línea en cuanto se genera y no al final.
+- Se dejan tal cual las respuestas que ya traen Content-Encoding (los
+  ficheros precomprimidos de /assets), las parciales (Content-Range), las
+  imágenes y cualquier tipo que no sea texto.
+
+El nivel de cada codificación limita el coste de CPU por respuesta: los
+valores por defecto comprimen casi igual que el máximo por una fracción del
+tiempo (ver benchmarks/compression.py).
+
+Al comprimir se añade la codificación al ETag ("…-gzip", ver app/etag.py):
+los bytes comprimidos son otra representación y no pueden compartir ETag
+fuerte con los originales. not_modified y check_if_match quitan el sufijo, así
+que If-None-Match e If-Match funcionan igual con o sin compresión.
+
+Brotli y Zstandard necesitan los paquetes brotli y zstandard (opcionales);
+sin ellos solo se usa gzip.
+
+Variables de entorno:
+- COMPRESSION_ENCODINGS: codificaciones por orden de preferencia (por defecto br,zstd,gzip; vacío desactiva)
+- COMPRESSION_MIN_SIZE: bytes mínimos de una respuesta completa para comprimirla (por defecto 1024)
+- COMPRESSION_GZIP_LEVEL: nivel de gzip de 1 a 9 (por defecto 6)
+- COMPRESSION_BROTLI_QUALITY: calidad de Brotli de 0 a 11 (por defecto 4)
+- COMPRESSION_ZSTD_LEVEL: nivel de Zstandard de 1 a 22 (por defecto 3)
+"""
+
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.assets import accepted_encodings
+from app.etag import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # opcional
+    zstandard = None
+
+COMPRESSION_ENCODINGS = [name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip").split(",") if name.strip()]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+# Los eventos (SSE) no se comprimen: algunos proxies los retienen hasta llenar un búfer
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+# -------------------------
+# Compresores incrementales
+# -------------------------
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: formato gzip (cabecera y CRC), no zlib
+        self._compressor = zlib.compressobj(min(max(level, 1), 9), zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=min(max(quality, 0), 11))
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if finish else self._compressor.flush())
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=min(max(level, 1), 22)).compressobj()
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if finish else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+def available_encoders(gzip_level: int, brotli_quality: int, zstd_level: int) -> dict:
+    """Codificación -> función que crea su compresor, solo las que tienen la librería instalada."""
+    encoders = {"gzip": lambda: GzipEncoder(gzip_level)}
+    if brotli is not None:
+        encoders["br"] = lambda: BrotliEncoder(brotli_quality)
+    if zstandard is not None:
+        encoders["zstd"] = lambda: ZstdEncoder(zstd_level)
+    return encoders
+
+
+# -------------------------
+# Middleware
+# -------------------------
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: list[str] = COMPRESSION_ENCODINGS,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        zstd_level: int = COMPRESSION_ZSTD_LEVEL
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        encoders = available_encoders(gzip_level, brotli_quality, zstd_level)
+        # Por orden de preferencia, sin las que no están instaladas
+        self.encoders = [(name, encoders[name]) for name in encodings if name in encoders]
+
+    def choose(self, accept_encoding: str):
+        accepted = accepted_encodings(accept_encoding)
+        for name, factory in self.encoders:
+            if name in accepted:
+                return name, factory
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.encoders:
+            await self.app(scope, receive, send)
+            return
+
+        chosen = self.choose(Headers(scope=scope).get("accept-encoding", ""))
+        await CompressionResponder(self.app, self.minimum_size, chosen)(scope, receive, send)
+
+
+class CompressionResponder:
+    """Una respuesta: retiene el inicio hasta ver el primer trozo del cuerpo y decidir si comprime."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, chosen):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.chosen = chosen
+        self.send: Send | None = None
+        self.start: Message | None = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.wrapped_send)
+
+    def _compressible(self, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(EXCLUDED_TYPES)
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+        )
+
+    @staticmethod
+    def _encoded(headers: MutableHeaders, name: str):
+        headers["Content-Encoding"] = name
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], name)
+
+    async def wrapped_send(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if not self._compressible(headers) or message["status"] in (204, 304):
+                self.passthrough = True
+                await self.send(message)
+                return
+            # Las cachés intermedias deben distinguir la versión comprimida
+            MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            if self.chosen is None:
+                self.passthrough = True
+                await self.send(message)
+                return
+            self.start = message
+            return
+
+        if self.passthrough or message["type"] != "http.response.body":
+            if self.start is not None:
+                await self.send(self.start)
+                self.start = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            name, factory = self.chosen
+
+            if not more_body:
+                # Respuesta completa: umbral de tamaño y solo si compensa
+                compressed = factory().compress(body, finish=True) if len(body) >= self.minimum_size else body
+                if len(compressed) < len(body):
+                    self._encoded(headers, name)
+                    headers["Content-Length"] = str(len(compressed))
+                    body = compressed
+                self.passthrough = True
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+
+            # Streaming: no se sabe el tamaño final, se comprime trozo a trozo
+            self.encoder = factory()
+            self._encoded(headers, name)
+            if "content-length" in headers:
+                del headers["content-length"]
+            await self.send(start)
+
+        await self.send({
+            "type": "http.response.body",
+            "body": self.encoder.compress(body, finish=not more_body),
+            "more_body": more_body,
+        })
@@ -1,24 +1,132 @@
 """
 Configuración de la base de datos
+
+Variables de entorno:
+- DATABASE_URL: URL de SQLAlchemy (por defecto sqlite:///videogames.db)
+- DB_PROFILE: "development" (por defecto) o "production"
+- DB_POOL_SIZE: conexiones abiertas por proceso (por defecto 40, los hilos del pool de Starlette)
+- DB_POOL_OVERFLOW: conexiones extra temporales por proceso (por defecto 20: respuestas en
+  streaming que mantienen la sesión e hilos en segundo plano)
+- DB_ASYNC: "1" para servir la API con AsyncSession sobre aiosqlite
 """
 
-from sqlalchemy import create_engine, select
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///videogames.db")
+DB_PROFILE = os.getenv("DB_PROFILE", "development")
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
 # -------------------------
 # Clase base para modelos SQLAlchemy
 # -------------------------
 class Base(DeclarativeBase):
     pass
 
+
+def utcnow() -> datetime:
+    """Fecha actual en UTC sin zona horaria (SQLite no guarda la zona)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+# -------------------------
+# Perfiles del motor
+# -------------------------
+ENGINE_PROFILES = {
+    # Desarrollo: ajustes por defecto de SQLite y SQL en consola
+    "development": {
+        "echo": True,
+        "pragmas": {},
+    },
+    # Producción: WAL para que los lectores no esperen a los escritores,
+    # fsync solo en los checkpoints y caché/mmap más grandes
+    "production": {
+        "echo": False,
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,   # en KiB: 64 MiB
+            "busy_timeout": 5000,       # ms esperando el bloqueo de escritura
+            "temp_store": "MEMORY",
+        },
+    },
+}
+
+
+# Hilos del pool de anyio en el que Starlette ejecuta los endpoints síncronos
+THREADPOOL_SIZE = 40
+
+
+def pool_size_per_worker() -> int:
+    """
+    Al menos una conexión por hilo del pool: si no, las peticiones esperan en
+    QueuePool y acaban en TimeoutError. No se reparte entre workers porque
+    SQLite no tiene un límite de conexiones en el servidor: cada proceso abre
+    las suyas sobre el mismo fichero.
+    """
+    return max(1, int(os.getenv("DB_POOL_SIZE", str(THREADPOOL_SIZE))))
+
+
+def pool_overflow() -> int:
+    return max(0, int(os.getenv("DB_POOL_OVERFLOW", "20")))
+
+
+def _profile_settings(profile: str) -> dict:
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Perfil de base de datos desconocido: {profile}")
+    return ENGINE_PROFILES[profile]
+
+
+def _install_pragmas(sync_engine, pragmas: dict):
+    if not pragmas:
+        return
+
+    # Se aplican a cada conexión nueva del pool
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def build_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    settings = _profile_settings(profile)
+
+    new_engine = create_engine(
+        url,
+        echo=settings["echo"],
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size_per_worker(),
+        max_overflow=pool_overflow()
+    )
+    _install_pragmas(new_engine, settings["pragmas"])
+
+    return new_engine
+
+
+def build_async_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    """Mismo perfil que build_engine pero con el driver aiosqlite."""
+    settings = _profile_settings(profile)
+
+    new_engine = create_async_engine(
+        url.replace("sqlite://", "sqlite+aiosqlite://", 1),
+        echo=settings["echo"],
+        pool_size=pool_size_per_worker(),
+        max_overflow=pool_overflow()
+    )
+    _install_pragmas(new_engine.sync_engine, settings["pragmas"])
+
+    return new_engine
+
 # -------------------------
 # Motor de conexión a la base de datos
 # -------------------------
-engine = create_engine(
-    "sqlite:///videogames.db",
-    echo=True,
-    connect_args={"check_same_thread": False}
-)
+engine = build_engine()
 
 # -------------------------
 # Fábrica de sesiones
@@ -30,6 +138,17 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# -------------------------
+# Motor y sesiones asíncronas (solo con DB_ASYNC, requiere aiosqlite)
+# -------------------------
+async_engine = build_async_engine() if DB_ASYNC else None
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=True,
+    expire_on_commit=False
+)
+
 # -------------------------
 # Dependencia para FastAPI
 # -------------------------
@@ -40,20 +159,45 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # -------------------------
 # Inicialización de la base de datos
 # -------------------------
-def init_db():
+# Se ejecutan al arrancar y desde python -m app.seed a través de
+# app.startup.prepare_database, que evita que dos procesos lo hagan a la vez
+def create_schema():
+    """Crea las tablas que falten y aplica las migraciones pendientes."""
     # Importar modelos aquí dentro para evitar circular imports
     from app.models.genre import GenreORM
     from app.models.videogame import VideogameORM
     from app.models.developer import DevORM
     from app.models.user import UserORM
     from app.models.review import ReviewORM
+    from app.models.videogame_stats import VideogameStatsORM
+    from app.migrations import run_migrations
 
     # Crear todas las tablas
     Base.metadata.create_all(engine)
 
+    with SessionLocal() as db:
+        # Actualizar bases de datos existentes (índices, tablas derivadas...)
+        run_migrations(db)
+
+
+def seed_db():
+    """Carga los géneros, desarrolladoras, juegos, usuarios y reviews de ejemplo si la base de datos está vacía."""
+    from app.models.genre import GenreORM
+    from app.models.videogame import VideogameORM
+    from app.models.developer import DevORM
+    from app.models.user import UserORM
+    from app.models.review import ReviewORM
+    from app.rating_stats import rebuild_rating_stats
+    from app.security import hash_password
+
     db = SessionLocal()
     try:
         # Si ya hay géneros, asumimos que la DB ya tiene datos
@@ -203,9 +347,9 @@ def init_db():
         # -------------------------
         # Crear usuarios de ejemplo
         # -------------------------
-        user1 = UserORM(nick="admin", email="admin@hotmail.es", nif="1231231231", password="admin1234")
-        user2 = UserORM(nick="player1", email="player1@gmail.com", nif="111111111A", password="player1234")
-        user3 = UserORM(nick="player2", email="player2@gmail.com", nif="222222222B", password="player2345")
+        user1 = UserORM(nick="admin", email="admin@hotmail.es", nif="1231231231", password=hash_password("admin1234"))
+        user2 = UserORM(nick="player1", email="player1@gmail.com", nif="111111111A", password=hash_password("player1234"))
+        user3 = UserORM(nick="player2", email="player2@gmail.com", nif="222222222B", password=hash_password("player2345"))
         db.add_all([user1, user2, user3])
         db.commit()
         
@@ -227,13 +371,15 @@ def init_db():
         # Crear reviews de ejemplo
         # -------------------------
         review1 = ReviewORM(rating=8.6, comment="Muy divertido", user_id=user1.id, videogame_id=1)
-        review2 = ReviewORM(rating=9.0, comment="Me encantó", user_id=user1.id, videogame_id=1)
+        review2 = ReviewORM(rating=9.0, comment="Me encantó", user_id=user1.id, videogame_id=2)
         review3 = ReviewORM(rating=7.5, comment="Buen juego", user_id=user2.id, videogame_id=1)
         review4 = ReviewORM(rating=9.2, comment="Excelente RPG", user_id=user2.id, videogame_id=2)
         review5 = ReviewORM(rating=8.0, comment="Entretenido", user_id=user3.id, videogame_id=3)
         review6 = ReviewORM(rating=9.5, comment="Me fascinó", user_id=user3.id, videogame_id=2)
 
         db.add_all([review1, review2, review3, review4, review5, review6])
+        db.flush()
+        rebuild_rating_stats(db)
         db.commit()
 
     finally:
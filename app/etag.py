@@ -0,0 +1,182 @@
+"""
+Peticiones condicionales: ETag / If-None-Match, Last-Modified / If-Modified-Since e If-Match
+
+El ETag se calcula a partir de las columnas version y updated_at (y de las de
+las entidades embebidas), sin serializar la respuesta. Es un ETag fuerte:
+cambia siempre que cambia el contenido, así que sirve también para la
+concurrencia optimista de PUT/PATCH con If-Match.
+
+SQLite puede reutilizar el id de la última fila borrada y version vuelve a
+empezar en 1, así que (id, version) no basta: updated_at, que se fija al crear
+la fila, distingue el recurso nuevo del borrado.
+
+Cuando app.compression comprime la respuesta, añade la codificación al ETag
+("…-gzip"): cada representación tiene su propio ETag fuerte y una caché no
+confunde los bytes comprimidos con los originales. Al evaluar If-None-Match e
+If-Match se quita ese sufijo, así que el cliente puede mandar cualquiera de
+las dos formas.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models.user import UserORM
+from app.models.videogame import VideogameORM
+
+
+# -------------------------
+# Construcción de validadores
+# -------------------------
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def latest(*dates: datetime | None) -> datetime | None:
+    present = [d for d in dates if d is not None]
+    return max(present) if present else None
+
+
+def videogame_validators(videogame: VideogameORM) -> tuple[str, datetime | None]:
+    """ETag y Last-Modified de un VideogameResponse (con sus reviews ya cargadas)."""
+    reviews = videogame.reviews
+    etag = make_etag(
+        "videogame", videogame.id, videogame.version, videogame.updated_at,
+        [(r.id, r.version, r.updated_at) for r in reviews]
+    )
+    stats_updated_at = videogame.stats.updated_at if videogame.stats else None
+    last_modified = latest(videogame.updated_at, stats_updated_at, *(r.updated_at for r in reviews))
+    return etag, last_modified
+
+
+def videogame_page_validators(videogames: list[VideogameORM], next_cursor: str | None) -> tuple[str, datetime | None]:
+    validators = [videogame_validators(videogame) for videogame in videogames]
+    etag = make_etag("videogames", next_cursor, [etag for etag, _ in validators])
+    return etag, latest(*(last_modified for _, last_modified in validators))
+
+
+def user_validators(user: UserORM, library: list[tuple], reviews: list[tuple]) -> tuple[str, datetime | None]:
+    """
+    library: filas (videogame_id, version, updated_at) de la biblioteca; updated_at
+             incluye el de sus estadísticas, que van embebidas en la respuesta
+    reviews: filas (id, version, updated_at) de las reviews del usuario
+    """
+    etag = make_etag(
+        "user", user.id, user.version, user.updated_at,
+        list(library),
+        list(reviews)
+    )
+    last_modified = latest(
+        user.updated_at,
+        *(updated_at for _, _, updated_at in library),
+        *(updated_at for _, _, updated_at in reviews)
+    )
+    return etag, last_modified
+
+
+# -------------------------
+# Evaluación de las cabeceras
+# -------------------------
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+# Codificaciones que app.compression puede añadir al ETag
+CONTENT_CODINGS = ("gzip", "br", "zstd")
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """ETag de la respuesta comprimida con coding: '"abc"' -> '"abc-gzip"'."""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def _decoded_etag(tag: str) -> str:
+    for coding in CONTENT_CODINGS:
+        if tag.endswith(f'-{coding}"'):
+            return tag[:-len(coding) - 2] + '"'
+    return tag
+
+
+def _etag_list(header: str) -> list[str]:
+    # Las comparaciones de If-None-Match son débiles: se ignora el prefijo W/
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime | None) -> Response | None:
+    """Devuelve una respuesta 304 si el cliente ya tiene esta versión, o None."""
+    headers = validator_headers(etag, last_modified)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Si hay If-None-Match se ignora If-Modified-Since
+        for tag in _etag_list(if_none_match):
+            if tag == "*" or _decoded_etag(tag) == etag:
+                # El 304 lleva el ETag de la representación que tiene el cliente
+                if tag != "*":
+                    headers["ETag"] = tag
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return None
+
+
+def check_if_match(request: Request, etag: str):
+    """Concurrencia optimista: si el cliente manda If-Match y el recurso cambió, 412."""
+    if_match = request.headers.get("if-match")
+    if if_match is None:
+        return
+
+    # If-Match usa comparación fuerte: un ETag débil nunca coincide
+    tags = [_decoded_etag(tag.strip()) for tag in if_match.split(",")]
+    if "*" not in tags and etag not in tags:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="El recurso ha cambiado desde que se leyó (If-Match no coincide)"
+        )
+
+
+# -------------------------
+# Confirmar con control de versión
+# -------------------------
+STALE_DETAIL = "El recurso ha sido modificado por otra petición; vuelve a leerlo"
+
+
+def commit_versioned(db: Session):
+    """El UPDATE comprueba la columna version: si otra petición la cambió, 412."""
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=STALE_DETAIL)
+
+
+async def commit_versioned_async(db: AsyncSession):
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=STALE_DETAIL)
@@ -0,0 +1,132 @@
+"""
+Campos dispersos (?fields=) e inclusión opcional de relaciones (?include=)
+
+- ?fields=id,title,cover_url  -> solo esos campos (id siempre va incluido)
+- ?include=reviews,genre      -> exactamente esas relaciones embebidas;
+                                 ?include= vacío no embebe ninguna
+- Una relación nombrada en fields también se embebe
+
+Sin ninguno de los dos parámetros la respuesta es la de siempre. Con ellos el
+router ajusta las opciones de carga (load_only, selectinload) para no consultar
+ni serializar lo que el cliente no ha pedido.
+"""
+
+from functools import partial
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy.orm import lazyload, load_only, selectinload
+
+from app.cache import type_adapter
+from app.serialization import dumps
+
+
+# -------------------------
+# Relaciones embebibles
+# -------------------------
+class Relation:
+    """
+    attribute: relación ORM
+    response_model: esquema con el que se serializa
+    requires: columnas que hay que cargar para poder seguir la relación (claves ajenas)
+    option: opción de carga; por defecto selectinload(attribute)
+    """
+
+    def __init__(self, attribute, response_model, requires: tuple = (), option=None):
+        self.attribute = attribute
+        self.response_model = response_model
+        self.requires = requires
+        self.option = option if option is not None else selectinload(attribute)
+
+
+class Selection:
+    """Campos y relaciones pedidos para un recurso."""
+
+    def __init__(self, fieldset: "Fieldset", fields: list[str], include: list[str], default: bool):
+        self.fieldset = fieldset
+        self.fields = fields
+        self.include = include
+        self.is_default = default
+
+    def options(self) -> list:
+        model = self.fieldset.model
+        relations = self.fieldset.relations
+
+        columns = {"id", *self.fields}
+        for name in self.include:
+            columns.update(column.key for column in relations[name].requires)
+
+        options = [load_only(*(getattr(model, column) for column in sorted(columns)))]
+        for name, relation in relations.items():
+            # Las relaciones no pedidas no se cargan, aunque su lazy por defecto sea "joined"
+            options.append(relation.option if name in self.include else lazyload(relation.attribute))
+        return options
+
+    def dump(self, obj) -> dict:
+        # obj es un objeto ORM o un dict ya serializado (p. ej. de build_user_responses)
+        value = obj.get if isinstance(obj, dict) else partial(getattr, obj)
+        data = {name: value(name) for name in self.fields}
+        for name in self.include:
+            adapter = type_adapter(self.fieldset.relations[name].response_model)
+            data[name] = adapter.dump_python(
+                adapter.validate_python(value(name), from_attributes=True),
+                mode="json"
+            )
+        return data
+
+    def encode(self, obj) -> bytes:
+        return dumps(self.dump(obj))
+
+    # La respuesta ya no encaja en el response_model: se devuelve el JSON directamente
+    def response(self, obj) -> Response:
+        return Response(content=self.encode(obj), media_type="application/json")
+
+    def page_response(self, items: list, next_cursor: str | None) -> Response:
+        body = {"items": [self.dump(obj) for obj in items], "next_cursor": next_cursor}
+        return Response(content=dumps(body), media_type="application/json")
+
+
+# -------------------------
+# Dependencia para los routers
+# -------------------------
+class Fieldset:
+    """
+    Describe los campos de un recurso; la instancia se usa como dependencia
+    (Depends(videogame_fields)) y devuelve la Selection de la petición.
+    """
+
+    def __init__(self, model, response_model, relations: dict[str, Relation], default_include: list[str]):
+        self.model = model
+        self.relations = relations
+        self.default_include = default_include
+        self.scalar_fields = [name for name in response_model.model_fields if name not in relations]
+
+    def _parse(self, value: str, allowed: list[str], parameter: str) -> list[str]:
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Valores no válidos en {parameter}: {', '.join(unknown)}; opciones: {', '.join(allowed)}"
+            )
+        return list(dict.fromkeys(names))
+
+    def __call__(
+        self,
+        fields: str | None = Query(None, description="Campos a devolver, separados por comas"),
+        include: str | None = Query(None, description="Relaciones a embeber, separadas por comas")
+    ) -> Selection:
+        if fields is None and include is None:
+            return Selection(self, self.scalar_fields, self.default_include, default=True)
+
+        relation_names = list(self.relations)
+        included = [] if include is None else self._parse(include, relation_names, "include")
+
+        if fields is None:
+            # Solo ?include=: todos los campos y las relaciones pedidas
+            return Selection(self, self.scalar_fields, included, default=False)
+
+        requested = self._parse(fields, self.scalar_fields + relation_names, "fields")
+        selected = ["id", *(name for name in requested if name in self.scalar_fields and name != "id")]
+        included = list(dict.fromkeys([*included, *(name for name in requested if name in self.relations)]))
+
+        return Selection(self, selected, included, default=False)
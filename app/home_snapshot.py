@@ -0,0 +1,152 @@
+"""
+Instantánea precalculada de los datos de la página de inicio
+
+La página de inicio muestra los últimos videojuegos añadidos y unos pocos de
+cada género destacado. Esos datos se guardan en una instantánea en memoria
+(solo id, título y portada) que se reconstruye en un hilo en segundo plano
+cuando se confirma una escritura con la etiqueta de caché "home" (altas,
+ediciones o bajas de videojuegos y géneros). La página se renderiza a partir
+de la instantánea sin consultar la base de datos.
+
+Mientras se reconstruye se sigue sirviendo la instantánea anterior. Solo la
+primera petición del proceso la construye de forma síncrona.
+
+Las invalidaciones solo llegan al proceso que hizo la escritura. Con varios
+workers, los demás se enteran porque una instantánea con más de
+HOME_SNAPSHOT_MAX_AGE segundos también se reconstruye en segundo plano (se
+sirve la anterior mientras tanto).
+
+Variables de entorno:
+- HOME_SNAPSHOT_DEBOUNCE: segundos que se esperan para agrupar escrituras seguidas (por defecto 0.05)
+- HOME_SNAPSHOT_MAX_AGE: segundos tras los que la instantánea se reconstruye aunque no haya invalidaciones (por defecto 30; 0 no caduca)
+"""
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import Row, func, select
+from sqlalchemy.orm import Session
+
+from app.cache import response_cache
+from app.database import SessionLocal
+from app.models.genre import GenreORM
+from app.models.videogame import VideogameORM
+
+logger = logging.getLogger(__name__)
+
+HOME_SNAPSHOT_DEBOUNCE = float(os.getenv("HOME_SNAPSHOT_DEBOUNCE", "0.05"))
+HOME_SNAPSHOT_MAX_AGE = float(os.getenv("HOME_SNAPSHOT_MAX_AGE", "30"))
+
+LATEST_COUNT = 5
+FEATURED_GENRES = ["Acción", "Aventura"]
+FEATURED_COUNT = 3
+
+
+# -------------------------
+# Construcción
+# -------------------------
+class HomeSnapshot:
+    def __init__(self, version: int, latest: list[Row], featured: dict[str, list[Row]]):
+        self.version = version
+        self.latest = latest
+        self.featured = featured
+        self.built_at = time.monotonic()
+
+
+def build_home_snapshot(db: Session, version: int) -> HomeSnapshot:
+    """Dos consultas: los últimos añadidos y los destacados de todos los géneros a la vez."""
+    card_columns = (VideogameORM.id, VideogameORM.title, VideogameORM.cover_url)
+
+    latest = db.execute(
+        select(*card_columns).order_by(VideogameORM.id.desc()).limit(LATEST_COUNT)
+    ).all()
+
+    # Los primeros FEATURED_COUNT juegos de cada género, numerados con una función ventana
+    ranked = (
+        select(
+            *card_columns,
+            GenreORM.name.label("genre"),
+            func.row_number().over(partition_by=GenreORM.name, order_by=VideogameORM.id).label("position")
+        )
+        .join(GenreORM, GenreORM.id == VideogameORM.genre_id)
+        .where(GenreORM.name.in_(FEATURED_GENRES))
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked.c.id, ranked.c.title, ranked.c.cover_url, ranked.c.genre)
+        .where(ranked.c.position <= FEATURED_COUNT)
+        .order_by(ranked.c.genre, ranked.c.position)
+    ).all()
+
+    featured = {genre: [] for genre in FEATURED_GENRES}
+    for row in rows:
+        featured[row.genre].append(row)
+
+    return HomeSnapshot(version, latest, featured)
+
+
+# -------------------------
+# Instantánea actual y reconstrucción en segundo plano
+# -------------------------
+class HomeSnapshotStore:
+    def __init__(self, debounce: float, max_age: float = 0):
+        self.debounce = debounce
+        self.max_age = max_age
+        self.rebuilds = 0
+        self._snapshot: HomeSnapshot | None = None
+        self._stale = threading.Event()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def get(self) -> HomeSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self.rebuild()
+                snapshot = self._snapshot
+        elif self.max_age > 0 and time.monotonic() - snapshot.built_at > self.max_age:
+            # Puede haber cambios de otros workers: se sirve esta y se reconstruye aparte
+            self.mark_stale()
+        return snapshot
+
+    def rebuild(self):
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        with SessionLocal() as db:
+            snapshot = build_home_snapshot(db, version)
+        # Se sustituye de una vez: los lectores ven la anterior o la nueva, nunca una a medias
+        self._snapshot = snapshot
+        self.rebuilds += 1
+
+    def mark_stale(self):
+        self._stale.set()
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="home-snapshot", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            self._stale.wait()
+            time.sleep(self.debounce)
+            # Lo que se confirme durante la reconstrucción vuelve a marcarla
+            self._stale.clear()
+            try:
+                with self._lock:
+                    self.rebuild()
+            except Exception:
+                logger.exception("No se pudo reconstruir la instantánea de la página de inicio")
+
+
+home_snapshot = HomeSnapshotStore(HOME_SNAPSHOT_DEBOUNCE, HOME_SNAPSHOT_MAX_AGE)
+
+
+def _on_invalidate(tags: set[str]):
+    if "home" in tags:
+        home_snapshot.mark_stale()
+
+
+response_cache.subscribe(_on_invalidate)
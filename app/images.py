@@ -0,0 +1,369 @@
+"""
+Portadas e imágenes servidas desde el propio servidor
+
+Las portadas (cover_url) y las imágenes de géneros y desarrolladoras apuntan a
+webs de terceros y a tamaño completo. Cada imagen se descarga una sola vez,
+se guardan miniaturas en varios anchos con un nombre que depende de su
+contenido y se sirven desde /media con caché inmutable de un año:
+
+    /media/3f9a...c1-320.webp
+
+Las plantillas no usan la URL original sino los filtros:
+
+    <img src="{{ game.cover_url | thumb(320) }}" srcset="{{ game.cover_url | srcset }}" loading="lazy">
+
+- Si la imagen ya se descargó, el filtro da directamente la URL de /media.
+- Si no, da /images/{ancho}/{token}, donde token es la URL original firmada
+  (así no sirve como proxy abierto). Esa ruta descarga la imagen, genera las
+  miniaturas y redirige a /media. El filtro además la encola para
+  descargarla en segundo plano, de modo que el siguiente renderizado ya
+  apunte a /media.
+- Si la descarga falla se redirige a la URL original, así que la página se ve
+  igual, y durante FAILED_RETRY_AFTER segundos los filtros dan esa URL.
+
+Las rutas locales (/static/...) se leen del disco en lugar de descargarse.
+Solo se descargan imágenes de direcciones públicas: las URLs que apuntan (o
+redirigen) a loopback, redes privadas, link-local o rangos reservados se
+rechazan y se sirve la URL original. La descarga se conecta a la dirección
+comprobada, sin volver a resolver el nombre.
+
+Las miniaturas se generan con Pillow (dependencia opcional). Sin Pillow se
+guarda la imagen original tal cual: se sigue sirviendo desde el propio
+servidor con caché inmutable, pero sin redimensionar.
+
+Variables de entorno:
+- IMAGE_CACHE_DIR: directorio de las imágenes (por defecto media)
+- IMAGE_WIDTHS: anchos de las miniaturas separados por comas (por defecto 160,320,640,1280)
+- IMAGE_FORMAT: webp o avif (por defecto webp; avif necesita soporte en Pillow)
+- IMAGE_QUALITY: calidad de compresión de 1 a 100 (por defecto 80)
+- IMAGE_MAX_BYTES: tamaño máximo de una imagen original (por defecto 10 MB)
+- IMAGE_FETCH_TIMEOUT: segundos máximos de descarga (por defecto 10)
+"""
+
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import httpx
+
+from app.security import sign
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow es opcional: sin él se guardan los originales
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "media")
+IMAGE_WIDTHS = tuple(sorted(int(width) for width in os.getenv("IMAGE_WIDTHS", "160,320,640,1280").split(",")))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "webp")
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "10"))
+# Redirecciones seguidas como máximo al descargar una imagen
+IMAGE_MAX_REDIRECTS = 5
+
+STATIC_DIRECTORY = "app/static"
+MEDIA_PREFIX = "/media"
+PROXY_PREFIX = "/images"
+# Las páginas cacheadas pueden llevar enlaces firmados durante un tiempo
+PROXY_LINK_MAX_AGE = 30 * 24 * 3600
+# Una imagen que no se pudo descargar no se reintenta hasta pasado este tiempo
+FAILED_RETRY_AFTER = 600
+
+# Extensión de los originales según el formato detectado (sin Pillow)
+ORIGINAL_EXTENSIONS = {
+    b"\x89PNG": "png",
+    b"\xff\xd8\xff": "jpg",
+    b"GIF8": "gif",
+    b"RIFF": "webp",
+}
+
+
+class ImageError(Exception):
+    """La imagen no se pudo descargar o no es una imagen válida."""
+
+
+# -------------------------
+# Obtener el original
+# -------------------------
+def is_public_address(address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bool:
+    """Solo direcciones de Internet: ni loopback, ni redes privadas, ni link-local, ni reservadas."""
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def check_public_host(url: httpx.URL) -> str:
+    """
+    Las URLs de las imágenes las escribe cualquiera por la API: el servidor no
+    debe servir para hacer peticiones a su propia red (SSRF). Se resuelve el
+    nombre, se rechaza si alguna de sus direcciones no es pública y se devuelve
+    la primera: la conexión se hace a esa dirección y no se vuelve a resolver
+    (si no, el DNS podría dar otra distinta la segunda vez).
+    """
+    if url.scheme not in ("http", "https") or not url.host:
+        raise ImageError(f"URL de imagen no admitida: {url}")
+    try:
+        addresses = socket.getaddrinfo(url.host, url.port or (443 if url.scheme == "https" else 80), type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as error:
+        raise ImageError(f"No se pudo resolver {url.host}: {error}") from error
+
+    for *_, sockaddr in addresses:
+        if not is_public_address(ipaddress.ip_address(sockaddr[0].split("%")[0])):
+            raise ImageError(f"{url.host} apunta a una dirección no pública ({sockaddr[0]})")
+    return addresses[0][4][0]
+
+
+def pinned_request(client: httpx.Client, url: httpx.URL, address: str) -> httpx.Request:
+    """
+    Petición a la dirección ya comprobada en lugar de al nombre. Host y SNI
+    siguen siendo el nombre original, así que el servidor virtual y la
+    verificación del certificado no cambian.
+    """
+    return client.build_request(
+        "GET",
+        url.copy_with(host=address),
+        headers={"Host": url.netloc.decode("ascii")},
+        extensions={"sni_hostname": url.host},
+    )
+
+
+def fetch_source(source: str) -> bytes:
+    """
+    Lee /static/... del disco o descarga http(s):// con límite de tamaño y
+    tiempo, solo desde direcciones públicas. Las redirecciones se siguen a mano
+    para comprobar también el destino de cada una, y cada petición va a la
+    dirección comprobada.
+    """
+    if source.startswith("/static/"):
+        path = os.path.normpath(os.path.join(STATIC_DIRECTORY, source.removeprefix("/static/")))
+        if not path.startswith(os.path.normpath(STATIC_DIRECTORY) + os.sep) or not os.path.isfile(path):
+            raise ImageError(f"No existe el fichero estático {source}")
+        with open(path, "rb") as file:
+            return file.read(IMAGE_MAX_BYTES + 1)
+
+    if not source.startswith(("http://", "https://")):
+        raise ImageError(f"URL de imagen no admitida: {source}")
+
+    try:
+        url = httpx.URL(source)
+        with httpx.Client(timeout=IMAGE_FETCH_TIMEOUT, follow_redirects=False) as client:
+            for _ in range(IMAGE_MAX_REDIRECTS + 1):
+                address = check_public_host(url)
+                response = client.send(pinned_request(client, url, address), stream=True)
+                try:
+                    if response.is_redirect:
+                        url = url.join(response.headers["location"])
+                        continue
+
+                    response.raise_for_status()
+                    if not response.headers.get("content-type", "").startswith("image/"):
+                        raise ImageError(f"{source} no es una imagen")
+
+                    body = bytearray()
+                    for chunk in response.iter_bytes():
+                        body += chunk
+                        if len(body) > IMAGE_MAX_BYTES:
+                            raise ImageError(f"{source} supera {IMAGE_MAX_BYTES} bytes")
+                    return bytes(body)
+                finally:
+                    response.close()
+    except (httpx.HTTPError, httpx.InvalidURL) as error:
+        raise ImageError(f"No se pudo descargar {source}: {error}") from error
+
+    raise ImageError(f"{source} tiene más de {IMAGE_MAX_REDIRECTS} redirecciones")
+
+
+# -------------------------
+# Almacén de miniaturas
+# -------------------------
+class ImageStore:
+    """
+    Guarda cada original una vez, por el hash de su contenido, junto con sus
+    miniaturas. sources/ relaciona cada URL original con ese hash.
+    fetch se puede sustituir (por ejemplo por un servidor local en pruebas).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        widths: tuple[int, ...],
+        format: str,
+        quality: int,
+        fetch: Callable[[str], bytes] = fetch_source
+    ):
+        self.directory = directory
+        self.widths = widths
+        self.format = format
+        self.quality = quality
+        self.fetch = fetch
+        self.resize = Image is not None and (format != "avif" or features.check("avif"))
+        self.ingested = 0
+        self.failed = 0
+        self._known: dict[str, str] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="images")
+        self._queued: set[str] = set()
+        self._failed_at: dict[str, float] = {}
+        os.makedirs(os.path.join(directory, "sources"), exist_ok=True)
+
+    # --- Nombres ---
+    def _source_path(self, source: str) -> str:
+        return os.path.join(self.directory, "sources", hashlib.sha256(source.encode()).hexdigest())
+
+    def lookup(self, source: str) -> str | None:
+        """Nombre base (hash.extension) de una URL ya descargada, o None."""
+        stored = self._known.get(source)
+        if stored is None:
+            try:
+                with open(self._source_path(source)) as file:
+                    stored = file.read().strip()
+            except FileNotFoundError:
+                return None
+            self._known[source] = stored
+        if self.resize and not stored.endswith(f".{self.format}"):
+            # Guardada sin Pillow o con otro IMAGE_FORMAT: hay que volver a generarla
+            return None
+        return stored
+
+    def variant(self, stored: str, width: int) -> str:
+        """Nombre del fichero servido para ese ancho (el original si no se redimensiona)."""
+        if not self.resize:
+            return stored
+        digest = stored.partition(".")[0]
+        return f"{digest}-{self._width(width)}.{self.format}"
+
+    def _width(self, width: int) -> int:
+        # El ancho pedido se redondea al siguiente generado
+        return next((candidate for candidate in self.widths if candidate >= width), self.widths[-1])
+
+    # --- Descarga y miniaturas ---
+    def ingest(self, source: str) -> str:
+        """Descarga la imagen si hace falta y devuelve su nombre base. Una descarga por URL a la vez."""
+        stored = self.lookup(source)
+        if stored is not None:
+            return stored
+
+        with self._locks_lock:
+            lock = self._locks.setdefault(source, threading.Lock())
+        try:
+            with lock:
+                stored = self.lookup(source)
+                if stored is None:
+                    try:
+                        stored = self._store(self.fetch(source))
+                    except Exception:
+                        self.failed += 1
+                        self._failed_at[source] = time.monotonic()
+                        raise
+                    self._write(self._source_path(source), stored.encode())
+                    self._known[source] = stored
+                    self.ingested += 1
+        finally:
+            with self._locks_lock:
+                self._locks.pop(source, None)
+        return stored
+
+    def _store(self, original: bytes) -> str:
+        if len(original) > IMAGE_MAX_BYTES:
+            raise ImageError(f"La imagen supera {IMAGE_MAX_BYTES} bytes")
+
+        digest = hashlib.sha256(original).hexdigest()[:32]
+
+        if not self.resize:
+            extension = next((ext for magic, ext in ORIGINAL_EXTENSIONS.items() if original.startswith(magic)), None)
+            if extension is None:
+                raise ImageError("Formato de imagen no reconocido")
+            stored = f"{digest}.{extension}"
+            path = os.path.join(self.directory, stored)
+            if not os.path.exists(path):
+                self._write(path, original)
+            return stored
+
+        try:
+            image = ImageOps.exif_transpose(Image.open(io.BytesIO(original)))
+            image.load()
+        except Exception as error:
+            raise ImageError(f"Imagen no válida: {error}") from error
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+        stored = f"{digest}.{self.format}"
+        for width in self.widths:
+            path = os.path.join(self.directory, self.variant(stored, width))
+            if os.path.exists(path):
+                continue
+            thumbnail = image.copy()
+            # Nunca se amplía: si el original es más estrecho se guarda a su tamaño
+            thumbnail.thumbnail((width, width * 4))
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, self.format, quality=self.quality)
+            self._write(path, buffer.getvalue())
+        return stored
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # Se escribe aparte y se renombra: nunca se sirve un fichero a medias
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+    def ingest_later(self, source: str):
+        if source in self._queued:
+            return
+        self._queued.add(source)
+
+        def run():
+            try:
+                self.ingest(source)
+            except Exception as error:
+                logger.warning("No se pudo preparar la imagen %s: %s", source, error)
+            finally:
+                self._queued.discard(source)
+
+        self._background.submit(run)
+
+    # --- URLs para las plantillas ---
+    def url(self, source: str | None, width: int) -> str | None:
+        if not source:
+            return source
+
+        stored = self.lookup(source)
+        if stored is not None:
+            return f"{MEDIA_PREFIX}/{self.variant(stored, width)}"
+
+        failed_at = self._failed_at.get(source)
+        if failed_at is not None and time.monotonic() - failed_at < FAILED_RETRY_AFTER:
+            return source
+
+        self.ingest_later(source)
+        return f"{PROXY_PREFIX}/{self._width(width)}/{sign({'u': source}, PROXY_LINK_MAX_AGE)}"
+
+    def srcset(self, source: str | None) -> str:
+        if not source or not self.resize:
+            return ""
+        return ", ".join(f"{self.url(source, width)} {width}w" for width in self.widths)
+
+    def stats(self) -> dict:
+        return {
+            "resize": self.resize,
+            "format": self.format if self.resize else None,
+            "ingested": self.ingested,
+            "failed": self.failed,
+            "pending": len(self._queued),
+        }
+
+
+image_store = ImageStore(IMAGE_CACHE_DIR, IMAGE_WIDTHS, IMAGE_FORMAT, IMAGE_QUALITY)
+
@@ -0,0 +1,474 @@
+"""
+Clasificaciones de videojuegos: mejor valorados y en tendencia
+
+- Mejor valorados: media bayesiana de las reviews,
+      (C * m + suma de notas) / (C + número de reviews)
+  donde m es la media global y C = LEADERBOARD_PRIOR_WEIGHT reviews
+  "ficticias". Un juego con una sola review de 10 no adelanta a uno con
+  cientos de reviews de 9. Los juegos sin reviews no entran.
+- En tendencia: altas en bibliotecas (user_game.added_at) dentro de la
+  ventana pedida (24h, 7d o 30d).
+
+Cada clasificación se guarda ya ordenada en memoria para el total y para cada
+género y desarrolladora, así que un top-N es un trozo de una lista y no un
+GROUP BY sobre todas las reviews.
+
+Las consultas nunca calculan ni esperan: leen la última vista publicada
+(LeaderboardView) sin bloqueos. Todo el trabajo lo hace un hilo en segundo
+plano, que arranca con la aplicación (hasta la primera carga, /top responde
+503) y publica cada vista nueva de una vez:
+
+- Carga completa al arrancar y cuando la vista tiene más de
+  LEADERBOARD_MAX_AGE segundos. Las invalidaciones solo llegan al worker que
+  hizo la escritura: así entran también los cambios hechos en otros workers.
+- Cambios incrementales poco después de cada invalidación:
+  - "videogame:{id}" (reviews, ediciones y bajas de videojuegos): se relee la
+    fila de videogame_stats del juego y se recoloca
+  - altas en bibliotecas: se leen de user_game las filas con added_at
+    posterior a la última leída, con su fecha real (también las de otros workers)
+  Los cambios se aplican sobre una copia de la vista (solo se copian las
+  listas que cambian) y después se sustituye la publicada.
+
+Las bajas de las bibliotecas no restan: la tendencia mide altas recientes.
+
+La media global m se fija al cargar; si se desvía más de
+LEADERBOARD_PRIOR_DRIFT se recalculan todas las puntuaciones en memoria.
+
+Variables de entorno:
+- LEADERBOARD_PRIOR_WEIGHT: peso C de la media global (por defecto 10)
+- LEADERBOARD_PRIOR_DRIFT: desviación de la media global que obliga a reordenar (por defecto 0.05)
+- LEADERBOARD_MAX_AGE: segundos tras los que se vuelve a cargar todo (por defecto 60; 0 no recarga, solo para un único worker)
+- LEADERBOARD_DEBOUNCE: segundos que se esperan para agrupar escrituras seguidas (por defecto 0.05)
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.cache import response_cache
+from app.database import SessionLocal, utcnow
+from app.models.user_game import user_game_table
+from app.models.videogame import VideogameORM
+from app.models.videogame_stats import VideogameStatsORM
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_PRIOR_WEIGHT = float(os.getenv("LEADERBOARD_PRIOR_WEIGHT", "10"))
+LEADERBOARD_PRIOR_DRIFT = float(os.getenv("LEADERBOARD_PRIOR_DRIFT", "0.05"))
+LEADERBOARD_MAX_AGE = float(os.getenv("LEADERBOARD_MAX_AGE", "60"))
+LEADERBOARD_DEBOUNCE = float(os.getenv("LEADERBOARD_DEBOUNCE", "0.05"))
+
+# Sin recargas completas, cada cuánto se despierta el hilo para caducar las altas de las ventanas
+IDLE_INTERVAL = 60
+
+TRENDING_WINDOWS = {
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+ADDED_TAG_PREFIX = "library-added:"
+VIDEOGAME_TAG_PREFIX = "videogame:"
+
+
+# -------------------------
+# Lista ordenada por puntuación
+# -------------------------
+class Ranking:
+    """Juegos ordenados de mayor a menor puntuación (a igualdad, el id menor primero)."""
+
+    def __init__(self):
+        self._entries: list[tuple[float, int]] = []
+        self._keys: dict[int, tuple[float, int]] = {}
+
+    def set(self, videogame_id: int, score: float | None):
+        """Coloca el juego con su nueva puntuación; None lo quita."""
+        old = self._keys.pop(videogame_id, None)
+        if old is not None:
+            del self._entries[bisect.bisect_left(self._entries, old)]
+        if score is not None:
+            key = (-score, videogame_id)
+            bisect.insort(self._entries, key)
+            self._keys[videogame_id] = key
+
+    def top(self, limit: int, accept: Callable[[int], bool] | None = None) -> list[tuple[int, float]]:
+        result = []
+        for negative_score, videogame_id in self._entries:
+            if accept is None or accept(videogame_id):
+                result.append((videogame_id, -negative_score))
+                if len(result) == limit:
+                    break
+        return result
+
+    def copy(self) -> "Ranking":
+        ranking = Ranking()
+        ranking._entries = list(self._entries)
+        ranking._keys = dict(self._keys)
+        return ranking
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ScopedRanking:
+    """
+    Una Ranking para el total y otra para cada género y cada desarrolladora.
+    copy() comparte las Ranking con el original y solo copia cada una la
+    primera vez que cambia (la vista publicada no se modifica nunca).
+    """
+
+    def __init__(self, rankings: dict[tuple, Ranking] | None = None):
+        self.rankings: dict[tuple, Ranking] = rankings or {}
+        self._owned: set[tuple] = set() if rankings else None
+
+    def copy(self) -> "ScopedRanking":
+        return ScopedRanking(dict(self.rankings))
+
+    def _writable(self, scope: tuple) -> Ranking:
+        if self._owned is not None and scope not in self._owned:
+            ranking = self.rankings.get(scope)
+            self.rankings[scope] = ranking.copy() if ranking else Ranking()
+            self._owned.add(scope)
+        return self.rankings.setdefault(scope, Ranking())
+
+    def set(self, videogame_id: int, scopes: list[tuple], old_scopes: list[tuple], score: float | None):
+        for scope in old_scopes:
+            if scope not in scopes and scope in self.rankings:
+                self._writable(scope).set(videogame_id, None)
+        for scope in scopes:
+            self._writable(scope).set(videogame_id, score)
+
+    def top(self, genre_id: int | None, developer_id: int | None, limit: int, games: dict) -> list[tuple[int, float]]:
+        if genre_id is not None:
+            ranking = self.rankings.get(("genre", genre_id))
+            # Con los dos filtros se recorre el género y se queda con los de la desarrolladora
+            accept = (lambda videogame_id: games[videogame_id].developer_id == developer_id) if developer_id is not None else None
+        elif developer_id is not None:
+            ranking, accept = self.rankings.get(("developer", developer_id)), None
+        else:
+            ranking, accept = self.rankings.get(("all",)), None
+        return ranking.top(limit, accept) if ranking else []
+
+
+# -------------------------
+# Datos de cada juego
+# -------------------------
+def _games_stmt() -> Select:
+    return select(
+        VideogameORM.id, VideogameORM.title, VideogameORM.cover_url, VideogameORM.genre_id, VideogameORM.developer_id,
+        VideogameStatsORM.review_count, VideogameStatsORM.rating_sum
+    ).outerjoin(VideogameStatsORM, VideogameStatsORM.videogame_id == VideogameORM.id)
+
+
+class GameEntry:
+    __slots__ = ("title", "cover_url", "genre_id", "developer_id", "review_count", "rating_sum")
+
+    def __init__(self, title: str, cover_url: str | None, genre_id: int | None, developer_id: int | None, review_count: int, rating_sum: float):
+        self.title = title
+        self.cover_url = cover_url
+        self.genre_id = genre_id
+        self.developer_id = developer_id
+        self.review_count = review_count
+        self.rating_sum = rating_sum
+
+    @property
+    def scopes(self) -> list[tuple]:
+        scopes = [("all",)]
+        if self.genre_id is not None:
+            scopes.append(("genre", self.genre_id))
+        if self.developer_id is not None:
+            scopes.append(("developer", self.developer_id))
+        return scopes
+
+
+# -------------------------
+# Vista publicada
+# -------------------------
+class LeaderboardView:
+    """Lo que leen las consultas. Una vez publicada no se modifica."""
+
+    def __init__(self, games: dict[int, GameEntry], rated: ScopedRanking, trending: dict[str, ScopedRanking], additions: dict[str, dict[int, int]]):
+        self.games = games
+        self.rated = rated
+        self.trending = trending
+        self.additions = additions
+
+    def cards(self, ranked: list[tuple[int, float]], counts: Callable[[int], int]) -> list[dict]:
+        cards = []
+        for videogame_id, score in ranked:
+            game = self.games[videogame_id]
+            cards.append({
+                "id": videogame_id,
+                "title": game.title,
+                "cover_url": game.cover_url,
+                "score": round(score, 4),
+                "count": counts(videogame_id),
+            })
+        return cards
+
+    def top_rated(self, genre_id: int | None, developer_id: int | None, limit: int) -> list[dict]:
+        ranked = self.rated.top(genre_id, developer_id, limit, self.games)
+        return self.cards(ranked, lambda videogame_id: self.games[videogame_id].review_count)
+
+    def top_trending(self, window: str, genre_id: int | None, developer_id: int | None, limit: int) -> list[dict]:
+        ranked = self.trending[window].top(genre_id, developer_id, limit, self.games)
+        additions = self.additions[window]
+        return self.cards(ranked, lambda videogame_id: additions[videogame_id])
+
+
+# -------------------------
+# Clasificaciones (las mantiene el hilo en segundo plano)
+# -------------------------
+class Leaderboards:
+    def __init__(self, prior_weight: float, prior_drift: float, max_age: float = 0, debounce: float = 0):
+        self.prior_weight = prior_weight
+        self.prior_drift = prior_drift
+        self.max_age = max_age
+        self.debounce = debounce
+        self.prior_mean = 0.0
+        self.loads = 0
+        self.rerankings = 0
+        self.view: LeaderboardView | None = None
+        # Estado del escritor: se copia antes de cada cambio y se publica como vista
+        self._games: dict[int, GameEntry] = {}
+        self._review_count = 0
+        self._rating_sum = 0.0
+        self._rated = ScopedRanking()
+        # Por ventana: altas (fecha, juego) en orden de llegada, cuántas tiene cada juego y su clasificación
+        self._added: dict[str, deque[tuple[datetime, int]]] = {}
+        self._additions: dict[str, dict[int, int]] = {}
+        self._trending: dict[str, ScopedRanking] = {}
+        # Fecha de la última alta leída de user_game y momento de la última carga completa
+        self._added_until: datetime | None = None
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+        # Juegos cambiados pendientes de aplicar (los apunta el listener de la caché)
+        self._pending_games: set[int] = set()
+        self._pending_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    # --- Puntuaciones ---
+    def bayesian(self, game: GameEntry) -> float | None:
+        if not game.review_count:
+            return None
+        return (self.prior_weight * self.prior_mean + game.rating_sum) / (self.prior_weight + game.review_count)
+
+    def _global_mean(self) -> float:
+        return self._rating_sum / self._review_count if self._review_count else 0.0
+
+    # --- Carga completa ---
+    def load(self, db: Session):
+        rows = db.execute(_games_stmt()).all()
+
+        since = utcnow() - max(TRENDING_WINDOWS.values())
+        added = db.execute(
+            select(user_game_table.c.added_at, user_game_table.c.videogame_id)
+            .where(user_game_table.c.added_at > since)
+            .order_by(user_game_table.c.added_at)
+        ).all()
+
+        self._games = {
+            row.id: GameEntry(row.title, row.cover_url, row.genre_id, row.developer_id, row.review_count or 0, row.rating_sum or 0.0)
+            for row in rows
+        }
+        self._review_count = sum(game.review_count for game in self._games.values())
+        self._rating_sum = sum(game.rating_sum for game in self._games.values())
+        self._rerank()
+
+        self._added = {window: deque() for window in TRENDING_WINDOWS}
+        self._additions = {window: {} for window in TRENDING_WINDOWS}
+        self._trending = {window: ScopedRanking() for window in TRENDING_WINDOWS}
+        self._add_events([(row.added_at, row.videogame_id) for row in added])
+        self._added_until = added[-1].added_at if added else since
+        # La carga trae las altas de la ventana más larga: se quitan de las cortas
+        self._expire(utcnow())
+
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    def _rerank(self):
+        self.prior_mean = self._global_mean()
+        self._rated = ScopedRanking()
+        for videogame_id, game in self._games.items():
+            self._rated.set(videogame_id, game.scopes, [], self.bayesian(game))
+        self.rerankings += 1
+
+    # --- Cambios incrementales ---
+    def _copy_for_write(self):
+        """La vista publicada comparte estas estructuras: se copian antes de cambiarlas."""
+        self._games = dict(self._games)
+        self._rated = self._rated.copy()
+        self._trending = {window: ranking.copy() for window, ranking in self._trending.items()}
+        self._additions = {window: dict(additions) for window, additions in self._additions.items()}
+
+    def _refresh_games(self, db: Session, videogame_ids: set[int]):
+        rows = {row.id: row for row in db.execute(_games_stmt().where(VideogameORM.id.in_(videogame_ids)))}
+
+        for videogame_id in videogame_ids:
+            old = self._games.pop(videogame_id, None)
+            old_scopes = old.scopes if old else []
+            if old:
+                self._review_count -= old.review_count
+                self._rating_sum -= old.rating_sum
+
+            row = rows.get(videogame_id)
+            if row is None:
+                # Juego borrado: sale de todas las clasificaciones
+                self._rated.set(videogame_id, [], old_scopes, None)
+                for window in TRENDING_WINDOWS:
+                    self._additions[window].pop(videogame_id, None)
+                    self._trending[window].set(videogame_id, [], old_scopes, None)
+                continue
+
+            game = GameEntry(row.title, row.cover_url, row.genre_id, row.developer_id, row.review_count or 0, row.rating_sum or 0.0)
+            self._games[videogame_id] = game
+            self._review_count += game.review_count
+            self._rating_sum += game.rating_sum
+            self._rated.set(videogame_id, game.scopes, old_scopes, self.bayesian(game))
+
+            if old and old_scopes != game.scopes:
+                # Cambio de género o desarrolladora: también se mueve en las tendencias
+                for window in TRENDING_WINDOWS:
+                    count = self._additions[window].get(videogame_id)
+                    if count:
+                        self._trending[window].set(videogame_id, game.scopes, old_scopes, count)
+
+        if abs(self._global_mean() - self.prior_mean) > self.prior_drift:
+            self._rerank()
+
+    def _add_events(self, events: list[tuple[datetime, int]]):
+        for window in TRENDING_WINDOWS:
+            added, additions, trending = self._added[window], self._additions[window], self._trending[window]
+            for added_at, videogame_id in events:
+                added.append((added_at, videogame_id))
+                additions[videogame_id] = additions.get(videogame_id, 0) + 1
+                game = self._games.get(videogame_id)
+                if game:
+                    trending.set(videogame_id, game.scopes, game.scopes, additions[videogame_id])
+
+    def _expire(self, now: datetime):
+        for window, length in TRENDING_WINDOWS.items():
+            added, additions, trending = self._added[window], self._additions[window], self._trending[window]
+            since = now - length
+            while added and added[0][0] < since:
+                _, videogame_id = added.popleft()
+                count = additions.get(videogame_id, 0) - 1
+                game = self._games.get(videogame_id)
+                scopes = game.scopes if game else []
+                if count > 0:
+                    additions[videogame_id] = count
+                    trending.set(videogame_id, scopes, scopes, count)
+                else:
+                    additions.pop(videogame_id, None)
+                    trending.set(videogame_id, [], scopes, None)
+
+    def _sync(self, db: Session):
+        with self._pending_lock:
+            pending_games, self._pending_games = self._pending_games, set()
+
+        expired = self.max_age > 0 and time.monotonic() - self._loaded_at > self.max_age if self._loaded_at else True
+        if expired:
+            # La carga completa ya incluye todo lo confirmado hasta ahora, también en otros workers
+            self.load(db)
+            return
+
+        # Altas nuevas con su fecha real, vengan de este worker o de otro
+        added = db.execute(
+            select(user_game_table.c.added_at, user_game_table.c.videogame_id)
+            .where(user_game_table.c.added_at > self._added_until)
+            .order_by(user_game_table.c.added_at)
+        ).all()
+
+        self._copy_for_write()
+        # Un alta de un juego que aún no está cargado necesita sus datos (título, género...)
+        pending_games |= {row.videogame_id for row in added if row.videogame_id not in self._games}
+        if pending_games:
+            self._refresh_games(db, pending_games)
+        if added:
+            self._add_events([(row.added_at, row.videogame_id) for row in added])
+            self._added_until = added[-1].added_at
+        self._expire(utcnow())
+
+    def refresh(self):
+        """Aplica los cambios (o recarga todo) y publica la vista nueva de una vez."""
+        with self._lock:
+            with SessionLocal() as db:
+                self._sync(db)
+            self.view = LeaderboardView(self._games, self._rated, self._trending, self._additions)
+
+    def note(self, tags: set[str]):
+        """Apunta los cambios de una invalidación de caché; el hilo los aplica enseguida."""
+        games = {int(tag[len(VIDEOGAME_TAG_PREFIX):]) for tag in tags if tag.startswith(VIDEOGAME_TAG_PREFIX)}
+        added = any(tag.startswith(ADDED_TAG_PREFIX) for tag in tags)
+
+        if games or added:
+            with self._pending_lock:
+                self._pending_games |= games
+            self._changed.set()
+
+    # --- Hilo en segundo plano ---
+    def start(self):
+        """Arranca el hilo (al arrancar la aplicación); la primera carga se hace enseguida."""
+        if self._worker is None:
+            with self._pending_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="leaderboards", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("No se pudieron actualizar las clasificaciones")
+            # Se despierta con los cambios locales y, si no llegan, para recargar o caducar altas
+            if self._changed.wait(timeout=self.max_age or IDLE_INTERVAL):
+                time.sleep(self.debounce)
+            self._changed.clear()
+
+    # --- Consultas (sin bloqueos: leen la vista publicada) ---
+    def current(self) -> LeaderboardView:
+        view = self.view
+        if view is None:
+            self.start()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Las clasificaciones se están calculando; inténtalo de nuevo en unos segundos",
+                headers={"Retry-After": "1"}
+            )
+        return view
+
+    def stats(self) -> dict:
+        view = self.view
+        return {
+            "loaded": view is not None,
+            "games": len(view.games) if view else 0,
+            "prior_mean": round(self.prior_mean, 4),
+            "loads": self.loads,
+            "rerankings": self.rerankings,
+        }
+
+
+leaderboards = Leaderboards(LEADERBOARD_PRIOR_WEIGHT, LEADERBOARD_PRIOR_DRIFT, LEADERBOARD_MAX_AGE, LEADERBOARD_DEBOUNCE)
+response_cache.subscribe(leaderboards.note)
+
+
+# -------------------------
+# Uso desde los routers (no consulta la base de datos)
+# -------------------------
+def top_videogames(genre_id: int | None, developer_id: int | None, window: str | None, limit: int) -> list[dict]:
+    """Sin window, los mejor valorados; con window, los más añadidos a bibliotecas en ese periodo."""
+    view = leaderboards.current()
+    if window is None:
+        return view.top_rated(genre_id, developer_id, limit)
+    return view.top_trending(window, genre_id, developer_id, limit)
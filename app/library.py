@@ -0,0 +1,89 @@
+"""
+Biblioteca de juegos de cada usuario (tabla user_game)
+
+Las comprobaciones y escrituras van directamente contra la tabla de asociación
+en lugar de pasar por user.videogames, que carga la biblioteca entera en una
+lista de Python solo para saber si un juego está en ella:
+
+- owns_game: SELECT EXISTS sobre la clave primaria (user_id, videogame_id)
+- add_to_library / remove_from_library: un INSERT o DELETE de una fila
+- library_page: una página de la biblioteca (keyset) y el total con COUNT(*)
+
+Así cada operación cuesta lo mismo tenga el usuario 10 juegos o 10.000.
+Las sentencias se construyen aparte para usarlas también desde la API async;
+quien las ejecute directamente debe llamar a invalidate_on_commit(db, LIBRARY_TAG)
+(y en las altas también con library_added_tag(game_id)).
+"""
+
+from sqlalchemy import Delete, Insert, Select, delete, exists, func, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.cache import invalidate_on_commit
+from app.models.user_game import user_game_table
+from app.models.videogame import VideogameORM
+from app.pagination import PageParams, paginate
+
+# Etiqueta de caché de cualquier cambio en las bibliotecas (alta o baja de un juego)
+LIBRARY_TAG = "library"
+
+
+def library_added_tag(game_id: int) -> str:
+    """Etiqueta de un alta concreta: los juegos en tendencia cuentan las altas recientes."""
+    return f"{LIBRARY_TAG}-added:{game_id}"
+
+
+# -------------------------
+# Sentencias
+# -------------------------
+def owns_game_stmt(user_id: int, game_id: int) -> Select:
+    return select(exists().where(
+        user_game_table.c.user_id == user_id,
+        user_game_table.c.videogame_id == game_id
+    ))
+
+
+def add_stmt(user_id: int, game_id: int) -> Insert:
+    return insert(user_game_table).values(user_id=user_id, videogame_id=game_id)
+
+
+def remove_stmt(user_id: int, game_id: int) -> Delete:
+    return delete(user_game_table).where(
+        user_game_table.c.user_id == user_id,
+        user_game_table.c.videogame_id == game_id
+    )
+
+
+def library_stmt(user_id: int) -> Select:
+    return (
+        select(VideogameORM)
+        .join(user_game_table, user_game_table.c.videogame_id == VideogameORM.id)
+        .where(user_game_table.c.user_id == user_id)
+        .options(selectinload(VideogameORM.reviews))
+    )
+
+
+def count_stmt(user_id: int) -> Select:
+    return select(func.count()).select_from(user_game_table).where(user_game_table.c.user_id == user_id)
+
+
+# -------------------------
+# Uso con sesión síncrona
+# -------------------------
+def owns_game(db: Session, user_id: int, game_id: int) -> bool:
+    return db.execute(owns_game_stmt(user_id, game_id)).scalar()
+
+
+def add_to_library(db: Session, user_id: int, game_id: int):
+    db.execute(add_stmt(user_id, game_id))
+    invalidate_on_commit(db, LIBRARY_TAG, library_added_tag(game_id))
+
+
+def remove_from_library(db: Session, user_id: int, game_id: int):
+    db.execute(remove_stmt(user_id, game_id))
+    invalidate_on_commit(db, LIBRARY_TAG)
+
+
+def library_page(db: Session, user_id: int, params: PageParams) -> tuple[list[VideogameORM], str | None, int]:
+    """Página de la biblioteca ordenada por id de juego, su cursor y el total de juegos."""
+    items, next_cursor = paginate(db, library_stmt(user_id), VideogameORM.id, params)
+    return items, next_cursor, db.execute(count_stmt(user_id)).scalar_one()
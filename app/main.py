@@ -1,21 +1,66 @@
 """
 Configuración de la aplicación FastAPI
+
+Importar este módulo no toca la base de datos: el esquema, las migraciones y
+los ficheros estáticos se preparan en el lifespan (ver app/startup.py) y los
+datos de ejemplo se cargan con `python -m app.seed`.
 """
-from fastapi import FastAPI
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from app.database import init_db
-from app.routers.api import router as api_router
+from sqlalchemy.orm.exc import StaleDataError
+from app.database import DB_ASYNC
+from app.assets import ASSET_BUILD_DIR, ASSETS_PREFIX, ImmutableStaticFiles, PrecompressedStaticFiles
+from app.compression import CompressionMiddleware
+from app.etag import STALE_DETAIL
+from app.images import IMAGE_CACHE_DIR, MEDIA_PREFIX
 from app.routers.web import router as web_router
+from app.startup import lifespan
+from app.templating import templates
+
+# API síncrona (Session) o asíncrona (AsyncSession) según el despliegue
+if DB_ASYNC:
+    from app.routers.api_async import router as api_router
+else:
+    from app.routers.api import router as api_router
 
 
 #Crea la instancia de la aplicación FastAPI
-app = FastAPI(title="Videojuegos API", version="1.0.0")
+app = FastAPI(title="Videojuegos API", version="1.0.0", lifespan=lifespan)
+
+# Compresión gzip/Brotli/Zstandard de las respuestas de texto (ver app/compression.py)
+app.add_middleware(CompressionMiddleware)
 
 # Montar la carpeta static
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Miniaturas de portadas con nombre según su contenido (caché inmutable)
+app.mount(MEDIA_PREFIX, ImmutableStaticFiles(directory=IMAGE_CACHE_DIR), name="media")
+# Copias de app/static con huella de contenido y precomprimidas (ver app/assets.py);
+# el directorio se genera en el lifespan
+app.mount(ASSETS_PREFIX, PrecompressedStaticFiles(directory=ASSET_BUILD_DIR, check_dir=False), name="assets")
+
+# Todas las filas llevan version (concurrencia optimista): cualquier escritura que
+# llegue tarde, no solo las de la API con commit_versioned, es un conflicto y no un 500.
+# La sesión de la petición se deshace al cerrarse (get_db)
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    if request.url.path.startswith("/api/"):
+        return JSONResponse({"detail": STALE_DETAIL}, status_code=status.HTTP_412_PRECONDITION_FAILED)
 
-#inicializa la base de datos con videojuegos por defecto
-init_db()
+    # Web: se explica y se vuelve a la página del formulario, que mostrará los datos actuales
+    referer = request.headers.get("referer")
+    back_url = urlsplit(referer).path if referer else "/"
+    return templates.TemplateResponse(
+        "conflict.html",
+        {
+            "request": request,
+            "detail": "Alguien ha modificado estos datos mientras los editabas. Vuelve a cargarlos y repite el cambio.",
+            "back_url": back_url,
+        },
+        status_code=status.HTTP_409_CONFLICT
+    )
 
 #incluir routers de la API
 app.include_router(api_router)
@@ -0,0 +1,134 @@
+"""
+Migraciones versionadas del esquema
+
+create_all solo crea las tablas que faltan: no añade índices ni columnas a
+tablas que ya existen. Cada migración lleva un número de versión y la versión
+aplicada se guarda en PRAGMA user_version de SQLite, así las bases de datos
+videogames.db existentes se actualizan al arrancar.
+
+Las migraciones deben ser idempotentes porque en una base de datos nueva se
+ejecutan justo después de create_all.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import utcnow
+from app.rating_stats import rebuild_rating_stats
+from app.search import create_search_index
+
+# Pares duplicados que se enumeran en el error de la migración 3
+MAX_LISTED_DUPLICATES = 20
+
+
+# -------------------------
+# Migraciones
+# -------------------------
+def _backfill_rating_stats(db: Session):
+    rebuild_rating_stats(db)
+
+
+def _create_search_index(db: Session):
+    create_search_index(db)
+
+
+def _add_secondary_indexes(db: Session):
+    # El índice único no se puede crear con reviews duplicadas (mismo usuario y
+    # mismo juego). No se borran datos de usuarios sin avisar: la migración se
+    # detiene y las tiene que resolver quien administra la base de datos
+    duplicates = db.execute(text("""
+        SELECT user_id, videogame_id, GROUP_CONCAT(id) AS ids
+        FROM reviews
+        GROUP BY user_id, videogame_id
+        HAVING COUNT(*) > 1
+    """)).all()
+    if duplicates:
+        listed = "; ".join(
+            f"usuario {row.user_id}, juego {row.videogame_id}: reviews {row.ids}"
+            for row in duplicates[:MAX_LISTED_DUPLICATES]
+        )
+        raise RuntimeError(
+            f"Hay {len(duplicates)} pares usuario/juego con varias reviews ({listed}"
+            f"{'; ...' if len(duplicates) > MAX_LISTED_DUPLICATES else ''}). "
+            "Borra las que sobren (deja una por usuario y juego) y vuelve a arrancar"
+        )
+
+    for statement in [
+        "CREATE INDEX IF NOT EXISTS ix_videogames_genre_id ON videogames (genre_id)",
+        "CREATE INDEX IF NOT EXISTS ix_videogames_developer_id ON videogames (developer_id)",
+        "CREATE INDEX IF NOT EXISTS ix_reviews_videogame_id ON reviews (videogame_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_reviews_user_id_videogame_id ON reviews (user_id, videogame_id)",
+        "CREATE INDEX IF NOT EXISTS ix_user_game_videogame_id ON user_game (videogame_id)",
+        "CREATE INDEX IF NOT EXISTS ix_genres_name ON genres (name)",
+        "CREATE INDEX IF NOT EXISTS ix_developers_name ON developers (name)",
+    ]:
+        db.execute(text(statement))
+
+
+def _add_version_columns(db: Session):
+    # ALTER TABLE ... ADD COLUMN no admite valores por defecto no constantes:
+    # se añade la columna y después se rellena
+    now = utcnow()
+
+    for table in ["genres", "developers", "videogames", "users", "reviews", "videogame_stats"]:
+        columns = {row.name for row in db.execute(text(f"PRAGMA table_info({table})"))}
+
+        if table != "videogame_stats" and "version" not in columns:
+            db.execute(text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+        if "updated_at" not in columns:
+            db.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME"))
+            db.execute(text(f"UPDATE {table} SET updated_at = :now"), {"now": now})
+
+
+def _hash_plain_passwords(db: Session):
+    # Sin cambios en el esquema: hacer scrypt de todos los usuarios aquí dejaría
+    # el arranque (y el bloqueo entre workers de app.startup) minutos parado.
+    # Las contraseñas en claro se pasan a scrypt en el siguiente login correcto
+    # de cada usuario (ver app.auth.authenticate)
+    pass
+
+
+def _add_library_added_at(db: Session):
+    # Las altas anteriores no tienen fecha conocida: se quedan a NULL y no
+    # cuentan como recientes
+    columns = {row.name for row in db.execute(text("PRAGMA table_info(user_game)"))}
+    if "added_at" not in columns:
+        db.execute(text("ALTER TABLE user_game ADD COLUMN added_at DATETIME"))
+
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_user_game_added_at ON user_game (added_at)"))
+
+
+# (versión, descripción, función); nunca reordenar ni renumerar
+MIGRATIONS = [
+    (1, "Rellenar videogame_stats desde reviews", _backfill_rating_stats),
+    (2, "Índice FTS5 de búsqueda de videojuegos", _create_search_index),
+    (3, "Índices secundarios y review única por usuario y juego", _add_secondary_indexes),
+    (4, "Columnas version y updated_at para ETag y concurrencia optimista", _add_version_columns),
+    (5, "Hash scrypt de las contraseñas guardadas en claro (ahora al iniciar sesión)", _hash_plain_passwords),
+    (6, "Fecha de alta de los juegos en las bibliotecas", _add_library_added_at),
+]
+
+
+# -------------------------
+# Ejecutar migraciones pendientes
+# -------------------------
+def get_schema_version(db: Session) -> int:
+    return db.execute(text("PRAGMA user_version")).scalar()
+
+
+def run_migrations(db: Session):
+    """Aplica en orden las migraciones con versión mayor que la guardada, cada una en su transacción."""
+    current = get_schema_version(db)
+
+    for version, _description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+
+        try:
+            migrate(db)
+            db.execute(text(f"PRAGMA user_version = {version}"))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
@@ -7,5 +7,6 @@ from app.models.videogame import VideogameORM
 from app.models.user import UserORM
 from app.models.developer import DevORM
 from app.models.review import ReviewORM
+from app.models.videogame_stats import VideogameStatsORM
 
-__all__ = ["GenreORM", "VideogameORM", "UserORM", "DevORM", "ReviewORM"]
\ No newline at end of file
+__all__ = ["GenreORM", "VideogameORM", "UserORM", "DevORM", "ReviewORM", "VideogameStatsORM"]
\ No newline at end of file
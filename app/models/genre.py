@@ -1,16 +1,23 @@
 
+from datetime import datetime
+
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String
-from app.database import Base
+from sqlalchemy import Integer, String, DateTime
+from app.database import Base, utcnow
 
 class GenreORM(Base):
     __tablename__ = "genres"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    name: Mapped[str] = mapped_column(String, nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False, index=True)
     description: Mapped[str] = mapped_column(String, nullable=False)
     image_url: Mapped[str | None] = mapped_column(String)
 
+    # Control de versiones: ETag y concurrencia optimista (If-Match)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    __mapper_args__ = {"version_id_col": version}
+
 
     # Unidireccional: no back_populates
     videogames: Mapped[list["VideogameORM"]] = relationship("VideogameORM")
@@ -1,16 +1,27 @@
+from datetime import datetime
+
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Float, ForeignKey
-from app.database import Base
+from sqlalchemy import Integer, String, Float, ForeignKey, Index, DateTime
+from app.database import Base, utcnow
 
 class ReviewORM(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Un usuario, una reseña por juego; también sirve de índice por user_id
+        Index("uq_reviews_user_id_videogame_id", "user_id", "videogame_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     rating: Mapped[float] = mapped_column(Float, nullable=False)
     comment: Mapped[str | None] = mapped_column(String, nullable=True)
 
+    # Control de versiones: ETag y concurrencia optimista (If-Match)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    __mapper_args__ = {"version_id_col": version}
+
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    videogame_id: Mapped[int] = mapped_column(ForeignKey("videogames.id"), nullable=False)
+    videogame_id: Mapped[int] = mapped_column(ForeignKey("videogames.id"), nullable=False, index=True)
     
     # Unidireccionales
     user: Mapped["UserORM"] = relationship("UserORM")
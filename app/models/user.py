@@ -1,6 +1,8 @@
+from datetime import datetime
+
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String
-from app.database import Base
+from sqlalchemy import Integer, String, DateTime
+from app.database import Base, utcnow
 from app.models.user_game import user_game_table
 
 class UserORM(Base):
@@ -12,6 +14,11 @@ class UserORM(Base):
     nif: Mapped[str | None] = mapped_column(String)
     password: Mapped[str] = mapped_column(String)
 
+    # Control de versiones: ETag y concurrencia optimista (If-Match)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    __mapper_args__ = {"version_id_col": version}
+
 
     videogames = relationship(
         "VideogameORM",
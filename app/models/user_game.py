@@ -1,9 +1,14 @@
-from sqlalchemy import Table, Column, Integer, ForeignKey
-from app.database import Base
+from sqlalchemy import Table, Column, Integer, ForeignKey, Index, DateTime
+from app.database import Base, utcnow
 
 user_game_table = Table(
     "user_game",
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
     Column("videogame_id", Integer, ForeignKey("videogames.id"), primary_key=True),
+    # Fecha de alta en la biblioteca (juegos en tendencia); NULL en las anteriores a la migración 6
+    Column("added_at", DateTime, default=utcnow),
+    # La clave primaria (user_id, videogame_id) no sirve para buscar por juego
+    Index("ix_user_game_videogame_id", "videogame_id"),
+    Index("ix_user_game_added_at", "added_at"),
 )
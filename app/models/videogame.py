@@ -1,6 +1,8 @@
+from datetime import datetime
+
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, ForeignKey
-from app.database import Base
+from sqlalchemy import Integer, String, ForeignKey, DateTime
+from app.database import Base, utcnow
 from app.models.user_game import user_game_table
 
 class VideogameORM(Base):
@@ -11,8 +13,13 @@ class VideogameORM(Base):
     description: Mapped[str | None] = mapped_column(String)
     cover_url: Mapped[str | None] = mapped_column(String, nullable=True)
 
-    genre_id: Mapped[int | None] = mapped_column(ForeignKey("genres.id"))
-    developer_id: Mapped[int | None] = mapped_column(ForeignKey("developers.id"))
+    # Control de versiones: ETag y concurrencia optimista (If-Match)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    __mapper_args__ = {"version_id_col": version}
+
+    genre_id: Mapped[int | None] = mapped_column(ForeignKey("genres.id"), index=True)
+    developer_id: Mapped[int | None] = mapped_column(ForeignKey("developers.id"), index=True)
 
     # Unidireccionales
     genre: Mapped["GenreORM"] = relationship("GenreORM")
@@ -20,6 +27,14 @@ class VideogameORM(Base):
 
     # Reviews → usamos string para evitar import directo
     reviews: Mapped[list["ReviewORM"]] = relationship("ReviewORM")
+
+    # Estadísticas de valoración (1 a 1), mantenidas por app.rating_stats
+    stats: Mapped["VideogameStatsORM | None"] = relationship(
+        "VideogameStatsORM",
+        lazy="joined",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
     
     users = relationship(
         "UserORM",
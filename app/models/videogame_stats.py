@@ -0,0 +1,51 @@
+import math
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, Float, ForeignKey, DateTime
+from app.database import Base
+
+# Cubos del histograma: 1..10 según la parte entera de la nota
+HISTOGRAM_BUCKETS = range(1, 11)
+
+
+class VideogameStatsORM(Base):
+    __tablename__ = "videogame_stats"
+
+    videogame_id: Mapped[int] = mapped_column(ForeignKey("videogames.id"), primary_key=True)
+    review_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    rating_sum_sq: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    rating_min: Mapped[float | None] = mapped_column(Float)
+    rating_max: Mapped[float | None] = mapped_column(Float)
+    # Última vez que cambió alguna review del juego (Last-Modified)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    # Histograma: una columna por cubo para poder incrementarlo con un UPDATE atómico
+    rating_1: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_2: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_4: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_5: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_6: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_7: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_8: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_9: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_10: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    @property
+    def average(self) -> float | None:
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+
+    @property
+    def stddev(self) -> float | None:
+        if not self.review_count:
+            return None
+        mean = self.rating_sum / self.review_count
+        return math.sqrt(max(self.rating_sum_sq / self.review_count - mean * mean, 0.0))
+
+    @property
+    def histogram(self) -> list[int]:
+        return [getattr(self, f"rating_{bucket}") for bucket in HISTOGRAM_BUCKETS]
@@ -0,0 +1,70 @@
+"""
+Paginación por cursor (keyset) para los listados de la API
+"""
+
+import base64
+import binascii
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+MAX_CURSOR_ID = 2**63 - 1
+
+
+# -------------------------
+# Parámetros de paginación
+# -------------------------
+class PageParams:
+    """Parámetros ?limit=&after= comunes a todos los listados."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        after: str | None = Query(None),
+    ):
+        self.limit = limit
+        self.after = decode_cursor(after) if after else None
+
+
+# -------------------------
+# Cursor opaco
+# -------------------------
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        last_id = int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        last_id = None
+    # Fuera del rango de un INTEGER de SQLite la consulta fallaría con OverflowError
+    if last_id is None or not 0 <= last_id <= MAX_CURSOR_ID:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginación no válido")
+    return last_id
+
+
+# -------------------------
+# Ejecutar una consulta paginada
+# -------------------------
+def paginate(db: Session, stmt: Select, id_column, params: PageParams) -> tuple[list, str | None]:
+    """
+    Aplica WHERE id > after ORDER BY id LIMIT n sobre la clave primaria,
+    así cada página cuesta lo mismo sin importar el tamaño de la tabla.
+    Devuelve los elementos y el cursor de la siguiente página.
+    """
+    if params.after is not None:
+        stmt = stmt.where(id_column > params.after)
+
+    # Se pide un elemento de más para saber si hay otra página
+    stmt = stmt.order_by(id_column.asc()).limit(params.limit + 1)
+    rows = db.execute(stmt).scalars().all()
+
+    items = rows[:params.limit]
+    next_cursor = encode_cursor(items[-1].id) if len(rows) > params.limit else None
+
+    return items, next_cursor
@@ -0,0 +1,175 @@
+"""
+Límite de peticiones de escritura por cliente (token bucket)
+
+Cada cliente tiene un cubo de fichas por grupo de rutas ("reviews",
+"videogames"...). Cada escritura gasta una ficha y el cubo se rellena a
+`rate` fichas por segundo hasta `burst`. Sin fichas la petición se rechaza al
+momento con 429 y Retry-After, antes de abrir sesión ni tocar la base de datos:
+así una ráfaga de escrituras no deja a las lecturas esperando el bloqueo de
+escritura de SQLite.
+
+Se aplica en los routers como dependencia y solo cuenta los métodos de
+escritura (POST, PUT, PATCH, DELETE):
+
+    router = APIRouter(prefix="/api/reviews", dependencies=[Depends(RateLimit("reviews"))])
+
+El cliente es el usuario de la sesión si la hay y si no la IP.
+
+Los cubos viven en el proceso (MemoryBucketBackend). Con varios workers se
+puede sustituir por un backend compartido con el mismo método take(), por
+ejemplo uno sobre Redis: rate_limiter.backend = MiBackend(...)
+
+Variables de entorno:
+- RATE_LIMIT_RATE: fichas por segundo que recupera cada cubo (por defecto 5, 0 desactiva el límite)
+- RATE_LIMIT_BURST: tamaño del cubo, es decir, ráfaga máxima (por defecto 20)
+- RATE_LIMIT_MAX_CLIENTS: cubos guardados en memoria como máximo (por defecto 10000)
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from fastapi import HTTPException, Request, status
+
+from app.auth import current_user
+
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "5"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+# -------------------------
+# Backends
+# -------------------------
+class RateLimitBackend(Protocol):
+    """
+    Guarda el estado de los cubos. take() gasta `cost` fichas si las hay y
+    devuelve 0; si no, devuelve los segundos que faltan para tenerlas.
+    """
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> float: ...
+    def clear(self) -> None: ...
+
+
+class MemoryBucketBackend:
+    """Cubos dentro del proceso; se olvidan los clientes menos recientes por encima de maxsize."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # Un cubo olvidado equivale a uno lleno: solo se pierde a favor del cliente
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# -------------------------
+# Limitador con contadores
+# -------------------------
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, rate: float, burst: int):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.allowed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        wait = self.backend.take(key, rate, burst)
+        with self._lock:
+            if wait:
+                self.rejected += 1
+            else:
+                self.allowed += 1
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "rate": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "clients": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
+
+
+rate_limiter = RateLimiter(MemoryBucketBackend(RATE_LIMIT_MAX_CLIENTS), RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+
+
+# -------------------------
+# Dependencia para los routers
+# -------------------------
+def client_key(request: Request) -> str:
+    user = current_user(request)
+    if user is not None:
+        return f"user:{user.id}"
+    return f"ip:{request.client.host if request.client else 'desconocido'}"
+
+
+class RateLimit:
+    """
+    Dependencia de router. rate y burst sustituyen a los valores por defecto
+    para este grupo; methods indica qué métodos cuentan.
+    """
+
+    def __init__(
+        self,
+        group: str,
+        rate: float | None = None,
+        burst: int | None = None,
+        methods: set[str] = WRITE_METHODS
+    ):
+        self.group = group
+        self.rate = rate
+        self.burst = burst
+        self.methods = methods
+
+    def __call__(self, request: Request):
+        if not rate_limiter.enabled or request.method not in self.methods:
+            return
+
+        rate = self.rate if self.rate is not None else rate_limiter.rate
+        burst = self.burst if self.burst is not None else rate_limiter.burst
+
+        wait = rate_limiter.take(f"{self.group}:{client_key(request)}", rate, burst)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Demasiadas peticiones de escritura en {self.group}; vuelve a intentarlo en {math.ceil(wait)} s",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
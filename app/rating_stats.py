@@ -0,0 +1,150 @@
+"""
+Mantenimiento incremental de las estadísticas de valoración por videojuego
+
+Cada alta, edición o baja de una review actualiza la fila de videogame_stats
+con un UPDATE atómico dentro de la misma transacción, de modo que la media,
+el número de reviews o el histograma se leen en O(1) sin recorrer las reviews.
+"""
+
+import math
+
+from sqlalchemy import Integer, case, cast, delete, func, insert, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from app.database import utcnow
+from app.models.review import ReviewORM
+from app.models.videogame_stats import HISTOGRAM_BUCKETS, VideogameStatsORM
+
+stats = VideogameStatsORM.__table__
+
+
+def _expire_cached(db: Session, videogame_id: int):
+    # Los UPDATE van por SQL directo: si la sesión ya tenía cargadas las
+    # estadísticas del juego hay que marcarlas como caducadas
+    cached = db.identity_map.get(identity_key(VideogameStatsORM, videogame_id))
+    if cached is not None:
+        db.expire(cached)
+
+
+def _bucket_column(rating: float):
+    bucket = min(max(math.floor(rating), HISTOGRAM_BUCKETS.start), HISTOGRAM_BUCKETS.stop - 1)
+    return stats.c[f"rating_{bucket}"]
+
+
+# -------------------------
+# Sumar una valoración
+# -------------------------
+def add_rating(db: Session, videogame_id: int, rating: float):
+    # Crea la fila si el juego aún no tenía estadísticas
+    db.execute(
+        sqlite_insert(stats)
+        .values(videogame_id=videogame_id)
+        .on_conflict_do_nothing(index_elements=["videogame_id"])
+    )
+
+    bucket = _bucket_column(rating)
+    db.execute(
+        update(stats)
+        .where(stats.c.videogame_id == videogame_id)
+        .values({
+            stats.c.review_count: stats.c.review_count + 1,
+            stats.c.rating_sum: stats.c.rating_sum + rating,
+            stats.c.rating_sum_sq: stats.c.rating_sum_sq + rating * rating,
+            stats.c.rating_min: func.min(func.coalesce(stats.c.rating_min, rating), rating),
+            stats.c.rating_max: func.max(func.coalesce(stats.c.rating_max, rating), rating),
+            bucket: bucket + 1,
+            stats.c.updated_at: utcnow(),
+        })
+    )
+    _expire_cached(db, videogame_id)
+
+
+# -------------------------
+# Restar una valoración
+# -------------------------
+def remove_rating(db: Session, videogame_id: int, rating: float):
+    # La review ya tiene que estar borrada/modificada en la base de datos
+    # para que el recálculo de mínimo y máximo no la tenga en cuenta
+    db.flush()
+
+    remaining = select(ReviewORM.rating).where(ReviewORM.videogame_id == videogame_id)
+    bucket = _bucket_column(rating)
+
+    # Solo se recorre el juego si se quita justo el mínimo o el máximo
+    db.execute(
+        update(stats)
+        .where(stats.c.videogame_id == videogame_id)
+        .values({
+            stats.c.review_count: stats.c.review_count - 1,
+            stats.c.rating_sum: case((stats.c.review_count <= 1, 0.0), else_=stats.c.rating_sum - rating),
+            stats.c.rating_sum_sq: case((stats.c.review_count <= 1, 0.0), else_=stats.c.rating_sum_sq - rating * rating),
+            stats.c.rating_min: case(
+                (stats.c.review_count <= 1, None),
+                (stats.c.rating_min >= rating, remaining.with_only_columns(func.min(ReviewORM.rating)).scalar_subquery()),
+                else_=stats.c.rating_min,
+            ),
+            stats.c.rating_max: case(
+                (stats.c.review_count <= 1, None),
+                (stats.c.rating_max <= rating, remaining.with_only_columns(func.max(ReviewORM.rating)).scalar_subquery()),
+                else_=stats.c.rating_max,
+            ),
+            bucket: bucket - 1,
+            stats.c.updated_at: utcnow(),
+        })
+    )
+    _expire_cached(db, videogame_id)
+
+
+# -------------------------
+# Cambiar una valoración
+# -------------------------
+def change_rating(db: Session, old_videogame_id: int, old_rating: float, new_videogame_id: int, new_rating: float):
+    if old_videogame_id == new_videogame_id and old_rating == new_rating:
+        return
+    remove_rating(db, old_videogame_id, old_rating)
+    add_rating(db, new_videogame_id, new_rating)
+
+
+# -------------------------
+# Reconstruir las estadísticas desde las reviews
+# -------------------------
+def rebuild_rating_stats(db: Session, videogame_ids: set[int] | None = None):
+    """
+    Recalcula la tabla entera; se usa para rellenarla en bases de datos existentes.
+    Con videogame_ids solo recalcula esos juegos (importaciones masivas de reviews).
+    """
+    bucket_columns = {
+        f"rating_{bucket}": func.sum(case((
+            func.min(func.max(cast(ReviewORM.rating, Integer), HISTOGRAM_BUCKETS.start), HISTOGRAM_BUCKETS.stop - 1) == bucket, 1
+        ), else_=0))
+        for bucket in HISTOGRAM_BUCKETS
+    }
+    aggregates = (
+        select(
+            ReviewORM.videogame_id,
+            func.count(ReviewORM.id),
+            func.sum(ReviewORM.rating),
+            func.sum(ReviewORM.rating * ReviewORM.rating),
+            func.min(ReviewORM.rating),
+            func.max(ReviewORM.rating),
+            *bucket_columns.values(),
+            literal(utcnow()),
+        )
+        .group_by(ReviewORM.videogame_id)
+    )
+    removed = delete(stats)
+
+    if videogame_ids is not None:
+        aggregates = aggregates.where(ReviewORM.videogame_id.in_(videogame_ids))
+        removed = removed.where(stats.c.videogame_id.in_(videogame_ids))
+
+    db.execute(removed)
+    db.expire_all()
+    db.execute(
+        insert(stats).from_select(
+            ["videogame_id", "review_count", "rating_sum", "rating_sum_sq", "rating_min", "rating_max", *bucket_columns, "updated_at"],
+            aggregates,
+        )
+    )
@@ -0,0 +1,281 @@
+"""
+Recomendaciones "quien tiene este juego también tiene..."
+
+Modelo item-item por similitud coseno sobre la matriz dispersa usuario x juego:
+cada celda vale 1 si el usuario tiene el juego en su biblioteca, y si además
+lo ha valorado se pondera con su nota (0.5 con un 0, 1.5 con un 10). Para
+cada juego se guardan en memoria sus RECOMMENDATIONS_NEIGHBORS vecinos más
+parecidos, ya ordenados:
+
+- /api/videogames/{id}/similar   -> los vecinos del juego (una lista ya hecha)
+- /api/users/{id}/recommendations -> suma de los vecinos de los juegos de su
+  biblioteca, quitando los que ya tiene; sin biblioteca, los más populares
+
+La matriz es un dict de dicts en Python puro (sin NumPy/SciPy, que no son
+dependencias del proyecto): con co-ocurrencias dispersas el coste es la suma
+de los cuadrados del tamaño de cada biblioteca, y las bibliotecas enormes se
+recortan a RECOMMENDATIONS_MAX_USER_ITEMS juegos para acotarlo.
+
+El modelo se construye solo en un hilo en segundo plano, que arranca con la
+aplicación (lifespan): el cálculo nunca ocupa una petición ni el bucle de
+eventos, y hasta que está el primer modelo las consultas responden 503.
+
+El hilo comprueba cada RECOMMENDATIONS_REFRESH segundos (y poco después de
+cada invalidación local de bibliotecas, reviews o videojuegos) un resumen
+barato de las tablas: número de filas, último id y última modificación. Solo
+si ha cambiado reconstruye el modelo, y mientras tanto se sigue usando el
+anterior. Así también entran, con ese retraso, los cambios hechos en otros
+workers, sin recalcular nada cuando no hay cambios.
+
+Variables de entorno:
+- RECOMMENDATIONS_NEIGHBORS: vecinos guardados por juego (por defecto 50)
+- RECOMMENDATIONS_MAX_USER_ITEMS: juegos por usuario que entran en el cálculo (por defecto 500)
+- RECOMMENDATIONS_REFRESH: segundos entre comprobaciones de cambios (por defecto 60)
+"""
+
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from sqlalchemy import func, select
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.cache import response_cache
+from app.database import SessionLocal
+from app.library import LIBRARY_TAG
+from app.models.review import ReviewORM
+from app.models.user import UserORM
+from app.models.user_game import user_game_table
+from app.models.videogame import VideogameORM
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATIONS_NEIGHBORS = int(os.getenv("RECOMMENDATIONS_NEIGHBORS", "50"))
+RECOMMENDATIONS_MAX_USER_ITEMS = int(os.getenv("RECOMMENDATIONS_MAX_USER_ITEMS", "500"))
+RECOMMENDATIONS_REFRESH = float(os.getenv("RECOMMENDATIONS_REFRESH", "60"))
+
+# Cambios que afectan al modelo: bibliotecas, valoraciones y el catálogo
+REBUILD_TAGS = {LIBRARY_TAG, "reviews", "home"}
+
+
+# -------------------------
+# Modelo
+# -------------------------
+class RecommendationModel:
+    """
+    neighbors: juego -> [(juego, similitud)] de mayor a menor
+    popular: juegos ordenados por número de propietarios
+    catalog: juego -> (título, portada) para responder sin consultar la base de datos
+    """
+
+    def __init__(
+        self,
+        version: int,
+        neighbors: dict[int, list[tuple[int, float]]],
+        popular: list[int],
+        catalog: dict[int, tuple[str, str | None]]
+    ):
+        self.version = version
+        self.neighbors = neighbors
+        self.popular = popular
+        self.catalog = catalog
+
+    def card(self, videogame_id: int, score: float) -> dict:
+        title, cover_url = self.catalog[videogame_id]
+        return {"id": videogame_id, "title": title, "cover_url": cover_url, "score": round(score, 4)}
+
+    def similar(self, videogame_id: int, limit: int) -> list[dict]:
+        return [self.card(other, score) for other, score in self.neighbors.get(videogame_id, [])[:limit]]
+
+    def recommend(self, owned: set[int], limit: int) -> list[dict]:
+        scores: dict[int, float] = defaultdict(float)
+        for videogame_id in owned:
+            for other, similarity in self.neighbors.get(videogame_id, ()):
+                if other not in owned:
+                    scores[other] += similarity
+
+        if not scores:
+            # Arranque en frío: lo más popular que aún no tiene
+            popular = (videogame_id for videogame_id in self.popular if videogame_id not in owned)
+            return [self.card(videogame_id, 0.0) for videogame_id in list(popular)[:limit]]
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [self.card(videogame_id, score) for videogame_id, score in best]
+
+
+def _rating_weight(rating: float) -> float:
+    return 0.5 + max(0.0, min(rating, 10.0)) / 10
+
+
+def build_model(db: Session, version: int) -> RecommendationModel:
+    """Tres consultas (bibliotecas, reviews y catálogo) y el cálculo en memoria."""
+    weights: dict[int, dict[int, float]] = defaultdict(dict)
+
+    for user_id, videogame_id in db.execute(select(user_game_table.c.user_id, user_game_table.c.videogame_id)):
+        weights[user_id][videogame_id] = 1.0
+    for user_id, videogame_id, rating in db.execute(select(ReviewORM.user_id, ReviewORM.videogame_id, ReviewORM.rating)):
+        weights[user_id][videogame_id] = _rating_weight(rating)
+
+    catalog = {row.id: (row.title, row.cover_url) for row in db.execute(
+        select(VideogameORM.id, VideogameORM.title, VideogameORM.cover_url)
+    )}
+
+    # Producto escalar entre columnas: solo los pares que comparten algún usuario
+    dot: dict[int, dict[int, float]] = defaultdict(lambda: defaultdict(float))
+    norms: dict[int, float] = defaultdict(float)
+    owners: Counter = Counter()
+
+    for items in weights.values():
+        items = [(videogame_id, weight) for videogame_id, weight in items.items() if videogame_id in catalog]
+        if len(items) > RECOMMENDATIONS_MAX_USER_ITEMS:
+            items = heapq.nlargest(RECOMMENDATIONS_MAX_USER_ITEMS, items, key=lambda item: item[1])
+
+        for videogame_id, weight in items:
+            norms[videogame_id] += weight * weight
+            owners[videogame_id] += 1
+        for i, (first, first_weight) in enumerate(items):
+            row = dot[first]
+            for second, second_weight in items[i + 1:]:
+                product = first_weight * second_weight
+                row[second] += product
+                dot[second][first] += product
+
+    inverse_norms = {videogame_id: 1 / math.sqrt(norm) for videogame_id, norm in norms.items()}
+    neighbors = {}
+    for videogame_id, products in dot.items():
+        scale = inverse_norms[videogame_id]
+        best = heapq.nlargest(
+            RECOMMENDATIONS_NEIGHBORS,
+            ((product * scale * inverse_norms[other], other) for other, product in products.items())
+        )
+        neighbors[videogame_id] = [(other, similarity) for similarity, other in best]
+
+    popular = [videogame_id for videogame_id, _ in sorted(owners.items(), key=lambda item: (-item[1], item[0]))]
+    popular += [videogame_id for videogame_id in catalog if videogame_id not in owners]
+
+    return RecommendationModel(version, neighbors, popular, catalog)
+
+
+# -------------------------
+# Modelo actual y reconstrucción en segundo plano
+# -------------------------
+def data_watermark(db: Session) -> tuple:
+    """
+    Resumen barato de las tablas que usa el modelo (número de filas, último id
+    y última modificación): si no cambia, el modelo no tiene que reconstruirse.
+    """
+    return (
+        *db.execute(select(func.count(), func.max(user_game_table.c.added_at)).select_from(user_game_table)).one(),
+        *db.execute(select(func.count(), func.max(ReviewORM.id), func.max(ReviewORM.updated_at))).one(),
+        *db.execute(select(func.count(), func.max(VideogameORM.id), func.max(VideogameORM.updated_at))).one(),
+    )
+
+
+class RecommendationStore:
+    """
+    El modelo se construye siempre en el hilo en segundo plano, nunca en una
+    petición: hasta que existe el primero, las consultas responden 503.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.rebuilds = 0
+        self.checks = 0
+        self._model: RecommendationModel | None = None
+        self._watermark: tuple | None = None
+        self._stale = threading.Event()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def get(self) -> RecommendationModel:
+        model = self._model
+        if model is None:
+            self.start()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Las recomendaciones se están calculando; inténtalo de nuevo en unos segundos",
+                headers={"Retry-After": "5"}
+            )
+        return model
+
+    def refresh(self) -> bool:
+        """Reconstruye el modelo si los datos cambiaron desde el anterior; True si lo hizo."""
+        with SessionLocal() as db:
+            watermark = data_watermark(db)
+            self.checks += 1
+            if self._model is not None and watermark == self._watermark:
+                return False
+            version = self._model.version + 1 if self._model else 1
+            model = build_model(db, version)
+        # Se sustituye de una vez: los lectores ven el anterior o el nuevo
+        self._model = model
+        self._watermark = watermark
+        self.rebuilds += 1
+        return True
+
+    def mark_stale(self):
+        self._stale.set()
+        self.start()
+
+    def start(self):
+        """Arranca el hilo (al arrancar la aplicación); el primer modelo se construye enseguida."""
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="recommendations", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("No se pudo reconstruir el modelo de recomendaciones")
+            # Sin invalidaciones locales también se comprueba cada min_interval (cambios de otros workers)
+            if self._stale.wait(timeout=self.min_interval or None):
+                # Las escrituras que lleguen mientras tanto se agrupan en la misma reconstrucción
+                time.sleep(self.min_interval)
+            self._stale.clear()
+
+
+recommendations = RecommendationStore(RECOMMENDATIONS_REFRESH)
+
+
+def _on_invalidate(tags: set[str]):
+    # Sin modelo todavía no hay nada que refrescar: el hilo ya está construyendo el primero
+    if tags & REBUILD_TAGS and recommendations._model is not None:
+        recommendations.mark_stale()
+
+
+response_cache.subscribe(_on_invalidate)
+
+
+# -------------------------
+# Uso desde los routers (sesión síncrona o db.run_sync)
+# -------------------------
+def similar_videogames(db: Session, videogame_id: int, limit: int) -> list[dict]:
+    model = recommendations.get()
+    # Un juego recién creado aún no está en el modelo: se comprueba que exista
+    if videogame_id not in model.catalog and not db.get(VideogameORM, videogame_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No existe ningún videojuego con el id {videogame_id}"
+        )
+    return model.similar(videogame_id, limit)
+
+
+def recommend_for_user(db: Session, user_id: int, limit: int) -> list[dict]:
+    if not db.get(UserORM, user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe el usuario con id {user_id}")
+
+    # La biblioteca se lee de la base de datos (clave primaria de user_game):
+    # lo que acaba de añadir no se le recomienda aunque el modelo sea anterior
+    owned = set(db.execute(
+        select(user_game_table.c.videogame_id).where(user_game_table.c.user_id == user_id)
+    ).scalars())
+    return recommendations.get().recommend(owned, limit)
@@ -9,6 +9,9 @@ from app.routers.api import videogames
 from app.routers.api import users
 from app.routers.api import developers
 from app.routers.api import reviews
+from app.routers.api import cache
+from app.routers.api import bulk
+from app.routers.api import health
 
 
 # main router
@@ -19,4 +22,7 @@ router.include_router(genres.router)
 router.include_router(videogames.router)
 router.include_router(users.router)
 router.include_router(developers.router)
-router.include_router(reviews.router)
\ No newline at end of file
+router.include_router(reviews.router)
+router.include_router(cache.router)
+router.include_router(bulk.router)
+router.include_router(health.router)
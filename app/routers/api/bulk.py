@@ -0,0 +1,100 @@
+import io
+
+from anyio import from_thread
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.bulk import ENTITIES, FORMATS, BulkEntity, export_rows, import_rows
+from app.database import SessionLocal
+from app.ratelimit import RateLimit
+
+# Cada importación puede escribir miles de filas: como mucho 2 seguidas y luego una cada 10 s
+router = APIRouter(prefix="/api/bulk", tags=["bulk"], dependencies=[Depends(RateLimit("bulk", rate=0.1, burst=2))])
+
+# Se usa la sesión síncrona también con DB_ASYNC: la carga va en un hilo aparte
+# y así el mismo router sirve para las dos APIs
+
+
+def get_entity_or_404(entity: str) -> BulkEntity:
+    if entity not in ENTITIES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No se pueden importar/exportar '{entity}'; opciones: {', '.join(ENTITIES)}"
+        )
+    return ENTITIES[entity]
+
+
+class RequestBodyReader(io.RawIOBase):
+    """
+    Fichero de solo lectura sobre el cuerpo de la petición, para usarlo desde
+    un hilo: cada lectura pide el siguiente trozo al bucle de eventos, así el
+    cuerpo nunca está entero en memoria.
+    """
+
+    def __init__(self, request: Request):
+        self._chunks = request.stream()
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = from_thread.run(self._chunks.__anext__)
+            except StopAsyncIteration:
+                return 0
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _import_body(entity: BulkEntity, request: Request, format: str) -> dict:
+    # utf-8-sig: los CSV exportados desde Excel empiezan con BOM.
+    # surrogateescape: una línea que no es UTF-8 se rechaza en el informe en vez de cortar la importación
+    lines = io.TextIOWrapper(
+        io.BufferedReader(RequestBodyReader(request)),
+        encoding="utf-8-sig", errors="surrogateescape", newline=""
+    )
+    with SessionLocal() as db:
+        return import_rows(db, entity, lines, format)
+
+
+# ===========================
+# IMPORT (NDJSON / CSV)
+# ===========================
+@router.post("/{entity}")
+async def import_entity(
+    entity: str,
+    request: Request,
+    format: str | None = Query(None, pattern="^(ndjson|csv)$")
+):
+    bulk_entity = get_entity_or_404(entity)
+
+    # Sin ?format= se decide por el Content-Type
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+
+    return await run_in_threadpool(_import_body, bulk_entity, request, format)
+
+
+# ===========================
+# EXPORT (NDJSON / CSV)
+# ===========================
+@router.get("/{entity}")
+def export_entity(entity: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    bulk_entity = get_entity_or_404(entity)
+
+    def stream():
+        # La sesión vive mientras se envía la respuesta, no solo durante el endpoint
+        with SessionLocal() as db:
+            yield from export_rows(db, bulk_entity, format)
+
+    return StreamingResponse(
+        stream(),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'}
+    )
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from app.cache import response_cache
+
+router = APIRouter(prefix="/api/cache", tags=["cache"])
+
+
+# Contadores de la caché de respuestas (aciertos, fallos, expulsiones...)
+@router.get("/stats")
+def cache_stats():
+    return response_cache.stats()
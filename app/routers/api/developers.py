@@ -1,32 +1,34 @@
-
-
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.cache import cached_json
 from app.database import get_db
 from app.models.developer import DevORM
+from app.pagination import PageParams, paginate
+from app.ratelimit import RateLimit
 from app.schemas.developer import DevCreate, DevPatch, DevResponse, DevUpdate
+from app.schemas.pagination import Page
 
 
-router = APIRouter(prefix="/api/developers", tags=["dev"])
-
+router = APIRouter(prefix="/api/developers", tags=["dev"], dependencies=[Depends(RateLimit("developers"))])
 
-@router.get("", response_model=list[DevResponse])
-def find_all(db: Session = Depends(get_db)):
-    return db.execute(select(DevORM)).scalars().all()
 
-@router.get("/{id}", response_model=DevResponse)
-def find_by_id(id: int, db: Session = Depends(get_db)):
+# Lógica de cada endpoint: la usan también los routers asíncronos (con run_sync)
+def get_dev_or_404(db: Session, id: int) -> DevORM:
     dev = db.execute(select(DevORM).where(DevORM.id == id)).scalar_one_or_none()
 
     if dev is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe la desarrolladora con id {id}")
-    
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe ninguna desarrolladora con el id {id}")
+
     return dev
 
-@router.post("", response_model=DevResponse)
-def create(dev_dto: DevCreate, db: Session = Depends(get_db)):
-    
+
+def dev_page(db: Session, page: PageParams) -> Page:
+    items, next_cursor = paginate(db, select(DevORM), DevORM.id, page)
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def create_dev(db: Session, dev_dto: DevCreate) -> DevORM:
     new_dev = DevORM(
         name=dev_dto.name,
         image_url=dev_dto.image_url
@@ -38,14 +40,9 @@ def create(dev_dto: DevCreate, db: Session = Depends(get_db)):
 
     return new_dev
 
-@router.put("/{id}", response_model=DevResponse)
-def update_full(id: int, dev_dto: DevUpdate, db: Session = Depends(get_db)):
-    dev = db.execute(select(DevORM).where(DevORM.id == id)).scalar_one_or_none()
 
-    if dev is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe ninguna desarrolladora con el id {id}")
-    
-    update_data = dev_dto.model_dump()
+def update_dev(db: Session, id: int, update_data: dict) -> DevORM:
+    dev = get_dev_or_404(db, id)
 
     for field, value in update_data.items():
         setattr(dev, field, value)
@@ -55,34 +52,33 @@ def update_full(id: int, dev_dto: DevUpdate, db: Session = Depends(get_db)):
 
     return dev
 
-@router.patch("/{id}", response_model=DevResponse)
-def update_partial(id: int, dev_dto: DevPatch, db: Session = Depends(get_db)):
 
-    dev = db.execute(select(DevORM).where(DevORM.id == id)).scalar_one_or_none()
+def delete_dev(db: Session, id: int):
+    db.delete(get_dev_or_404(db, id))
+    db.commit()
 
-    if dev is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe ninguna desarrolladora con el id {id}")
-    
-    update_data = dev_dto.model_dump(exclude_unset=True)
 
-    for field, value in update_data.items():
-        setattr(dev, field, value)
+@router.get("", response_model=Page[DevResponse])
+def find_all(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return cached_json(f"developers:{page.limit}:{page.after}", ["developers"], Page[DevResponse], lambda: dev_page(db, page))
 
+@router.get("/{id}", response_model=DevResponse)
+def find_by_id(id: int, db: Session = Depends(get_db)):
+    return cached_json(f"developer:{id}", [f"developer:{id}"], DevResponse, lambda: get_dev_or_404(db, id))
 
-    db.commit()
-    db.refresh(dev)
+@router.post("", response_model=DevResponse)
+def create(dev_dto: DevCreate, db: Session = Depends(get_db)):
+    return create_dev(db, dev_dto)
 
-    return dev
+@router.put("/{id}", response_model=DevResponse)
+def update_full(id: int, dev_dto: DevUpdate, db: Session = Depends(get_db)):
+    return update_dev(db, id, dev_dto.model_dump())
+
+@router.patch("/{id}", response_model=DevResponse)
+def update_partial(id: int, dev_dto: DevPatch, db: Session = Depends(get_db)):
+    return update_dev(db, id, dev_dto.model_dump(exclude_unset=True))
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete(id: int, db: Session = Depends(get_db)):
-    dev = db.execute(select(DevORM).where(DevORM.id == id)).scalar_one_or_none()
-
-    if dev is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe ninguna desarrolladora con el id {id}")
-    
-
-    db.delete(dev)
-    db.commit()
-
-    return None
\ No newline at end of file
+    delete_dev(db, id)
+    return None
@@ -1,32 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
+from app.ratelimit import RateLimit
 from app.schemas.genre import GenreResponse, GenreCreate, GenreUpdate, GenrePatch
+from app.schemas.pagination import Page
+from app.cache import cached_json
 from app.database import get_db
+from app.pagination import PageParams, paginate
 from sqlalchemy.orm import Session
 from app.models.genre import GenreORM
 
 # create router for endpoints
-router = APIRouter(prefix="/api/genres", tags=["genres"])
+router = APIRouter(prefix="/api/genres", tags=["genres"], dependencies=[Depends(RateLimit("genres"))])
 
-# GET - retrieve ALL genres
-@router.get("", response_model=list[GenreResponse])
-def find_all(db: Session = Depends(get_db)):
-    return db.execute(select(GenreORM)).scalars().all()
 
-@router.get("/{id}", response_model=GenreResponse)
-def find_by_id(id: int, db: Session = Depends(get_db)):
+# Lógica de cada endpoint: la usan también los routers asíncronos (con run_sync)
+def get_genre_or_404(db: Session, id: int) -> GenreORM:
     genre = db.execute(select(GenreORM).where(GenreORM.id == id)).scalar_one_or_none()
 
     if not genre:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe ningún género con el id {id}")
-    
+
     return genre
 
-@router.post("",status_code=status.HTTP_201_CREATED, response_model=GenreResponse)
-def create(genre_dto: GenreCreate, db: Session = Depends(get_db)):
+
+def genre_page(db: Session, page: PageParams) -> Page:
+    items, next_cursor = paginate(db, select(GenreORM), GenreORM.id, page)
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def create_genre(db: Session, genre_dto: GenreCreate) -> GenreORM:
     new_genre = GenreORM(
         name=genre_dto.name,
-        description=genre_dto.description
+        description=genre_dto.description,
+        image_url=genre_dto.image_url
     )
 
     db.add(new_genre)
@@ -35,15 +41,9 @@ def create(genre_dto: GenreCreate, db: Session = Depends(get_db)):
 
     return new_genre
 
-@router.put("/{id}", response_model=GenreResponse)
-def update_full(id: int, genre_dto: GenreUpdate, db: Session = Depends(get_db)):
-    genre = db.execute(select(GenreORM).where(GenreORM.id == id)).scalar_one_or_none()
-    
-    if not genre:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe el género con el id {id}")
-    
-    # store the dictionary obtained from genre_dto
-    update_data = genre_dto.model_dump()
+
+def update_genre(db: Session, id: int, update_data: dict) -> GenreORM:
+    genre = get_genre_or_404(db, id)
 
     # loop to assign the dictionary values to each attribute
     for field, value in update_data.items():
@@ -51,34 +51,37 @@ def update_full(id: int, genre_dto: GenreUpdate, db: Session = Depends(get_db)):
 
     db.commit()
     db.refresh(genre)
-    
+
     return genre
 
-@router.patch("/{id}", response_model=GenreResponse)
-def update_partial(id: int, genre_dto: GenrePatch, db: Session = Depends(get_db)):
-    genre = db.execute(select(GenreORM).where(GenreORM.id == id)).scalar_one_or_none()
 
-    if not genre:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe el género con el id {id}")
-   
-    update_data = genre_dto.model_dump(exclude_unset=True)
+def delete_genre(db: Session, id: int):
+    db.delete(get_genre_or_404(db, id))
+    db.commit()
 
-    for field, value in update_data.items():
-        setattr(genre, field, value)
 
-    db.commit()
-    db.refresh(genre)
+# GET - retrieve ALL genres
+@router.get("", response_model=Page[GenreResponse])
+def find_all(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return cached_json(f"genres:{page.limit}:{page.after}", ["genres"], Page[GenreResponse], lambda: genre_page(db, page))
 
-    return genre
+@router.get("/{id}", response_model=GenreResponse)
+def find_by_id(id: int, db: Session = Depends(get_db)):
+    return cached_json(f"genre:{id}", [f"genre:{id}"], GenreResponse, lambda: get_genre_or_404(db, id))
 
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete(id: int, db: Session = Depends(get_db)):
-    genre = db.execute(select(GenreORM).where(GenreORM.id == id)).scalar_one_or_none()
+@router.post("",status_code=status.HTTP_201_CREATED, response_model=GenreResponse)
+def create(genre_dto: GenreCreate, db: Session = Depends(get_db)):
+    return create_genre(db, genre_dto)
 
-    if not genre:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe el género con el id {id}")
-    
-    db.delete(genre)
-    db.commit()
+@router.put("/{id}", response_model=GenreResponse)
+def update_full(id: int, genre_dto: GenreUpdate, db: Session = Depends(get_db)):
+    return update_genre(db, id, genre_dto.model_dump())
 
-    return None
\ No newline at end of file
+@router.patch("/{id}", response_model=GenreResponse)
+def update_partial(id: int, genre_dto: GenrePatch, db: Session = Depends(get_db)):
+    return update_genre(db, id, genre_dto.model_dump(exclude_unset=True))
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete(id: int, db: Session = Depends(get_db)):
+    delete_genre(db, id)
+    return None
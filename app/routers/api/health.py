@@ -0,0 +1,47 @@
+import time
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import SessionLocal
+from app.migrations import MIGRATIONS, get_schema_version
+from app.startup import readiness
+
+router = APIRouter(prefix="/api/health", tags=["health"])
+
+
+# El proceso responde (para reiniciarlo si se queda colgado)
+@router.get("/live")
+def live():
+    return {"status": "ok"}
+
+
+# Puede recibir tráfico: arranque terminado, base de datos accesible y migrada
+@router.get("/ready")
+def ready():
+    if not readiness.ready:
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    try:
+        with SessionLocal() as db:
+            schema_version = get_schema_version(db)
+    except SQLAlchemyError as error:
+        return JSONResponse(
+            {"status": "unavailable", "detail": f"No se puede acceder a la base de datos: {error.__class__.__name__}"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    expected = MIGRATIONS[-1][0]
+    if schema_version < expected:
+        return JSONResponse(
+            {"status": "unavailable", "detail": f"Esquema en la versión {schema_version}, se esperaba la {expected}"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    return {
+        "status": "ready",
+        "schema_version": schema_version,
+        "startup_ms": round(readiness.startup_ms, 1),
+        "uptime": round(time.time() - readiness.started_at, 1),
+    }
@@ -1,81 +1,152 @@
+from contextlib import contextmanager
+from typing import Callable
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.review import ReviewORM
+from app.pagination import PageParams, paginate
+from app.ratelimit import RateLimit
+from app.rating_stats import add_rating, change_rating, remove_rating
+from app.schemas.pagination import Page
 from app.schemas.review import ReviewResponse, ReviewCreate, ReviewUpdate, ReviewPatch
+from app.serialization import FastJSONResponse, page_dict, review_dict
+from app.streaming import StreamParams, stream_list
+from app.write_queue import write_review
 
-router = APIRouter(prefix="/api/reviews", tags=["reviews"])
+router = APIRouter(prefix="/api/reviews", tags=["reviews"], dependencies=[Depends(RateLimit("reviews"))])
 
-@router.get("", response_model=list[ReviewResponse])
-def find_all(db: Session = Depends(get_db)):
-    return db.execute(select(ReviewORM)).scalars().all()
+DUPLICATE_REVIEW_DETAIL = "El usuario ya tiene una review de este videojuego"
 
-@router.get("/{id}", response_model=ReviewResponse)
-def find_by_id(id: int, db: Session = Depends(get_db)):
-    review = db.execute(select(ReviewORM).where(ReviewORM.id == id)).scalar_one_or_none()
-    if not review:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe review con id {id}")
-    return review
 
-@router.post("", status_code=status.HTTP_201_CREATED, response_model=ReviewResponse)
-def create(review_dto: ReviewCreate, db: Session = Depends(get_db)):
-    new_review = ReviewORM(
-        rating=review_dto.rating,
-        comment=review_dto.comment,
-        user_id=review_dto.user_id,
-        videogame_id=review_dto.videogame_id
+# Un usuario, una reseña por juego: al editar tampoco se puede mover a un juego ya reseñado
+def duplicate_review_stmt(review: ReviewORM, videogame_id: int):
+    return select(ReviewORM.id).where(
+        ReviewORM.user_id == review.user_id,
+        ReviewORM.videogame_id == videogame_id,
+        ReviewORM.id != review.id
     )
-    db.add(new_review)
-    db.commit()
-    db.refresh(new_review)
-    return new_review
 
-@router.put("/{id}", response_model=ReviewResponse)
-def update_full(id: int, review_dto: ReviewUpdate, db: Session = Depends(get_db)):
-    review = db.execute(select(ReviewORM).where(ReviewORM.id == id)).scalar_one_or_none()
-    if not review:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe review con id {id}")
 
-    # Verificar que el usuario propietario es quien actualiza
-    if review.user_id != review_dto.user_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos para modificar esta review")
+def check_duplicate_review(db: Session, review: ReviewORM, videogame_id: int):
+    if videogame_id != review.videogame_id and db.execute(duplicate_review_stmt(review, videogame_id)).first():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=DUPLICATE_REVIEW_DETAIL)
 
-    update_data = review_dto.model_dump()
-    for field, value in update_data.items():
-        setattr(review, field, value)
 
-    db.commit()
-    db.refresh(review)
-    return review
+@contextmanager
+def duplicate_review_conflict(db: Session):
+    """
+    Si otra petición crea la misma reseña entre la comprobación y la escritura,
+    salta el índice único: en un flush (change_rating) o en el commit.
+    """
+    try:
+        yield
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=DUPLICATE_REVIEW_DETAIL)
 
-@router.patch("/{id}", response_model=ReviewResponse)
-def update_partial(id: int, review_dto: ReviewPatch, db: Session = Depends(get_db)):
+
+def get_review_or_404(db: Session, id: int) -> ReviewORM:
     review = db.execute(select(ReviewORM).where(ReviewORM.id == id)).scalar_one_or_none()
     if not review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe review con id {id}")
+    return review
 
-    # Verificar propiedad si se pasa user_id en el patch
-    if review_dto.user_id is not None and review.user_id != review_dto.user_id:
+
+# Lógica de cada escritura: la usan también los routers asíncronos (con run_sync)
+def create_review_operation(review_dto: ReviewCreate) -> Callable[[Session], ReviewORM]:
+    """Alta de la reseña sin commit, para write_review / write_review_async."""
+    def write(db: Session) -> ReviewORM:
+        # Un usuario, una reseña por juego
+        existing_review = db.execute(
+            select(ReviewORM).where(
+                ReviewORM.user_id == review_dto.user_id,
+                ReviewORM.videogame_id == review_dto.videogame_id
+            )
+        ).scalar_one_or_none()
+        if existing_review:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=DUPLICATE_REVIEW_DETAIL)
+
+        new_review = ReviewORM(
+            rating=review_dto.rating,
+            comment=review_dto.comment,
+            user_id=review_dto.user_id,
+            videogame_id=review_dto.videogame_id
+        )
+        db.add(new_review)
+        add_rating(db, new_review.videogame_id, new_review.rating)
+        # El id se asigna aquí: tras el commit del lote la sesión ya no existe
+        db.flush()
+        return new_review
+
+    return write
+
+
+def update_review(db: Session, id: int, update_data: dict, user_id: int | None) -> ReviewORM:
+    """user_id es quien edita; None si el PATCH no lo indica."""
+    review = get_review_or_404(db, id)
+
+    # Verificar que el usuario propietario es quien actualiza
+    if user_id is not None and review.user_id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos para modificar esta review")
 
-    update_data = review_dto.model_dump(exclude_unset=True)
+    old_videogame_id, old_rating = review.videogame_id, review.rating
+
+    check_duplicate_review(db, review, update_data.get("videogame_id", review.videogame_id))
     for field, value in update_data.items():
         setattr(review, field, value)
 
-    db.commit()
+    with duplicate_review_conflict(db):
+        change_rating(db, old_videogame_id, old_rating, review.videogame_id, review.rating)
+        db.commit()
     db.refresh(review)
     return review
 
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete(id: int, user_id: int, db: Session = Depends(get_db)):
-    review = db.execute(select(ReviewORM).where(ReviewORM.id == id)).scalar_one_or_none()
-    if not review:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe review con id {id}")
+
+def delete_review(db: Session, id: int, user_id: int):
+    review = get_review_or_404(db, id)
 
     if review.user_id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos para eliminar esta review")
 
     db.delete(review)
+    remove_rating(db, review.videogame_id, review.rating)
     db.commit()
+
+
+def review_page_response(db: Session, page: PageParams) -> FastJSONResponse:
+    items, next_cursor = paginate(db, select(ReviewORM), ReviewORM.id, page)
+    return FastJSONResponse(page_dict([review_dict(review) for review in items], next_cursor))
+
+
+@router.get("", response_model=Page[ReviewResponse])
+def find_all(page: PageParams = Depends(), stream: StreamParams = Depends(), db: Session = Depends(get_db)):
+    if stream.enabled:
+        return stream_list(select(ReviewORM), ReviewORM.id, page, stream, ReviewResponse)
+
+    return review_page_response(db, page)
+
+@router.get("/{id}", response_model=ReviewResponse)
+def find_by_id(id: int, db: Session = Depends(get_db)):
+    return get_review_or_404(db, id)
+
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=ReviewResponse)
+def create(review_dto: ReviewCreate, db: Session = Depends(get_db)):
+    # Con REVIEW_WRITE_BEHIND el alta se confirma junto con otras en el escritor por lotes
+    return write_review(db, create_review_operation(review_dto), DUPLICATE_REVIEW_DETAIL)
+
+@router.put("/{id}", response_model=ReviewResponse)
+def update_full(id: int, review_dto: ReviewUpdate, db: Session = Depends(get_db)):
+    return update_review(db, id, review_dto.model_dump(), review_dto.user_id)
+
+@router.patch("/{id}", response_model=ReviewResponse)
+def update_partial(id: int, review_dto: ReviewPatch, db: Session = Depends(get_db)):
+    # Verificar propiedad si se pasa user_id en el patch
+    return update_review(db, id, review_dto.model_dump(exclude_unset=True), review_dto.user_id)
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete(id: int, user_id: int, db: Session = Depends(get_db)):
+    delete_review(db, id, user_id)
     return None
@@ -1,114 +1,318 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-from app.database import get_db
+from collections import defaultdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session, lazyload
+from app.database import get_db, utcnow
+from app.etag import check_if_match, commit_versioned, latest, not_modified, user_validators, validator_headers
+from app.fieldsets import Fieldset, Relation, Selection
+from app.library import add_to_library, library_page, library_stmt, owns_game, remove_from_library
+from app.models.review import ReviewORM
 from app.models.user import UserORM
+from app.models.user_game import user_game_table
 from app.models.videogame import VideogameORM
+from app.models.videogame_stats import VideogameStatsORM
+from app.pagination import PageParams, paginate
+from app.ratelimit import RateLimit
+from app.recommendations import recommend_for_user
+from app.rating_stats import remove_rating
+from app.schemas.pagination import CountedPage, Page
+from app.security import hash_password
 from app.schemas.user import UserResponse, UserCreate, UserUpdate, UserPatch
-from app.schemas.videogame import VideogameResponse
+from app.schemas.videogame import RecommendedVideogame, VideogameResponse
+from app.serialization import FastJSONResponse, dumps, page_dict, review_dict, user_dict, videogame_dict
+from app.streaming import StreamParams, stream_list
+
+router = APIRouter(prefix="/api/users", tags=["users"], dependencies=[Depends(RateLimit("users"))])
+
+# ?fields= y ?include=: por defecto se embebe la biblioteca. La biblioteca no se
+# carga con la relación sino con build_user_responses, que solo pone en cada juego
+# las reviews del propio usuario, igual que la respuesta completa
+user_fields = Fieldset(
+    UserORM,
+    UserResponse,
+    relations={"videogames": Relation(UserORM.videogames, list[VideogameResponse], option=lazyload(UserORM.videogames))},
+    default_include=["videogames"]
+)
+
+
+def sparse_user_query(fields: Selection):
+    if "videogames" in fields.include:
+        # build_user_responses necesita todas las columnas del usuario
+        return select(UserORM), build_user_responses
+    return select(UserORM).options(*fields.options()), None
+
+
+def build_user_responses(db: Session, users: list[UserORM]) -> list[dict]:
+    """
+    Construye los UserResponse con su biblioteca y sus reviews en tres consultas
+    en total (usuarios, biblioteca y reviews), sin lazy loads por usuario ni por juego.
+    Devuelve dicts de confianza (app.serialization), sin validar cada objeto con Pydantic.
+    """
+    user_ids = [user.id for user in users]
+    if not user_ids:
+        return []
+
+    # Biblioteca de todos los usuarios de una vez
+    library_rows = db.execute(
+        select(
+            user_game_table.c.user_id,
+            VideogameORM.id,
+            VideogameORM.title,
+            VideogameORM.description,
+            VideogameORM.cover_url,
+            VideogameORM.genre_id,
+            VideogameORM.developer_id,
+            VideogameStatsORM,
+        )
+        .join(VideogameORM, VideogameORM.id == user_game_table.c.videogame_id)
+        .outerjoin(VideogameStatsORM, VideogameStatsORM.videogame_id == VideogameORM.id)
+        .where(user_game_table.c.user_id.in_(user_ids))
+        .order_by(user_game_table.c.user_id, VideogameORM.id)
+    ).all()
+
+    # Solo las reviews de cada usuario sobre los juegos de su biblioteca
+    reviews = db.execute(
+        select(ReviewORM)
+        .join(user_game_table, and_(
+            user_game_table.c.user_id == ReviewORM.user_id,
+            user_game_table.c.videogame_id == ReviewORM.videogame_id
+        ))
+        .where(user_game_table.c.user_id.in_(user_ids))
+        .order_by(ReviewORM.id)
+    ).scalars().all()
+
+    reviews_by_game = defaultdict(list)
+    for review in reviews:
+        reviews_by_game[(review.user_id, review.videogame_id)].append(review_dict(review))
+
+    games_by_user = defaultdict(list)
+    for row in library_rows:
+        games_by_user[row.user_id].append(
+            videogame_dict(row, reviews=reviews_by_game[(row.user_id, row.id)], stats=row.VideogameStatsORM)
+        )
+
+    return [user_dict(user, games_by_user[user.id]) for user in users]
+
+
+def load_user_validators(db: Session, user: UserORM):
+    """ETag y Last-Modified de un UserResponse leyendo solo versiones y fechas."""
+    library = db.execute(
+        select(VideogameORM.id, VideogameORM.version, VideogameORM.updated_at, VideogameStatsORM.updated_at)
+        .join(user_game_table, user_game_table.c.videogame_id == VideogameORM.id)
+        .outerjoin(VideogameStatsORM, VideogameStatsORM.videogame_id == VideogameORM.id)
+        .where(user_game_table.c.user_id == user.id)
+        .order_by(VideogameORM.id)
+    ).all()
+    reviews = db.execute(
+        select(ReviewORM.id, ReviewORM.version, ReviewORM.updated_at)
+        .where(ReviewORM.user_id == user.id)
+        .order_by(ReviewORM.id)
+    ).all()
+
+    library = [(game_id, version, latest(updated_at, stats_updated_at)) for game_id, version, updated_at, stats_updated_at in library]
+    return user_validators(user, library, [tuple(review) for review in reviews])
 
-router = APIRouter(prefix="/api/users", tags=["users"])
 
-@router.get("", response_model=list[UserResponse])
-def find_all(db: Session = Depends(get_db)):
-    users = db.execute(select(UserORM)).scalars().all()
+# ==================================================
+#   LÓGICA COMPARTIDA CON LOS ROUTERS ASÍNCRONOS
+# ==================================================
+# Se llaman directamente aquí y con run_sync desde app.routers.api_async.users.
+# El hash de las contraseñas queda fuera: es lento a propósito y el router
+# asíncrono lo calcula en un hilo
+def get_user_or_404(db: Session, id: int) -> UserORM:
+    user = db.get(UserORM, id)
 
-    result = []
-    for user in users:
-        user_copy = UserResponse.model_validate(user)  # en vez de from_orm
-        # Filtrar reviews de cada videojuego para el usuario
-        user_videogames = []
-        for vg in user.videogames:
-            filtered_reviews = [r for r in vg.reviews if r.user_id == user.id]
-            vg_copy = VideogameResponse.model_validate(vg)
-            vg_copy.reviews = filtered_reviews
-            user_videogames.append(vg_copy)
-        user_copy.videogames = user_videogames
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe ningún usuario con el id {id}")
 
-        result.append(user_copy)
+    return user
 
-    return result
 
-@router.get("/{id}", response_model=UserResponse)
-def find_by_id(id: int, db: Session = Depends(get_db)):
-    user = db.execute(select(UserORM).where(UserORM.id == id)).scalar_one_or_none()
+def user_list_query(fields: Selection):
+    """Consulta, transformación de cada bloque y codificación de la lista de usuarios."""
+    if fields.is_default:
+        # Cada bloque de usuarios se completa con las mismas tres consultas
+        return select(UserORM), build_user_responses, dumps
+    stmt, transform = sparse_user_query(fields)
+    return stmt, transform, fields.encode
+
+
+def user_page_response(db: Session, page: PageParams, fields: Selection):
+    stmt, transform, _ = user_list_query(fields)
+    users, next_cursor = paginate(db, stmt, UserORM.id, page)
+
+    if not fields.is_default:
+        return fields.page_response(transform(db, users) if transform else users, next_cursor)
+
+    # Dicts de confianza: FastAPI no vuelve a validar cada usuario y cada juego
+    return FastJSONResponse(page_dict(build_user_responses(db, users), next_cursor))
+
+
+def user_response(db: Session, request: Request, id: int, fields: Selection):
+    stmt, transform = sparse_user_query(fields) if not fields.is_default else (select(UserORM), None)
+    user = db.execute(stmt.where(UserORM.id == id)).scalar_one_or_none()
 
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe ningún usuario con el id {id}")
-    
-    # Filtrar reviews por usuario
-    user_videogames = []
-    for vg in user.videogames:
-        filtered_reviews = [r for r in vg.reviews if r.user_id == user.id]
-        vg_copy = VideogameResponse.model_validate(vg)
-        vg_copy.reviews = filtered_reviews
-        user_videogames.append(vg_copy)
 
-    user_copy = UserResponse.model_validate(user)
-    user_copy.videogames = user_videogames
+    if not fields.is_default:
+        return fields.response(transform(db, [user])[0] if transform else user)
 
-    return user_copy
+    etag, last_modified = load_user_validators(db, user)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
 
-@router.post("", response_model=UserResponse)
-def create(user_dto: UserCreate, db: Session = Depends(get_db)):
+    return FastJSONResponse(build_user_responses(db, [user])[0], headers=validator_headers(etag, last_modified))
+
+
+def user_update_data(user_dto: UserUpdate | UserPatch) -> tuple[dict, str | None]:
+    """Campos que cambian y la contraseña nueva sin hash (None si no cambia)."""
+    new_data = user_dto.model_dump(exclude_unset=isinstance(user_dto, UserPatch))
+    return new_data, new_data.pop("password", None) or None
+
+
+def get_user_for_update(db: Session, request: Request, id: int) -> UserORM:
+    user = get_user_or_404(db, id)
+    check_if_match(request, load_user_validators(db, user)[0])
+    return user
+
+
+def create_user(db: Session, user_dto: UserCreate, password_hash: str) -> dict:
     new_user = UserORM(
         nick=user_dto.nick,
         email=user_dto.email,
         nif=user_dto.nif,
-        password=user_dto.password
+        password=password_hash
     )
 
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
 
-    return new_user
-
-@router.put("/{id}", response_model=UserResponse)
-def update_full(id: int, user_dto: UserUpdate, db: Session = Depends(get_db)):
-    user = db.execute(select(UserORM).where(UserORM.id == id)).scalar_one_or_none()
-
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe el usuario con id {id}")
+    return build_user_responses(db, [new_user])[0]
 
-    new_data = user_dto.model_dump()
 
+def save_user(db: Session, user: UserORM, new_data: dict) -> FastJSONResponse:
     for field, value in new_data.items():
         setattr(user, field, value)
 
-    db.commit()
+    commit_versioned(db)
     db.refresh(user)
 
-    return user
+    return FastJSONResponse(build_user_responses(db, [user])[0], headers=validator_headers(*load_user_validators(db, user)))
 
-@router.patch("/{id}", response_model=UserResponse)
-def update_partial(id: int, user_dto: UserPatch, db: Session = Depends(get_db)):
-    user = db.execute(select(UserORM).where(UserORM.id == id)).scalar_one_or_none()
 
+def delete_user(db: Session, id: int):
+    db.delete(get_user_or_404(db, id))
+    db.commit()
+
+
+def get_library_owner(db: Session, id: int, game_id: int | None = None) -> UserORM:
+    user = db.get(UserORM, id)
     if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe el usuario con id {id}")
-    
-    new_data = user_dto.model_dump(exclude_unset=True)
+        raise HTTPException(404, "Usuario no encontrado")
 
-    for field, value in new_data.items():
-        setattr(user, field, value)
+    if game_id is not None and not db.get(VideogameORM, game_id):
+        raise HTTPException(404, "Videojuego no encontrado")
+
+    return user
+
+
+def user_games_response(db: Session, id: int) -> FastJSONResponse:
+    get_library_owner(db, id)
+    return FastJSONResponse([videogame_dict(game) for game in db.execute(library_stmt(id)).scalars()])
 
+
+def user_library_response(db: Session, id: int, page: PageParams) -> FastJSONResponse:
+    get_library_owner(db, id)
+    items, next_cursor, total = library_page(db, id, page)
+    return FastJSONResponse({**page_dict([videogame_dict(game) for game in items], next_cursor), "total": total})
+
+
+def add_user_game(db: Session, id: int, game_id: int) -> dict:
+    user = get_library_owner(db, id, game_id)
+
+    if owns_game(db, id, game_id):
+        raise HTTPException(400, "El usuario ya posee este juego")
+
+    add_to_library(db, id, game_id)
+    # La biblioteca forma parte del usuario: cambia su versión y su ETag
+    user.updated_at = utcnow()
     db.commit()
-    db.refresh(user)
 
-    return user
+    return {"message": "Videojuego añadido a la biblioteca"}
 
 
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete(id: int, db: Session = Depends(get_db)):
-    user = db.execute(select(UserORM).where(UserORM.id == id)).scalar_one_or_none()
+def remove_user_game(db: Session, id: int, game_id: int):
+    user = get_library_owner(db, id, game_id)
 
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No existe el usuario con id {id}")
-    
-    db.delete(user)
+    if not owns_game(db, id, game_id):
+        raise HTTPException(400, "El usuario no posee este juego")
+
+    # Eliminar reviews del usuario en ese juego, para que no se queden huérfanas al eliminar un videjuego de tu biblioteca
+    reviews_to_delete = db.execute(
+        select(ReviewORM).where(ReviewORM.user_id == id, ReviewORM.videogame_id == game_id)
+    ).scalars().all()
+    for r in reviews_to_delete:
+        db.delete(r)
+        remove_rating(db, r.videogame_id, r.rating)
+
+   # Eliminar el juego de la biblioteca del usuario     
+    remove_from_library(db, id, game_id)
+    user.updated_at = utcnow()
     db.commit()
-    
+
+
+# ==================================================
+#                 ENDPOINTS CRUD
+# ==================================================
+@router.get("", response_model=Page[UserResponse])
+def find_all(
+    page: PageParams = Depends(),
+    stream: StreamParams = Depends(),
+    fields: Selection = Depends(user_fields),
+    db: Session = Depends(get_db)
+):
+    if stream.enabled:
+        stmt, transform, encode = user_list_query(fields)
+        return stream_list(stmt, UserORM.id, page, stream, UserResponse, transform=transform, encode=encode)
+
+    return user_page_response(db, page, fields)
+
+@router.get("/{id}", response_model=UserResponse)
+def find_by_id(
+    id: int,
+    request: Request,
+    fields: Selection = Depends(user_fields),
+    db: Session = Depends(get_db)
+):
+    return user_response(db, request, id, fields)
+
+@router.post("", response_model=UserResponse)
+def create(user_dto: UserCreate, db: Session = Depends(get_db)):
+    return create_user(db, user_dto, hash_password(user_dto.password))
+
+@router.put("/{id}", response_model=UserResponse)
+def update_full(id: int, user_dto: UserUpdate, request: Request, db: Session = Depends(get_db)):
+    user = get_user_for_update(db, request, id)
+    new_data, password = user_update_data(user_dto)
+    new_data["password"] = hash_password(password)
+    return save_user(db, user, new_data)
+
+@router.patch("/{id}", response_model=UserResponse)
+def update_partial(id: int, user_dto: UserPatch, request: Request, db: Session = Depends(get_db)):
+    user = get_user_for_update(db, request, id)
+    new_data, password = user_update_data(user_dto)
+    if password:
+        new_data["password"] = hash_password(password)
+    return save_user(db, user, new_data)
+
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete(id: int, db: Session = Depends(get_db)):
+    delete_user(db, id)
     return None
 
 # ==================================================
@@ -118,53 +322,29 @@ def delete(id: int, db: Session = Depends(get_db)):
 # Obtener todos los videojuegos que posee un usuario
 @router.get("/{id}/games", response_model=list[VideogameResponse])
 def get_user_games(id: int, db: Session = Depends(get_db)):
-    user = db.get(UserORM, id)
-    if not user:
-        raise HTTPException(404, "Usuario no encontrado")
-
-    return user.videogames
+    return user_games_response(db, id)
 
 
-# Añadir un videojuego a la biblioteca del usuario
-@router.post("/{id}/games/{game_id}", status_code=201)
-def add_game_to_user(id: int, game_id: int, db: Session = Depends(get_db)):
-    user = db.get(UserORM, id)
-    if not user:
-        raise HTTPException(404, "Usuario no encontrado")
+# Biblioteca paginada con el total de juegos
+@router.get("/{id}/library", response_model=CountedPage[VideogameResponse])
+def get_user_library(id: int, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return user_library_response(db, id, page)
 
-    game = db.get(VideogameORM, game_id)
-    if not game:
-        raise HTTPException(404, "Videojuego no encontrado")
 
-    if game in user.videogames:
-        raise HTTPException(400, "El usuario ya posee este juego")
+# Juegos recomendados a partir de su biblioteca
+@router.get("/{id}/recommendations", response_model=list[RecommendedVideogame])
+def get_user_recommendations(id: int, limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    return recommend_for_user(db, id, limit)
 
-    user.videogames.append(game)
-    db.commit()
 
-    return {"message": "Videojuego añadido a la biblioteca"}
+# Añadir un videojuego a la biblioteca del usuario
+@router.post("/{id}/games/{game_id}", status_code=201)
+def add_game_to_user(id: int, game_id: int, db: Session = Depends(get_db)):
+    return add_user_game(db, id, game_id)
 
 
 # Eliminar un videojuego de la biblioteca del usuario
 @router.delete("/{id}/games/{game_id}", status_code=204)
 def remove_game_from_user(id: int, game_id: int, db: Session = Depends(get_db)):
-    user = db.get(UserORM, id)
-    if not user:
-        raise HTTPException(404, "Usuario no encontrado")
-
-    game = db.get(VideogameORM, game_id)
-    if not game:
-        raise HTTPException(404, "Videojuego no encontrado")
-
-    if game not in user.videogames:
-        raise HTTPException(400, "El usuario no posee este juego")
-
-    # Eliminar reviews del usuario en ese juego, para que no se queden huérfanas al eliminar un videjuego de tu biblioteca
-    reviews_to_delete = [r for r in game.reviews if r.user_id == user.id]
-    for r in reviews_to_delete:
-        db.delete(r)
-        
-   # Eliminar el juego de la biblioteca del usuario     
-    user.videogames.remove(game)
-    db.commit()
-    return None
\ No newline at end of file
+    remove_user_game(db, id, game_id)
+    return None
@@ -1,37 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.cache import cached_json
 from app.database import get_db
+from app.etag import check_if_match, commit_versioned, not_modified, validator_headers, videogame_page_validators, videogame_validators
+from app.fieldsets import Fieldset, Relation, Selection
 from app.models.videogame import VideogameORM
-from app.schemas.videogame import VideogameResponse, VideogameCreate, VideogameUpdate, VideogamePatch
-
-router = APIRouter(prefix="/api/videogames", tags=["videogames"])
+from app.pagination import PageParams, paginate
+from app.leaderboards import top_videogames
+from app.ratelimit import RateLimit
+from app.recommendations import similar_videogames
+from app.schemas.developer import DevResponse
+from app.schemas.genre import GenreResponse
+from app.schemas.pagination import Page
+from app.schemas.review import ReviewResponse
+from app.schemas.videogame import RatingStatsResponse, VideogameResponse, VideogameCreate, VideogameUpdate, VideogamePatch, VideogameSearchResult, RankedVideogame, RecommendedVideogame
+from app.search import search_videogames
+from app.serialization import FastJSONResponse, page_dict, videogame_dict
+from app.streaming import StreamParams, stream_list
+
+router = APIRouter(prefix="/api/videogames", tags=["videogames"], dependencies=[Depends(RateLimit("videogames"))])
+
+# ?fields= y ?include=: por defecto se embeben las reviews y las estadísticas
+videogame_fields = Fieldset(
+    VideogameORM,
+    VideogameResponse,
+    relations={
+        "reviews": Relation(VideogameORM.reviews, list[ReviewResponse]),
+        "stats": Relation(VideogameORM.stats, RatingStatsResponse | None, option=joinedload(VideogameORM.stats)),
+        "genre": Relation(VideogameORM.genre, GenreResponse | None, requires=(VideogameORM.genre_id,)),
+        "developer": Relation(VideogameORM.developer, DevResponse | None, requires=(VideogameORM.developer_id,)),
+    },
+    default_include=["reviews", "stats"]
+)
 
 
 # ===========================
-# GET ALL
+# Lógica de cada endpoint: la usan también los routers asíncronos (con run_sync)
 # ===========================
-@router.get("", response_model=list[VideogameResponse])
-def find_all(db: Session = Depends(get_db)):
-    stmt = (
-        select(VideogameORM)
-        .options(selectinload(VideogameORM.reviews))   # 👈 Cargar reviews
+def videogame_list_query(fields: Selection):
+    """Consulta de la lista y codificación de cada juego al hacer streaming."""
+    if not fields.is_default:
+        return select(VideogameORM).options(*fields.options()), fields.encode
+    return select(VideogameORM).options(selectinload(VideogameORM.reviews)), None   # 👈 Cargar reviews
+
+
+def videogame_page_response(db: Session, request: Request, page: PageParams, fields: Selection):
+    stmt, _ = videogame_list_query(fields)
+    items, next_cursor = paginate(db, stmt, VideogameORM.id, page)
+    if not fields.is_default:
+        return fields.page_response(items, next_cursor)
+
+    # Si el cliente ya tiene esta página no se serializa nada
+    etag, last_modified = videogame_page_validators(items, next_cursor)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    return FastJSONResponse(
+        page_dict([videogame_dict(videogame) for videogame in items], next_cursor),
+        headers=validator_headers(etag, last_modified)
     )
-    return db.execute(stmt).scalars().all()
 
 
-# ===========================
-# GET BY ID
-# ===========================
-@router.get("/{id}", response_model=VideogameResponse)
-def find_by_id(id: int, db: Session = Depends(get_db)):
+def get_videogame_or_404(db: Session, id: int, options: list | None = None) -> VideogameORM:
+    # Las reviews se cargan aquí: con AsyncSession no hay lazy loads al serializar
     stmt = (
         select(VideogameORM)
         .where(VideogameORM.id == id)
-        .options(selectinload(VideogameORM.reviews))   # 👈 Cargar reviews
+        .options(*(options if options is not None else [selectinload(VideogameORM.reviews)]))
     )
-
     videogame = db.execute(stmt).scalar_one_or_none()
 
     if not videogame:
@@ -43,11 +82,7 @@ def find_by_id(id: int, db: Session = Depends(get_db)):
     return videogame
 
 
-# ===========================
-# CREATE
-# ===========================
-@router.post("", status_code=status.HTTP_201_CREATED, response_model=VideogameResponse)
-def create(videogame_dto: VideogameCreate, db: Session = Depends(get_db)):
+def create_videogame(db: Session, videogame_dto: VideogameCreate) -> VideogameORM:
     new_videogame = VideogameORM(
         title=videogame_dto.title,
         description=videogame_dto.description,
@@ -57,56 +92,116 @@ def create(videogame_dto: VideogameCreate, db: Session = Depends(get_db)):
     )
     db.add(new_videogame)
     db.commit()
-    db.refresh(new_videogame)
+    db.refresh(new_videogame, ["reviews", "stats"])
     return new_videogame
 
 
-# ===========================
-# PUT FULL
-# ===========================
-@router.put("/{id}", response_model=VideogameResponse)
-def update_full(id: int, videogame_dto: VideogameUpdate, db: Session = Depends(get_db)):
-    videogame = db.execute(
-        select(VideogameORM).where(VideogameORM.id == id)
-    ).scalar_one_or_none()
-
-    if not videogame:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No existe el videojuego con el id {id}"
-        )
+def update_videogame(db: Session, request: Request, id: int, update_data: dict) -> FastJSONResponse:
+    videogame = get_videogame_or_404(db, id)
+    check_if_match(request, videogame_validators(videogame)[0])
 
-    update_data = videogame_dto.model_dump()
     for field, value in update_data.items():
         setattr(videogame, field, value)
 
-    db.commit()
+    commit_versioned(db)
     db.refresh(videogame)
-    return videogame
+    return FastJSONResponse(videogame_dict(videogame), headers=validator_headers(*videogame_validators(videogame)))
+
+
+def delete_videogame(db: Session, id: int):
+    db.delete(get_videogame_or_404(db, id))
+    db.commit()
 
 
 # ===========================
-# PATCH PARTIAL
+# GET ALL
 # ===========================
-@router.patch("/{id}", response_model=VideogameResponse)
-def update_partial(id: int, videogame_dto: VideogamePatch, db: Session = Depends(get_db)):
-    videogame = db.execute(
-        select(VideogameORM).where(VideogameORM.id == id)
-    ).scalar_one_or_none()
+@router.get("", response_model=Page[VideogameResponse])
+def find_all(
+    request: Request,
+    page: PageParams = Depends(),
+    stream: StreamParams = Depends(),
+    fields: Selection = Depends(videogame_fields),
+    db: Session = Depends(get_db)
+):
+    if stream.enabled:
+        stmt, encode = videogame_list_query(fields)
+        return stream_list(stmt, VideogameORM.id, page, stream, VideogameResponse, encode=encode)
 
-    if not videogame:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No existe el videojuego con el id {id}"
-        )
+    return videogame_page_response(db, request, page, fields)
 
-    update_data = videogame_dto.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(videogame, field, value)
 
-    db.commit()
-    db.refresh(videogame)
-    return videogame
+# ===========================
+# SEARCH (texto completo)
+# ===========================
+@router.get("/search", response_model=list[VideogameSearchResult])
+def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    return search_videogames(db, q, limit)
+
+
+# ===========================
+# TOP (mejor valorados o, con window, en tendencia)
+# ===========================
+@router.get("/top", response_model=list[RankedVideogame])
+def top(
+    genre: int | None = None,
+    developer: int | None = None,
+    window: str | None = Query(None, pattern="^(24h|7d|30d)$"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    # Sin base de datos: lee la clasificación ya calculada en memoria
+    return top_videogames(genre, developer, window, limit)
+
+
+# ===========================
+# GET BY ID
+# ===========================
+@router.get("/{id}", response_model=VideogameResponse)
+def find_by_id(id: int, request: Request, fields: Selection = Depends(videogame_fields), db: Session = Depends(get_db)):
+    # Las respuestas parciales no se cachean: cada combinación sería una entrada
+    if not fields.is_default:
+        return fields.response(get_videogame_or_404(db, id, fields.options()))
+
+    return cached_json(
+        f"videogame:{id}", [f"videogame:{id}"], VideogameResponse, lambda: get_videogame_or_404(db, id),
+        request=request, validators=videogame_validators
+    )
+
+
+# ===========================
+# SIMILARES (quien tiene este juego también tiene...)
+# ===========================
+@router.get("/{id}/similar", response_model=list[RecommendedVideogame])
+def similar(id: int, limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    return similar_videogames(db, id, limit)
+
+
+# ===========================
+# CREATE
+# ===========================
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=VideogameResponse)
+def create(videogame_dto: VideogameCreate, db: Session = Depends(get_db)):
+    return create_videogame(db, videogame_dto)
+
+
+# ===========================
+# PUT FULL
+# ===========================
+@router.put("/{id}", response_model=VideogameResponse)
+def update_full(id: int, videogame_dto: VideogameUpdate, request: Request, db: Session = Depends(get_db)):
+    return update_videogame(db, request, id, videogame_dto.model_dump())
+
+
+# ===========================
+# PATCH PARTIAL
+# ===========================
+@router.patch("/{id}", response_model=VideogameResponse)
+def update_partial(id: int, videogame_dto: VideogamePatch, request: Request, db: Session = Depends(get_db)):
+    return update_videogame(db, request, id, videogame_dto.model_dump(exclude_unset=True))
 
 
 # ===========================
@@ -114,16 +209,5 @@ def update_partial(id: int, videogame_dto: VideogamePatch, db: Session = Depends
 # ===========================
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete(id: int, db: Session = Depends(get_db)):
-    videogame = db.execute(
-        select(VideogameORM).where(VideogameORM.id == id)
-    ).scalar_one_or_none()
-
-    if not videogame:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No existe el videojuego con el id {id}"
-        )
-
-    db.delete(videogame)
-    db.commit()
+    delete_videogame(db, id)
     return None
@@ -0,0 +1,30 @@
+"""
+Routers de API REST asíncronos
+Mismos endpoints que app.routers.api pero con AsyncSession (aiosqlite);
+se usan en lugar de los síncronos cuando DB_ASYNC está activo.
+Solo declaran las rutas: la validación, las escrituras y las respuestas son
+las funciones de app.routers.api, llamadas con AsyncSession.run_sync
+"""
+
+from fastapi import APIRouter
+from app.routers.api_async import genres
+from app.routers.api_async import videogames
+from app.routers.api_async import users
+from app.routers.api_async import developers
+from app.routers.api_async import reviews
+from app.routers.api import cache
+from app.routers.api import bulk
+from app.routers.api import health
+
+
+# main router
+router = APIRouter()
+
+router.include_router(genres.router)
+router.include_router(videogames.router)
+router.include_router(users.router)
+router.include_router(developers.router)
+router.include_router(reviews.router)
+router.include_router(cache.router)
+router.include_router(bulk.router)
+router.include_router(health.router)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.ratelimit import RateLimit
+from app.routers.api.developers import create_dev, delete_dev, dev_page, get_dev_or_404, update_dev
+from app.schemas.developer import DevResponse, DevCreate, DevUpdate, DevPatch
+from app.schemas.pagination import Page
+from app.cache import cached_json_async
+from app.database import get_async_db
+from app.pagination import PageParams
+
+router = APIRouter(prefix="/api/developers", tags=["dev"], dependencies=[Depends(RateLimit("developers"))])
+
+
+@router.get("", response_model=Page[DevResponse])
+async def find_all(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await cached_json_async(f"developers:{page.limit}:{page.after}", ["developers"], Page[DevResponse], lambda: db.run_sync(dev_page, page))
+
+@router.get("/{id}", response_model=DevResponse)
+async def find_by_id(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await cached_json_async(f"developer:{id}", [f"developer:{id}"], DevResponse, lambda: db.run_sync(get_dev_or_404, id))
+
+@router.post("", response_model=DevResponse)
+async def create(dev_dto: DevCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(create_dev, dev_dto)
+
+@router.put("/{id}", response_model=DevResponse)
+async def update_full(id: int, dev_dto: DevUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_dev, id, dev_dto.model_dump())
+
+@router.patch("/{id}", response_model=DevResponse)
+async def update_partial(id: int, dev_dto: DevPatch, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_dev, id, dev_dto.model_dump(exclude_unset=True))
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete(id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(delete_dev, id)
+    return None
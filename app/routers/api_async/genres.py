@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.ratelimit import RateLimit
+from app.routers.api.genres import create_genre, delete_genre, genre_page, get_genre_or_404, update_genre
+from app.schemas.genre import GenreResponse, GenreCreate, GenreUpdate, GenrePatch
+from app.schemas.pagination import Page
+from app.cache import cached_json_async
+from app.database import get_async_db
+from app.pagination import PageParams
+
+router = APIRouter(prefix="/api/genres", tags=["genres"], dependencies=[Depends(RateLimit("genres"))])
+
+
+@router.get("", response_model=Page[GenreResponse])
+async def find_all(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await cached_json_async(f"genres:{page.limit}:{page.after}", ["genres"], Page[GenreResponse], lambda: db.run_sync(genre_page, page))
+
+@router.get("/{id}", response_model=GenreResponse)
+async def find_by_id(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await cached_json_async(f"genre:{id}", [f"genre:{id}"], GenreResponse, lambda: db.run_sync(get_genre_or_404, id))
+
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=GenreResponse)
+async def create(genre_dto: GenreCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(create_genre, genre_dto)
+
+@router.put("/{id}", response_model=GenreResponse)
+async def update_full(id: int, genre_dto: GenreUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_genre, id, genre_dto.model_dump())
+
+@router.patch("/{id}", response_model=GenreResponse)
+async def update_partial(id: int, genre_dto: GenrePatch, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_genre, id, genre_dto.model_dump(exclude_unset=True))
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete(id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(delete_genre, id)
+    return None
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models.review import ReviewORM
+from app.pagination import PageParams
+from app.ratelimit import RateLimit
+from app.routers.api.reviews import (
+    DUPLICATE_REVIEW_DETAIL, create_review_operation, delete_review, get_review_or_404, review_page_response, update_review
+)
+from app.schemas.pagination import Page
+from app.schemas.review import ReviewResponse, ReviewCreate, ReviewUpdate, ReviewPatch
+from app.streaming import StreamParams, stream_list_async
+from app.write_queue import write_review_async
+
+router = APIRouter(prefix="/api/reviews", tags=["reviews"], dependencies=[Depends(RateLimit("reviews"))])
+
+
+@router.get("", response_model=Page[ReviewResponse])
+async def find_all(page: PageParams = Depends(), stream: StreamParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    if stream.enabled:
+        return stream_list_async(select(ReviewORM), ReviewORM.id, page, stream, ReviewResponse)
+
+    return await db.run_sync(review_page_response, page)
+
+@router.get("/{id}", response_model=ReviewResponse)
+async def find_by_id(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(get_review_or_404, id)
+
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=ReviewResponse)
+async def create(review_dto: ReviewCreate, db: AsyncSession = Depends(get_async_db)):
+    return await write_review_async(db, create_review_operation(review_dto), DUPLICATE_REVIEW_DETAIL)
+
+@router.put("/{id}", response_model=ReviewResponse)
+async def update_full(id: int, review_dto: ReviewUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_review, id, review_dto.model_dump(), review_dto.user_id)
+
+@router.patch("/{id}", response_model=ReviewResponse)
+async def update_partial(id: int, review_dto: ReviewPatch, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_review, id, review_dto.model_dump(exclude_unset=True), review_dto.user_id)
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete(id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(delete_review, id, user_id)
+    return None
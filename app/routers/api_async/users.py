@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.fieldsets import Selection
+from app.models.user import UserORM
+from app.pagination import PageParams
+from app.ratelimit import RateLimit
+from app.recommendations import recommend_for_user
+from app.routers.api.users import (
+    add_user_game, create_user, delete_user, get_user_for_update, remove_user_game, save_user, user_fields,
+    user_games_response, user_library_response, user_list_query, user_page_response, user_response, user_update_data
+)
+from app.schemas.pagination import CountedPage, Page
+from app.security import hash_password
+from app.schemas.user import UserResponse, UserCreate, UserUpdate, UserPatch
+from app.schemas.videogame import RecommendedVideogame, VideogameResponse
+from app.streaming import StreamParams, stream_list_async
+
+router = APIRouter(prefix="/api/users", tags=["users"], dependencies=[Depends(RateLimit("users"))])
+
+
+@router.get("", response_model=Page[UserResponse])
+async def find_all(
+    page: PageParams = Depends(),
+    stream: StreamParams = Depends(),
+    fields: Selection = Depends(user_fields),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if stream.enabled:
+        stmt, transform, encode = user_list_query(fields)
+        return stream_list_async(stmt, UserORM.id, page, stream, UserResponse, transform=transform, encode=encode)
+
+    return await db.run_sync(user_page_response, page, fields)
+
+@router.get("/{id}", response_model=UserResponse)
+async def find_by_id(
+    id: int,
+    request: Request,
+    fields: Selection = Depends(user_fields),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(user_response, request, id, fields)
+
+# El hash es lento a propósito: se calcula en un hilo para no bloquear el bucle de eventos
+@router.post("", response_model=UserResponse)
+async def create(user_dto: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(create_user, user_dto, await run_in_threadpool(hash_password, user_dto.password))
+
+@router.put("/{id}", response_model=UserResponse)
+async def update_full(id: int, user_dto: UserUpdate, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = await db.run_sync(get_user_for_update, request, id)
+    new_data, password = user_update_data(user_dto)
+    new_data["password"] = await run_in_threadpool(hash_password, password)
+    return await db.run_sync(save_user, user, new_data)
+
+@router.patch("/{id}", response_model=UserResponse)
+async def update_partial(id: int, user_dto: UserPatch, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = await db.run_sync(get_user_for_update, request, id)
+    new_data, password = user_update_data(user_dto)
+    if password:
+        new_data["password"] = await run_in_threadpool(hash_password, password)
+    return await db.run_sync(save_user, user, new_data)
+
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete(id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(delete_user, id)
+    return None
+
+# ==================================================
+#        ENDPOINTS PARA BIBLIOTECA DE JUEGOS
+# ==================================================
+
+# Obtener todos los videojuegos que posee un usuario
+@router.get("/{id}/games", response_model=list[VideogameResponse])
+async def get_user_games(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(user_games_response, id)
+
+
+# Biblioteca paginada con el total de juegos
+@router.get("/{id}/library", response_model=CountedPage[VideogameResponse])
+async def get_user_library(id: int, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(user_library_response, id, page)
+
+
+# Juegos recomendados a partir de su biblioteca
+@router.get("/{id}/recommendations", response_model=list[RecommendedVideogame])
+async def get_user_recommendations(id: int, limit: int = Query(10, ge=1, le=50), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(recommend_for_user, id, limit)
+
+
+# Añadir un videojuego a la biblioteca del usuario
+@router.post("/{id}/games/{game_id}", status_code=201)
+async def add_game_to_user(id: int, game_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(add_user_game, id, game_id)
+
+
+# Eliminar un videojuego de la biblioteca del usuario
+@router.delete("/{id}/games/{game_id}", status_code=204)
+async def remove_game_from_user(id: int, game_id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(remove_user_game, id, game_id)
+    return None
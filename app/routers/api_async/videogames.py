@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import cached_json_async
+from app.database import get_async_db
+from app.etag import videogame_validators
+from app.fieldsets import Selection
+from app.models.videogame import VideogameORM
+from app.pagination import PageParams
+from app.leaderboards import top_videogames
+from app.ratelimit import RateLimit
+from app.recommendations import similar_videogames
+from app.routers.api.videogames import (
+    create_videogame, delete_videogame, get_videogame_or_404, update_videogame,
+    videogame_fields, videogame_list_query, videogame_page_response
+)
+from app.schemas.pagination import Page
+from app.schemas.videogame import VideogameResponse, VideogameCreate, VideogameUpdate, VideogamePatch, VideogameSearchResult, RankedVideogame, RecommendedVideogame
+from app.search import search_videogames
+from app.streaming import StreamParams, stream_list_async
+
+router = APIRouter(prefix="/api/videogames", tags=["videogames"], dependencies=[Depends(RateLimit("videogames"))])
+
+
+# ===========================
+# GET ALL
+# ===========================
+@router.get("", response_model=Page[VideogameResponse])
+async def find_all(
+    request: Request,
+    page: PageParams = Depends(),
+    stream: StreamParams = Depends(),
+    fields: Selection = Depends(videogame_fields),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if stream.enabled:
+        stmt, encode = videogame_list_query(fields)
+        return stream_list_async(stmt, VideogameORM.id, page, stream, VideogameResponse, encode=encode)
+
+    return await db.run_sync(videogame_page_response, request, page, fields)
+
+
+# ===========================
+# SEARCH (texto completo)
+# ===========================
+@router.get("/search", response_model=list[VideogameSearchResult])
+async def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(search_videogames, q, limit)
+
+
+# ===========================
+# TOP (mejor valorados o, con window, en tendencia)
+# ===========================
+@router.get("/top", response_model=list[RankedVideogame])
+async def top(
+    genre: int | None = None,
+    developer: int | None = None,
+    window: str | None = Query(None, pattern="^(24h|7d|30d)$"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    # Sin base de datos: lee la clasificación ya calculada en memoria
+    return top_videogames(genre, developer, window, limit)
+
+
+# ===========================
+# GET BY ID
+# ===========================
+@router.get("/{id}", response_model=VideogameResponse)
+async def find_by_id(id: int, request: Request, fields: Selection = Depends(videogame_fields), db: AsyncSession = Depends(get_async_db)):
+    if not fields.is_default:
+        return fields.response(await db.run_sync(get_videogame_or_404, id, fields.options()))
+
+    return await cached_json_async(
+        f"videogame:{id}", [f"videogame:{id}"], VideogameResponse, lambda: db.run_sync(get_videogame_or_404, id),
+        request=request, validators=videogame_validators
+    )
+
+
+# ===========================
+# SIMILARES (quien tiene este juego también tiene...)
+# ===========================
+@router.get("/{id}/similar", response_model=list[RecommendedVideogame])
+async def similar(id: int, limit: int = Query(10, ge=1, le=50), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(similar_videogames, id, limit)
+
+
+# ===========================
+# CREATE
+# ===========================
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=VideogameResponse)
+async def create(videogame_dto: VideogameCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(create_videogame, videogame_dto)
+
+
+# ===========================
+# PUT FULL
+# ===========================
+@router.put("/{id}", response_model=VideogameResponse)
+async def update_full(id: int, videogame_dto: VideogameUpdate, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_videogame, request, id, videogame_dto.model_dump())
+
+
+# ===========================
+# PATCH PARTIAL
+# ===========================
+@router.patch("/{id}", response_model=VideogameResponse)
+async def update_partial(id: int, videogame_dto: VideogamePatch, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(update_videogame, request, id, videogame_dto.model_dump(exclude_unset=True))
+
+
+# ===========================
+# DELETE
+# ===========================
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete(id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(delete_videogame, id)
+    return None
@@ -13,6 +13,8 @@ from app.routers.web import developers
 from app.routers.web import admin
 from app.routers.web import user_game
 from app.routers.web import reviews
+from app.routers.web import auth
+from app.routers.web import media
 
 # main router
 router = APIRouter()
@@ -25,4 +27,6 @@ router.include_router(videogames.router)
 router.include_router(developers.router)
 router.include_router(admin.router)
 router.include_router(user_game.router)
-router.include_router(reviews.router)
\ No newline at end of file
+router.include_router(reviews.router)
+router.include_router(auth.router)
+router.include_router(media.router)
\ No newline at end of file
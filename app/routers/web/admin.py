@@ -1,10 +1,7 @@
 
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-
-# Configura la carpeta de plantillas
-templates = Jinja2Templates(directory="app/templates")
+from app.templating import templates
 
 # Crea el router con el prefijo /admin
 router = APIRouter(prefix="/admin", tags=["admin"])
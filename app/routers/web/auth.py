@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Form, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.auth import SessionUser, authenticate, current_user, end_session, safe_next, start_session
+from app.database import get_db
+from app.ratelimit import RateLimit
+from app.templating import templates
+
+router = APIRouter(prefix="", tags=["web-auth"])
+
+# Contra la prueba masiva de contraseñas: 5 intentos seguidos y luego uno cada 10 s
+login_limit = RateLimit("login", rate=0.1, burst=5)
+
+
+# ========================
+# FORMULARIO DE INICIO DE SESIÓN
+# ========================
+@router.get("/login", response_class=HTMLResponse)
+def show_login(request: Request, next: str | None = None, user: SessionUser | None = Depends(current_user)):
+    return templates.TemplateResponse(
+        "auth/login.html",
+        {"request": request, "user": user, "next": safe_next(next), "errors": None, "form_data": None}
+    )
+
+
+# ========================
+# INICIAR SESIÓN
+# ========================
+# Endpoint síncrono: FastAPI lo ejecuta en el pool de hilos, así el hash lento
+# de la contraseña no bloquea el bucle de eventos
+@router.post("/login", response_class=HTMLResponse, dependencies=[Depends(login_limit)])
+def login(
+    request: Request,
+    login: str = Form(...),
+    password: str = Form(...),
+    next: str = Form("/"),
+    db: Session = Depends(get_db)
+):
+    user = authenticate(db, login.strip(), password)
+
+    if user is None:
+        return templates.TemplateResponse(
+            "auth/login.html",
+            {
+                "request": request,
+                "user": None,
+                "next": safe_next(next),
+                "errors": ["Usuario o contraseña incorrectos"],
+                "form_data": {"login": login}
+            },
+            status_code=401
+        )
+
+    response = RedirectResponse(url=safe_next(next), status_code=303)
+    start_session(response, user)
+    return response
+
+
+# ========================
+# CERRAR SESIÓN
+# ========================
+@router.post("/logout")
+def logout():
+    response = RedirectResponse(url="/", status_code=303)
+    end_session(response)
+    return response
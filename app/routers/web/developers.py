@@ -1,15 +1,13 @@
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.developer import DevORM
 from app.models.videogame import VideogameORM
+from app.templating import templates
 
 
-templates = Jinja2Templates(directory="app/templates")
-
 # Creación del router con prefijo /developers
 router = APIRouter(prefix="/developers", tags=["web-developers"])
 
@@ -2,15 +2,12 @@
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.genre import GenreORM
 from app.models.videogame import VideogameORM
-
-
-templates = Jinja2Templates(directory="app/templates")
+from app.templating import templates
 
 router = APIRouter(prefix="/genres", tags=["web"])
 
@@ -1,26 +1,24 @@
-
-from fastapi import APIRouter, Depends, Request
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.database import get_db
-from app.models.genre import GenreORM
-from app.models.videogame import VideogameORM
-
-templates = Jinja2Templates(directory="app/templates")
+from app.cache import cached_html
+from app.home_snapshot import home_snapshot
+from app.templating import templates
 
 router = APIRouter(prefix="", tags=["web"])
 
 
 @router.get("/", response_class=HTMLResponse)
-def home(request: Request, db: Session = Depends(get_db)):
-    videogame = db.execute(select(VideogameORM)).scalars().all()
-    last_videogame = db.execute(select(VideogameORM).order_by(VideogameORM.id.desc()).limit(5)).scalars().all()    
-    games_action = db.execute(select(VideogameORM).join(VideogameORM.genre).where(GenreORM.name == "Acción").limit(3)).scalars().all()
-    games_aventure = db.execute(select(VideogameORM).join(VideogameORM.genre).where(GenreORM.name == "Aventura").limit(3)).scalars().all()
-    
-    return templates.TemplateResponse(
-        "home.html",
-        {"request": request, "videogame": videogame, "last_videogame": last_videogame, "games_action": games_action, "games_aventure": games_aventure}
-    )
+def home(request: Request):
+    # Los datos salen de la instantánea precalculada: ninguna consulta por visita
+    snapshot = home_snapshot.get()
+
+    # La página no depende del usuario: se cachea el HTML ya renderizado de cada versión
+    def produce():
+        return templates.get_template("home.html").render({
+            "request": request,
+            "last_videogame": snapshot.latest,
+            "games_action": snapshot.featured["Acción"],
+            "games_aventure": snapshot.featured["Aventura"]
+        })
+
+    return cached_html(f"home:{snapshot.version}", ["home"], produce)
@@ -0,0 +1,36 @@
+import logging
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import RedirectResponse
+
+from app.images import MEDIA_PREFIX, PROXY_PREFIX, ImageError, image_store
+from app.security import unsign
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix=PROXY_PREFIX, tags=["web-media"])
+
+
+# ========================
+# IMAGEN AÚN NO DESCARGADA
+# ========================
+# Endpoint síncrono: la descarga y las miniaturas se hacen en el pool de hilos
+@router.get("/{width}/{token}")
+def proxy_image(width: int, token: str):
+    data = unsign(token)
+    if data is None or not isinstance(data.get("u"), str):
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+
+    source = data["u"]
+    try:
+        stored = image_store.ingest(source)
+    except ImageError as error:
+        logger.warning("No se pudo preparar la imagen %s: %s", source, error)
+        # Mejor la imagen original que ninguna
+        return RedirectResponse(url=source, status_code=302, headers={"Cache-Control": "no-cache"})
+
+    return RedirectResponse(
+        url=f"{MEDIA_PREFIX}/{image_store.variant(stored, width)}",
+        status_code=302,
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
@@ -3,14 +3,15 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.auth import SessionUser, require_user
 from app.database import get_db
 from app.models.review import ReviewORM
-from app.models.user import UserORM
 from app.models.videogame import VideogameORM
+from app.ratelimit import RateLimit
+from app.rating_stats import add_rating, change_rating, remove_rating
+from app.write_queue import write_review
 
-router = APIRouter(prefix="/videogame", tags=["web-reviews"])
-
-USER_ID = 2  # usuario fijo por defecto
+router = APIRouter(prefix="/videogame", tags=["web-reviews"], dependencies=[Depends(RateLimit("reviews"))])
 
 # ========================
 # CREAR RESEÑA
@@ -21,34 +22,38 @@ def create_review(
     request: Request,
     rating: float = Form(...),
     comment: str = Form(None),
+    user: SessionUser = Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    user = db.get(UserORM, USER_ID)
     game = db.get(VideogameORM, game_id)
 
-    if not user or not game:
-        raise HTTPException(status_code=404, detail="Usuario o juego no encontrado")
-
-    # Evitar duplicados: un usuario, una reseña por juego
-    existing_review = db.execute(
-        select(ReviewORM).where(
-            ReviewORM.user_id == user.id,
-            ReviewORM.videogame_id == game.id
+    if not game:
+        raise HTTPException(status_code=404, detail="Juego no encontrado")
+
+    # Las escrituras no hacen commit aquí: write_review las confirma (o las agrupa)
+    def write(db: Session):
+        # Evitar duplicados: un usuario, una reseña por juego
+        existing_review = db.execute(
+            select(ReviewORM).where(
+                ReviewORM.user_id == user.id,
+                ReviewORM.videogame_id == game_id
+            )
+        ).scalar_one_or_none()
+
+        if existing_review:
+            # Ya existe reseña, no se puede crear otra
+            return
+
+        new_review = ReviewORM(
+            rating=rating,
+            comment=comment,
+            user_id=user.id,
+            videogame_id=game_id
         )
-    ).scalar_one_or_none()
-
-    if existing_review:
-        # Ya existe reseña, no se puede crear otra
-        return RedirectResponse(f"/videogame/{game_id}", status_code=303)
-
-    new_review = ReviewORM(
-        rating=rating,
-        comment=comment,
-        user_id=user.id,
-        videogame_id=game.id
-    )
-    db.add(new_review)
-    db.commit()
+        db.add(new_review)
+        add_rating(db, new_review.videogame_id, new_review.rating)
+
+    write_review(db, write)
     return RedirectResponse(f"/videogame/{game_id}", status_code=303)
 
 
@@ -61,26 +66,27 @@ def edit_review(
     request: Request,
     rating: float = Form(...),
     comment: str = Form(None),
+    user: SessionUser = Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    user = db.get(UserORM, USER_ID)
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-    review = db.execute(
-        select(ReviewORM).where(
-            ReviewORM.user_id == user.id,
-            ReviewORM.videogame_id == game_id
-        )
-    ).scalar_one_or_none()
-
-    if not review:
-        # No hay reseña que editar
-        return RedirectResponse(f"/videogame/{game_id}", status_code=303)
-
-    review.rating = rating
-    review.comment = comment
-    db.commit()
+    def write(db: Session):
+        review = db.execute(
+            select(ReviewORM).where(
+                ReviewORM.user_id == user.id,
+                ReviewORM.videogame_id == game_id
+            )
+        ).scalar_one_or_none()
+
+        if not review:
+            # No hay reseña que editar
+            return
+
+        old_rating = review.rating
+        review.rating = rating
+        review.comment = comment
+        change_rating(db, review.videogame_id, old_rating, review.videogame_id, review.rating)
+
+    write_review(db, write)
     return RedirectResponse(f"/videogame/{game_id}", status_code=303)
 
 
@@ -91,21 +97,20 @@ def edit_review(
 def delete_review(
     game_id: int,
     request: Request,
+    user: SessionUser = Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    user = db.get(UserORM, USER_ID)
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-    review = db.execute(
-        select(ReviewORM).where(
-            ReviewORM.user_id == user.id,
-            ReviewORM.videogame_id == game_id
-        )
-    ).scalar_one_or_none()
-
-    if review:
-        db.delete(review)
-        db.commit()
-
+    def write(db: Session):
+        review = db.execute(
+            select(ReviewORM).where(
+                ReviewORM.user_id == user.id,
+                ReviewORM.videogame_id == game_id
+            )
+        ).scalar_one_or_none()
+
+        if review:
+            db.delete(review)
+            remove_rating(db, review.videogame_id, review.rating)
+
+    write_review(db, write)
     return RedirectResponse(f"/videogame/{game_id}", status_code=303)
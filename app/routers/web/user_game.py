@@ -1,25 +1,30 @@
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.auth import SessionUser, require_user
+from app.database import get_db, utcnow
+from app.library import add_to_library, owns_game
 from app.models.genre import GenreORM
 from app.models.user import UserORM
 from app.models.videogame import VideogameORM
+from app.templating import templates
 
 router = APIRouter(prefix="/videogame", tags=["web"])
 
-templates = Jinja2Templates(directory="app/templates")
 
 @router.post("/{user_id}/{videogame_id}/download", response_class=HTMLResponse)
 def download_videogame(
     request: Request,
     user_id: int,
     videogame_id: int,
+    session_user: SessionUser = Depends(require_user),
     db: Session = Depends(get_db)
 ):
+    # Solo se puede modificar la biblioteca propia
+    if session_user.id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No puedes modificar la biblioteca de otro usuario")
 
     errors = []
 
@@ -39,7 +44,7 @@ def download_videogame(
         )
 
     # Evita agregarlo si ya lo descargó
-    if game in user.videogames:
+    if owns_game(db, user.id, game.id):
         return templates.TemplateResponse(
             "videogame/detail.html",
             {
@@ -50,7 +55,8 @@ def download_videogame(
         )
     
     # Aquí se crea la relación en user_game ⬇⬇⬇
-    user.videogames.append(game)
+    add_to_library(db, user.id, game.id)
+    user.updated_at = utcnow()
     db.commit()
 
     return templates.TemplateResponse(
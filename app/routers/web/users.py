@@ -2,14 +2,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import UserORM
-
-
-templates = Jinja2Templates(directory="app/templates")
+from app.templating import templates
 
 router = APIRouter(prefix="/users", tags=["web"])
 
@@ -1,31 +1,35 @@
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
 from sqlalchemy.orm import Session, selectinload
 
-from app.database import get_db
+from app.auth import SessionUser, current_user, require_user
+from app.database import get_db, utcnow
+from app.library import add_to_library, library_page, owns_game, remove_from_library
 from app.models.genre import GenreORM
 from app.models.user import UserORM
 from app.models.videogame import VideogameORM
 from app.models.review import ReviewORM
+from app.pagination import PageParams
+from app.templating import templates
 
-templates = Jinja2Templates(directory="app/templates/")
 router = APIRouter(prefix="/videogame", tags=["web"])
 
 # ========================
-# LISTADO DE LA BIBLIOTECA DEL USUARIO POR DEFECTO
+# LISTADO DE LA BIBLIOTECA DEL USUARIO CONECTADO
 # ========================
 @router.get("/library", response_class=HTMLResponse)
-def list_user_games(request: Request, db: Session = Depends(get_db)):
-    USER_ID = 2
-    user = db.get(UserORM, USER_ID)
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuario por defecto no encontrado")
-    games = user.videogames
+def list_user_games(
+    request: Request,
+    page: PageParams = Depends(),
+    user: SessionUser = Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    # La biblioteca se pagina: no se carga entera aunque el usuario tenga miles de juegos
+    games, next_cursor, total = library_page(db, user.id, page)
     return templates.TemplateResponse(
         "videogame/list.html",
-        {"request": request, "games": games}
+        {"request": request, "games": games, "next_cursor": next_cursor, "total": total}
     )
 
 # ========================
@@ -82,7 +86,12 @@ def create(
 # DETALLE DEL VIDEOJUEGO
 # ========================
 @router.get("/{game_id}", response_class=HTMLResponse)
-def game_detail(game_id: int, request: Request, db: Session = Depends(get_db)):
+def game_detail(
+    game_id: int,
+    request: Request,
+    user: SessionUser | None = Depends(current_user),
+    db: Session = Depends(get_db)
+):
     stmt = select(VideogameORM).where(VideogameORM.id == game_id).options(
         selectinload(VideogameORM.reviews).selectinload(ReviewORM.user)
     )
@@ -91,10 +100,8 @@ def game_detail(game_id: int, request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail=f"No existe ningún videojuego con id {game_id}")
 
     genre = db.get(GenreORM, videogame.genre_id) if videogame.genre_id else None
-    USER_ID = 2
-    user = db.get(UserORM, USER_ID)
 
-    has_game = user and videogame in user.videogames
+    has_game = user is not None and owns_game(db, user.id, videogame.id)
     user_review = None
     if user:
         user_review = next((r for r in videogame.reviews if r.user_id == user.id), None)
@@ -160,26 +167,33 @@ def edit_videogame(
 # DESCARGAR / DESINSTALAR VIDEOJUEGO
 # ========================
 @router.post("/{game_id}/download", response_class=HTMLResponse)
-def toggle_download(game_id: int, request: Request, db: Session = Depends(get_db)):
-    USER_ID = 2
-    user = db.get(UserORM, USER_ID)
+def toggle_download(
+    game_id: int,
+    request: Request,
+    user: SessionUser = Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    # La biblioteca cambia la versión del usuario: aquí sí hace falta cargarlo
+    owner = db.get(UserORM, user.id)
     game = db.get(VideogameORM, game_id)
-    if not user or not game:
+    if not owner or not game:
         raise HTTPException(status_code=404, detail="Usuario o videojuego no encontrado")
 
     message = ""
-    if game in user.videogames:
-        user.videogames.remove(game)
+    has_game = owns_game(db, user.id, game.id)
+    if has_game:
+        remove_from_library(db, user.id, game.id)
         message = "Videojuego desinstalado correctamente"
     else:
-        user.videogames.append(game)
+        add_to_library(db, user.id, game.id)
         message = "Videojuego descargado correctamente"
+    has_game = not has_game
+    owner.updated_at = utcnow()
     db.commit()
 
     genre = db.get(GenreORM, game.genre_id)
     # Comprobamos si el usuario ya tiene reseña
     user_review = next((r for r in game.reviews if r.user_id == user.id), None)
-    has_game = game in user.videogames
     return templates.TemplateResponse(
         "videogame/detail.html",
         {
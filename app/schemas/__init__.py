@@ -6,7 +6,9 @@ from app.schemas.videogame import (
     VideogameResponse,
     VideogameCreate,
     VideogameUpdate,
-    VideogamePatch
+    VideogamePatch,
+    RatingStatsResponse,
+    VideogameSearchResult
 )
 
 from app.schemas.genre import (
@@ -37,4 +39,4 @@ from app.schemas.review import(
     ReviewPatch
 )
 
-__all__ = ["VideogameResponse", "VideogameCreate", "VideogameUpdate", "VideogamePatch", "GenreResponse", "GenreCreate", "GenreUpdate", "GenrePatch", "UserResponse", "UserCreate", "UserUpdate", "UserPatch", "DevResponse", "DevCreate", "DevUpdate", "DevPatch", "ReviewResponse", "ReviewCreate", "ReviewUpdate", "ReviewPatch"]
\ No newline at end of file
+__all__ = ["VideogameResponse", "VideogameCreate", "VideogameUpdate", "VideogamePatch", "RatingStatsResponse", "VideogameSearchResult", "GenreResponse", "GenreCreate", "GenreUpdate", "GenrePatch", "UserResponse", "UserCreate", "UserUpdate", "UserPatch", "DevResponse", "DevCreate", "DevUpdate", "DevPatch", "ReviewResponse", "ReviewCreate", "ReviewUpdate", "ReviewPatch"]
\ No newline at end of file
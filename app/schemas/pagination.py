@@ -0,0 +1,21 @@
+"""
+Esquemas Pydantic para respuestas paginadas
+"""
+
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+# Página de resultados con cursor opaco para pedir la siguiente
+# next_cursor es None cuando no quedan más elementos
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+# Página que además lleva el total de elementos (p. ej. la biblioteca de un usuario)
+class CountedPage(Page[T], Generic[T]):
+    total: int
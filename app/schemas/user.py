@@ -43,10 +43,10 @@ class UserCreate(BaseModel):
     @classmethod
     def validate_string_empty(cls, v: str) -> str:
         if len(v) < 8:
-            return ValueError("La contraseña tiene que tener mínimo 8 carácteres")
+            raise ValueError("La contraseña tiene que tener mínimo 8 carácteres")
         
         if " " in v:
-            return ValueError("La contraseña no puede contener espacios")
+            raise ValueError("La contraseña no puede contener espacios")
         
         return v
     
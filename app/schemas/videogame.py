@@ -8,6 +8,17 @@ from app.schemas.review import ReviewResponse
 
 
 
+# Estadísticas de valoración agregadas (GET)
+class RatingStatsResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    review_count: int
+    average: float | None
+    stddev: float | None
+    rating_min: float | None
+    rating_max: float | None
+    histogram: list[int]
+
+
 # Modelo de respuesta (GET)
 class VideogameResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -18,7 +29,37 @@ class VideogameResponse(BaseModel):
     genre_id: int | None
     developer_id: int | None
     reviews: list[ReviewResponse] = []
-   
+    stats: RatingStatsResponse | None = None
+
+# Resultado de búsqueda de texto completo (GET /search)
+# title_highlight y snippet son HTML seguro: texto escapado con las
+# coincidencias entre <mark></mark>, se pueden insertar tal cual
+class VideogameSearchResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    title: str
+    cover_url: str | None
+    title_highlight: str
+    snippet: str | None
+    rank: float
+
+# Videojuego recomendado (GET /similar y /recommendations)
+# score: similitud coseno con el juego, o suma de similitudes con la biblioteca
+class RecommendedVideogame(BaseModel):
+    id: int
+    title: str
+    cover_url: str | None
+    score: float
+
+# Puesto en una clasificación (GET /top)
+# score: media bayesiana o altas en la ventana; count: reviews o altas
+class RankedVideogame(BaseModel):
+    id: int
+    title: str
+    cover_url: str | None
+    score: float
+    count: int
+
 # Modelo para crear videojuegos (POST)
 class VideogameCreate(BaseModel):
     title: str
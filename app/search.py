@@ -0,0 +1,137 @@
+"""
+Búsqueda de texto completo sobre título y descripción de los videojuegos
+
+Usa un índice FTS5 de SQLite de contenido externo (la tabla videogames) que
+se mantiene sincronizado mediante triggers, así cualquier alta, edición o
+baja de un videojuego actualiza el índice en la misma transacción.
+"""
+
+import html
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# remove_diacritics 2: "accion" encuentra "Acción"
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS videogames_fts USING fts5(
+        title,
+        description,
+        content='videogames',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videogames_fts_ai AFTER INSERT ON videogames BEGIN
+        INSERT INTO videogames_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videogames_fts_ad AFTER DELETE ON videogames BEGIN
+        INSERT INTO videogames_fts(videogames_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videogames_fts_au AFTER UPDATE OF title, description ON videogames BEGIN
+        INSERT INTO videogames_fts(videogames_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO videogames_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# Peso de cada columna en bm25: el título cuenta más que la descripción
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# FTS5 marca las coincidencias con estos caracteres de control (no aparecen
+# en títulos ni descripciones); se cambian por <mark> después de escapar
+MARK_OPEN = "\x02"
+MARK_CLOSE = "\x03"
+
+
+# -------------------------
+# Crear el índice
+# -------------------------
+def create_search_index(db: Session):
+    """Crea la tabla FTS5 y sus triggers; si la tabla es nueva, indexa los juegos existentes."""
+    exists = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videogames_fts'")
+    ).first()
+
+    for statement in SEARCH_INDEX_DDL:
+        db.execute(text(statement))
+
+    if not exists:
+        rebuild_search_index(db)
+
+
+def rebuild_search_index(db: Session):
+    db.execute(text("INSERT INTO videogames_fts(videogames_fts) VALUES ('rebuild')"))
+
+
+# -------------------------
+# Construir la consulta MATCH
+# -------------------------
+def build_match_query(q: str) -> str | None:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    va entre comillas (sin operadores) y la última admite prefijo para
+    poder buscar mientras se escribe.
+    """
+    tokens = TOKEN_PATTERN.findall(q)
+    if not tokens:
+        return None
+
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+# -------------------------
+# Buscar
+# -------------------------
+def search_videogames(db: Session, q: str, limit: int) -> list:
+    match = build_match_query(q)
+    if match is None:
+        return []
+
+    stmt = text(f"""
+        SELECT v.id,
+               v.title,
+               v.cover_url,
+               highlight(videogames_fts, 0, :mark_open, :mark_close) AS title_highlight,
+               snippet(videogames_fts, 1, :mark_open, :mark_close, '…', 16) AS snippet,
+               bm25(videogames_fts, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank
+        FROM videogames_fts
+        JOIN videogames v ON v.id = videogames_fts.rowid
+        WHERE videogames_fts MATCH :match
+        ORDER BY rank
+        LIMIT :limit
+    """)
+
+    params = {"match": match, "limit": limit, "mark_open": MARK_OPEN, "mark_close": MARK_CLOSE}
+    rows = db.execute(stmt, params).mappings().all()
+    return [
+        {**row, "title_highlight": mark_html(row["title_highlight"]), "snippet": mark_html(row["snippet"])}
+        for row in rows
+    ]
+
+
+def mark_html(fragment: str | None) -> str | None:
+    """
+    Escapa el texto de highlight()/snippet() y solo después pone las etiquetas
+    <mark>: el resultado es HTML seguro aunque el título o la descripción
+    contengan etiquetas.
+    """
+    if fragment is None:
+        return None
+    escaped = html.escape(fragment)
+    return escaped.replace(MARK_OPEN, "<mark>").replace(MARK_CLOSE, "</mark>")
@@ -0,0 +1,126 @@
+"""
+Contraseñas con hash lento y firma de las cookies de sesión
+
+Las contraseñas se guardan con scrypt (hashlib, sin dependencias externas) en
+el formato "scrypt$n$r$p$sal$hash". Calcular un hash cuesta decenas de
+milisegundos a propósito: desde código async hay que llamarlo en un hilo
+(run_in_threadpool) para no bloquear el bucle de eventos.
+
+Las cookies de sesión son "datos.firma" con HMAC-SHA256 sobre SESSION_SECRET:
+el cliente puede leerlas pero no modificarlas sin invalidar la firma.
+
+Variables de entorno:
+- SESSION_SECRET: clave de firma. Obligatoria con DB_PROFILE=production o con
+  más de un worker (WEB_CONCURRENCY): sin ella la aplicación no arranca. Solo
+  en desarrollo se genera una al arrancar (con un aviso en el log); esas
+  sesiones no sobreviven a un reinicio ni se comparten entre workers
+- PASSWORD_HASH_COST: log2 del parámetro n de scrypt (por defecto 14)
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+
+from app.database import DB_PROFILE
+
+logger = logging.getLogger(__name__)
+
+SESSION_SECRET_CONFIGURED = bool(os.getenv("SESSION_SECRET"))
+SESSION_SECRET = os.getenv("SESSION_SECRET") or secrets.token_hex(32)
+PASSWORD_HASH_COST = int(os.getenv("PASSWORD_HASH_COST", "14"))
+
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def check_session_secret():
+    """
+    Se llama al arrancar (lifespan). Una clave aleatoria distinta en cada worker
+    o en cada reinicio invalida las sesiones al azar: fuera de desarrollo es un error.
+    """
+    if SESSION_SECRET_CONFIGURED:
+        return
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if DB_PROFILE != "development" or workers > 1:
+        raise RuntimeError(
+            f"Falta SESSION_SECRET (DB_PROFILE={DB_PROFILE}, WEB_CONCURRENCY={workers}); "
+            "defínela con la misma clave en todos los workers"
+        )
+    logger.warning("SESSION_SECRET no está definida: se usa una clave aleatoria y las sesiones no sobreviven a un reinicio")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+# -------------------------
+# Contraseñas
+# -------------------------
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # maxmem: el valor por defecto de OpenSSL (32 MiB) se queda corto a partir de n=2**15
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES, maxmem=256 * 1024 * 1024)
+
+
+def hash_password(password: str) -> str:
+    n = 2 ** PASSWORD_HASH_COST
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = _scrypt(password, salt, n, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def is_password_hash(value: str | None) -> bool:
+    return bool(value) and value.startswith("scrypt$")
+
+
+def verify_password(password: str, stored: str | None) -> bool:
+    if not is_password_hash(stored):
+        return False
+
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        expected = _b64decode(digest)
+        actual = _scrypt(password, _b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+
+    return hmac.compare_digest(actual, expected)
+
+
+# -------------------------
+# Cookies firmadas
+# -------------------------
+def _signature(payload: str) -> str:
+    return _b64encode(hmac.new(SESSION_SECRET.encode(), payload.encode(), hashlib.sha256).digest())
+
+
+def sign(data: dict, max_age: int) -> str:
+    """Serializa data con fecha de caducidad y lo firma."""
+    payload = _b64encode(json.dumps({**data, "exp": int(time.time()) + max_age}, separators=(",", ":")).encode())
+    return f"{payload}.{_signature(payload)}"
+
+
+def unsign(value: str) -> dict | None:
+    """Devuelve los datos si la firma es válida y no han caducado; si no, None."""
+    payload, _, signature = value.partition(".")
+    if not signature or not hmac.compare_digest(signature, _signature(payload)):
+        return None
+
+    try:
+        data = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict) or data.get("exp", 0) < time.time():
+        return None
+    return data
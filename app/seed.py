@@ -0,0 +1,21 @@
+"""
+Carga los datos de ejemplo en la base de datos
+
+    python -m app.seed
+
+Crea las tablas y aplica las migraciones si hace falta y, si la base de datos
+está vacía, añade los géneros, desarrolladoras, videojuegos, usuarios y
+reviews de ejemplo. Se puede repetir sin duplicar nada y ejecutar mientras la
+aplicación arranca (usa el mismo bloqueo que el lifespan).
+"""
+
+import logging
+
+from app.database import DATABASE_URL, engine
+from app.startup import prepare_database
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    prepare_database(seed=True)
+    engine.dispose()
+    print(f"Datos de ejemplo listos en {DATABASE_URL}")
@@ -0,0 +1,129 @@
+"""
+Serialización rápida de las respuestas JSON de la API
+
+Con response_model, FastAPI vuelve a validar cada objeto ORM con Pydantic
+(from_attributes), lo convierte a tipos JSON con jsonable_encoder y lo
+codifica con el json de la biblioteca estándar. Para los listados grandes ese
+segundo paso cuesta más que la consulta.
+
+Los objetos que salen de la base de datos ya cumplen el esquema (se validaron
+al entrar), así que aquí se confía en ellos:
+
+- videogame_dict, review_dict, stats_dict y user_dict pasan el objeto ORM a
+  un dict con los mismos campos que VideogameResponse, ReviewResponse,
+  RatingStatsResponse y UserResponse, sin Pydantic.
+- FastJSONResponse codifica ese contenido con orjson (con json si no está
+  instalado). Es opcional: solo la usan las rutas que la devuelven
+  explícitamente; el resto sigue pasando por response_model, que se mantiene
+  en los decoradores para la documentación de OpenAPI.
+- serialize() (caché y streaming) usa estos serializadores cuando el
+  response_model y el objeto ORM coinciden con uno de ellos.
+
+El JSON resultante es idéntico al de response_model (ver benchmarks/serialization.py).
+
+orjson es una dependencia opcional.
+"""
+
+import json
+
+from fastapi.responses import JSONResponse
+
+from app.models.review import ReviewORM
+from app.models.videogame import VideogameORM
+from app.schemas.review import ReviewResponse
+from app.schemas.videogame import VideogameResponse
+
+try:
+    import orjson
+except ImportError:  # opcional: sin él se usa json
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """JSON compacto en UTF-8, igual que el de Pydantic."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse para contenido que ya son tipos JSON (dicts de los serializadores de abajo)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# -------------------------
+# Serializadores de confianza (ORM -> dict)
+# -------------------------
+def review_dict(review: ReviewORM) -> dict:
+    return {
+        "id": review.id,
+        "user_id": review.user_id,
+        "videogame_id": review.videogame_id,
+        "rating": float(review.rating),
+        "comment": review.comment,
+    }
+
+
+def stats_dict(stats) -> dict | None:
+    if stats is None:
+        return None
+    return {
+        "review_count": stats.review_count,
+        "average": stats.average,
+        "stddev": stats.stddev,
+        "rating_min": stats.rating_min,
+        "rating_max": stats.rating_max,
+        "histogram": stats.histogram,
+    }
+
+
+def videogame_dict(videogame, reviews: list[dict] | None = None, stats=None) -> dict:
+    """
+    Igual que VideogameResponse. Sirve también para filas con las columnas del
+    juego: en ese caso reviews (ya en dicts) y stats se pasan aparte.
+    """
+    if reviews is None:
+        reviews = [review_dict(review) for review in videogame.reviews]
+        stats = videogame.stats
+    return {
+        "id": videogame.id,
+        "title": videogame.title,
+        "description": videogame.description,
+        "cover_url": videogame.cover_url,
+        "genre_id": videogame.genre_id,
+        "developer_id": videogame.developer_id,
+        "reviews": reviews,
+        "stats": stats_dict(stats),
+    }
+
+
+def user_dict(user, videogames: list[dict]) -> dict:
+    """Igual que UserResponse (sin contraseña), con la biblioteca ya serializada."""
+    return {
+        "id": user.id,
+        "nick": user.nick,
+        "email": user.email,
+        "nif": user.nif,
+        "videogames": videogames,
+    }
+
+
+def page_dict(items: list[dict], next_cursor: str | None) -> dict:
+    return {"items": items, "next_cursor": next_cursor}
+
+
+# response_model -> (clase ORM de confianza, serializador)
+TRUSTED = {
+    VideogameResponse: (VideogameORM, videogame_dict),
+    ReviewResponse: (ReviewORM, review_dict),
+}
+
+
+def trusted_dict(response_model, obj) -> dict | None:
+    """El dict de obj si hay un serializador de confianza para ese response_model; si no, None."""
+    entry = TRUSTED.get(response_model)
+    if entry is None or not isinstance(obj, entry[0]):
+        return None
+    return entry[1](obj)
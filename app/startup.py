@@ -0,0 +1,123 @@
+"""
+Arranque y parada de la aplicación (lifespan)
+
+Importar app.main ya no toca la base de datos. El trabajo de arranque se hace
+en el lifespan, antes de aceptar peticiones:
+
+- Comprobar la configuración (SESSION_SECRET, ver app/security.py).
+- Crear las tablas que falten y aplicar las migraciones pendientes (rápido si
+  ya están aplicadas).
+- Generar los ficheros estáticos con huella (app.assets).
+- Arrancar los hilos que calculan las clasificaciones y el modelo de
+  recomendaciones (no se espera a que terminen: app.leaderboards y
+  app.recommendations responden 503 hasta entonces).
+
+Los datos de ejemplo no se cargan al arrancar: se cargan con `python -m app.seed`
+(main.py lo hace una vez antes de lanzar uvicorn, no en cada recarga) o con
+DB_SEED_ON_STARTUP=1.
+
+Con varios workers cada uno ejecuta el lifespan, pero el esquema, las
+migraciones y la semilla se hacen dentro de un bloqueo entre procesos (una
+transacción exclusiva en el fichero <base de datos>.lock): el primero hace el
+trabajo y los demás esperan y después solo comprueban que ya está hecho.
+
+Al parar se cierran las conexiones de los motores.
+
+/api/health/ready indica si el proceso puede recibir tráfico (ver
+app/routers/api/health.py).
+
+Variables de entorno:
+- DB_SEED_ON_STARTUP: 1 carga los datos de ejemplo al arrancar si la base de datos está vacía (por defecto 0)
+- STARTUP_LOCK_TIMEOUT: segundos esperando a que otro proceso termine de preparar la base de datos (por defecto 60)
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from fastapi import FastAPI
+from sqlalchemy.engine import make_url
+
+from app.assets import assets
+from app.database import DATABASE_URL, async_engine, create_schema, engine, seed_db
+from app.leaderboards import leaderboards
+from app.recommendations import recommendations
+from app.security import check_session_secret
+
+logger = logging.getLogger(__name__)
+
+DB_SEED_ON_STARTUP = os.getenv("DB_SEED_ON_STARTUP", "0") == "1"
+STARTUP_LOCK_TIMEOUT = float(os.getenv("STARTUP_LOCK_TIMEOUT", "60"))
+
+
+# -------------------------
+# Bloqueo entre procesos
+# -------------------------
+@contextmanager
+def startup_lock(url: str = DATABASE_URL, timeout: float = STARTUP_LOCK_TIMEOUT):
+    """
+    Un solo proceso a la vez dentro del bloque. Se usa SQLite para el bloqueo
+    (funciona igual en Linux, macOS y Windows) y se libera aunque el proceso muera.
+    Las bases de datos en memoria no necesitan bloqueo.
+    """
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        yield
+        return
+
+    connection = sqlite3.connect(f"{database}.lock", timeout=timeout, isolation_level=None)
+    try:
+        connection.execute("BEGIN EXCLUSIVE")
+        yield
+    finally:
+        connection.close()
+
+
+def prepare_database(seed: bool = False):
+    """Esquema, migraciones y, con seed, datos de ejemplo; sin carreras entre workers."""
+    start = time.perf_counter()
+    with startup_lock():
+        create_schema()
+        if seed:
+            seed_db()
+    logger.info("Base de datos preparada en %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+# -------------------------
+# Estado para /api/health/ready
+# -------------------------
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.started_at: float | None = None
+        self.startup_ms: float | None = None
+
+
+readiness = Readiness()
+
+
+# -------------------------
+# Lifespan
+# -------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start = time.perf_counter()
+    check_session_secret()
+    # Aún no se aceptan peticiones: se puede bloquear el bucle de eventos
+    prepare_database(seed=DB_SEED_ON_STARTUP)
+    assets.prepare()
+    leaderboards.start()
+    recommendations.start()
+
+    readiness.ready = True
+    readiness.started_at = time.time()
+    readiness.startup_ms = (time.perf_counter() - start) * 1000
+    try:
+        yield
+    finally:
+        readiness.ready = False
+        engine.dispose()
+        if async_engine is not None:
+            await async_engine.dispose()
@@ -0,0 +1,145 @@
+"""
+Respuestas en streaming para los listados grandes
+
+Con ?stream=1 o Accept: application/x-ndjson el listado no se pagina ni se
+construye entero en memoria: las filas se leen por bloques con yield_per y se
+serializan una a una a medida que se envían, así que la memoria no depende del
+número de filas devueltas.
+
+- Accept: application/x-ndjson -> un objeto JSON por línea
+- ?stream=1 sin ese Accept     -> el mismo {"items": [...], "next_cursor": null}
+                                  que la respuesta paginada, enviado por partes
+
+En modo streaming se respeta ?after= pero no ?limit=: se envía todo lo que queda.
+
+Variables de entorno:
+- STREAM_CHUNK_SIZE: filas leídas por bloque (por defecto 500)
+"""
+
+import os
+from typing import AsyncIterator, Callable, Iterable, Iterator
+
+from fastapi import Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.cache import serialize
+from app.database import AsyncSessionLocal, SessionLocal
+from app.pagination import PageParams
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "500"))
+
+NDJSON = "application/x-ndjson"
+
+
+# -------------------------
+# Parámetros de streaming
+# -------------------------
+class StreamParams:
+    """?stream=1 o Accept: application/x-ndjson activan el streaming."""
+
+    def __init__(self, request: Request, stream: bool = Query(False)):
+        self.ndjson = NDJSON in request.headers.get("accept", "")
+        self.enabled = stream or self.ndjson
+
+
+def _keyset(stmt: Select, id_column, page: PageParams) -> Select:
+    if page.after is not None:
+        stmt = stmt.where(id_column > page.after)
+    return stmt.order_by(id_column.asc()).execution_options(yield_per=STREAM_CHUNK_SIZE)
+
+
+# -------------------------
+# Serialización por bloques
+# -------------------------
+def _encode(response_model, items: Iterable, encode: Callable | None = None) -> list[bytes]:
+    if encode is not None:
+        return [encode(item) for item in items]
+    return [serialize(response_model, item) for item in items]
+
+
+def _ndjson(partitions: Iterator[list[bytes]]) -> Iterator[bytes]:
+    for encoded in partitions:
+        if encoded:
+            yield b"\n".join(encoded) + b"\n"
+
+
+def _json_page(partitions: Iterator[list[bytes]]) -> Iterator[bytes]:
+    separator = b""
+    yield b'{"items":['
+    for encoded in partitions:
+        if encoded:
+            yield separator + b",".join(encoded)
+            separator = b","
+    yield b'],"next_cursor":null}'
+
+
+async def _ndjson_async(partitions: AsyncIterator[list[bytes]]) -> AsyncIterator[bytes]:
+    async for encoded in partitions:
+        if encoded:
+            yield b"\n".join(encoded) + b"\n"
+
+
+async def _json_page_async(partitions: AsyncIterator[list[bytes]]) -> AsyncIterator[bytes]:
+    separator = b""
+    yield b'{"items":['
+    async for encoded in partitions:
+        if encoded:
+            yield separator + b",".join(encoded)
+            separator = b","
+    yield b'],"next_cursor":null}'
+
+
+def _response(body, params: StreamParams) -> StreamingResponse:
+    return StreamingResponse(body, media_type=NDJSON if params.ndjson else "application/json")
+
+
+# -------------------------
+# Uso desde los routers
+# -------------------------
+def stream_list(
+    stmt: Select,
+    id_column,
+    page: PageParams,
+    params: StreamParams,
+    response_model,
+    transform: Callable | None = None,
+    encode: Callable | None = None
+) -> StreamingResponse:
+    """
+    Envía el resultado de stmt en streaming. transform(db, filas) permite
+    convertir cada bloque antes de serializarlo (p. ej. build_user_responses)
+    y encode(fila) -> bytes sustituye a la serialización con response_model.
+    """
+    stmt = _keyset(stmt, id_column, page)
+
+    def partitions():
+        # La sesión vive mientras se envía la respuesta, no solo durante el endpoint
+        with SessionLocal() as db:
+            for rows in db.execute(stmt).scalars().partitions():
+                yield _encode(response_model, transform(db, rows) if transform else rows, encode)
+
+    return _response((_ndjson if params.ndjson else _json_page)(partitions()), params)
+
+
+def stream_list_async(
+    stmt: Select,
+    id_column,
+    page: PageParams,
+    params: StreamParams,
+    response_model,
+    transform: Callable | None = None,
+    encode: Callable | None = None
+) -> StreamingResponse:
+    """Igual que stream_list con AsyncSession; transform es síncrona y va por run_sync."""
+    stmt = _keyset(stmt, id_column, page)
+
+    async def partitions():
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(stmt)
+            async for rows in result.partitions():
+                if transform:
+                    rows = await db.run_sync(transform, rows)
+                yield _encode(response_model, rows, encode)
+
+    return _response((_ndjson_async if params.ndjson else _json_page_async)(partitions()), params)
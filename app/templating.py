@@ -0,0 +1,105 @@
+"""
+Entorno de plantillas compartido por todos los routers web
+
+Un único Jinja2Templates para toda la aplicación: las plantillas compiladas se
+guardan en memoria una sola vez y su bytecode en disco, así que un proceso
+nuevo no vuelve a compilarlas.
+
+Además añade la etiqueta {% cache %} para guardar fragmentos ya renderizados
+en la caché de respuestas:
+
+    {% cache "videogame-reviews", videogame.id, videogame.version tags ["videogame:" ~ videogame.id] %}
+        ... bloque costoso ...
+    {% endcache %}
+
+Las expresiones antes de "tags" forman la clave (conviene incluir la versión de
+la entidad) y las etiquetas hacen que el fragmento se invalide al confirmar una
+escritura, igual que las respuestas cacheadas (ver app/cache.py). El bloque
+cacheado no debe depender del usuario: lo que cambia según quién mira (botones
+de editar, formularios...) se pinta fuera del {% cache %}. Meter el id del
+usuario en la clave crearía una entrada por usuario y llenaría la caché.
+
+Variables de entorno:
+- TEMPLATE_BYTECODE_CACHE_DIR: directorio del bytecode (por defecto uno temporal del sistema, 0 lo desactiva)
+- TEMPLATE_AUTO_RELOAD: 1 comprueba si las plantillas cambiaron en disco en cada uso (por defecto 1)
+"""
+
+import os
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.assets import assets
+from app.cache import response_cache
+from app.images import image_store
+
+TEMPLATE_DIRECTORY = "app/templates"
+TEMPLATE_BYTECODE_CACHE_DIR = os.getenv("TEMPLATE_BYTECODE_CACHE_DIR", "")
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "1") == "1"
+
+
+# -------------------------
+# Caché de fragmentos
+# -------------------------
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key_parts.append(parser.parse_expression())
+
+        cache_tags = nodes.List([])
+        if parser.stream.skip_if("name:tags"):
+            cache_tags = parser.parse_expression()
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        call = self.call_method("_render_fragment", [nodes.List(key_parts), cache_tags])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, key_parts: list, cache_tags: list, caller) -> str:
+        key = "fragment:" + ":".join(str(part) for part in key_parts)
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            return Markup(cached.decode())
+
+        generation = response_cache.generation
+        rendered = caller()
+        response_cache.set(key, rendered.encode(), [str(tag) for tag in cache_tags], generation)
+        return rendered
+
+
+# -------------------------
+# Entorno compartido
+# -------------------------
+def _bytecode_cache() -> FileSystemBytecodeCache | None:
+    if TEMPLATE_BYTECODE_CACHE_DIR == "0":
+        return None
+    if TEMPLATE_BYTECODE_CACHE_DIR:
+        os.makedirs(TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+        return FileSystemBytecodeCache(TEMPLATE_BYTECODE_CACHE_DIR)
+    return FileSystemBytecodeCache()
+
+
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIRECTORY),
+    autoescape=True,
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    bytecode_cache=_bytecode_cache(),
+    extensions=[FragmentCacheExtension],
+    # Por defecto Jinja solo guarda 400 plantillas compiladas; aquí caben todas
+    cache_size=-1
+)
+
+# Miniaturas servidas desde /media en lugar de las imágenes originales (ver app/images.py)
+environment.filters["thumb"] = image_store.url
+environment.filters["srcset"] = image_store.srcset
+# URLs con huella de los ficheros de app/static (ver app/assets.py)
+environment.globals["static_url"] = assets.url
+
+templates = Jinja2Templates(env=environment)
@@ -0,0 +1,208 @@
+"""
+Escritura agrupada (write-behind) de las reviews
+
+Con REVIEW_WRITE_BEHIND=1 las altas, ediciones y bajas de reviews no hacen su
+propio commit: se encolan y un único hilo escritor las aplica en lotes, varias
+en la misma transacción. SQLite hace un fsync por commit y solo admite un
+escritor a la vez, así que agrupar reduce los commits y la espera por el
+bloqueo cuando llegan muchas reviews a la vez.
+
+- Latencia acotada: el lote se cierra WRITE_BATCH_WINDOW_MS después de la
+  primera escritura o al llegar a WRITE_BATCH_MAX escrituras.
+- Respuesta tras el commit: quien envía la escritura espera a que su lote se
+  haya confirmado y recibe el resultado o la excepción de su operación. Que
+  sobreviva a un corte de luz depende de PRAGMA synchronous: con FULL sí; con
+  NORMAL (el perfil production, en WAL) las últimas transacciones confirmadas
+  pueden perderse si cae el sistema, aunque no si solo cae el proceso.
+- Contrapresión: la cola tiene tamaño fijo; si sigue llena tras
+  WRITE_QUEUE_TIMEOUT segundos se responde 503 con Retry-After.
+
+Si una operación falla se deshace el lote y se repite cada operación en su
+propia transacción: solo falla la que daba error.
+
+Sin REVIEW_WRITE_BEHIND la operación se ejecuta y confirma en la sesión de la
+petición, como siempre.
+
+Variables de entorno:
+- REVIEW_WRITE_BEHIND: 1 activa la escritura agrupada de reviews (por defecto 0)
+- WRITE_BATCH_WINDOW_MS: milisegundos que se espera para llenar un lote (por defecto 5)
+- WRITE_BATCH_MAX: escrituras por lote como máximo (por defecto 100)
+- WRITE_QUEUE_SIZE: escrituras pendientes como máximo (por defecto 1000)
+- WRITE_QUEUE_TIMEOUT: segundos esperando sitio en la cola antes del 503 (por defecto 2)
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REVIEW_WRITE_BEHIND = os.getenv("REVIEW_WRITE_BEHIND", "0") == "1"
+WRITE_BATCH_WINDOW_MS = float(os.getenv("WRITE_BATCH_WINDOW_MS", "5"))
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "100"))
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "1000"))
+WRITE_QUEUE_TIMEOUT = float(os.getenv("WRITE_QUEUE_TIMEOUT", "2"))
+
+CONFLICT_DETAIL = "La escritura choca con otra hecha a la vez; vuelve a intentarlo"
+
+
+# -------------------------
+# Escritor por lotes
+# -------------------------
+class WriteBatcher:
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        window: float,
+        max_batch: int,
+        queue_size: int,
+        submit_timeout: float
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self.submit_timeout = submit_timeout
+        self.batches = 0
+        self.writes = 0
+        self.largest_batch = 0
+        self._queue: queue.Queue[tuple[Callable, Future]] = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def submit(self, operation: Callable[[Session], T]) -> T:
+        """
+        Encola operation(db) y espera a que su lote se confirme. Devuelve lo
+        que devuelva la operación o relanza su excepción.
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        try:
+            self._queue.put((operation, future), timeout=self.submit_timeout)
+        except queue.Full:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Hay demasiadas escrituras pendientes; vuelve a intentarlo en unos segundos",
+                headers={"Retry-After": "1"}
+            )
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "writes": self.writes,
+            "largest_batch": self.largest_batch,
+        }
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+                    self._worker.start()
+
+    def _next_batch(self) -> list[tuple[Callable, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._apply(batch)
+            except Exception:
+                # _apply ya resuelve los futuros; esto solo evita que muera el hilo
+                logger.exception("Error inesperado en el escritor de lotes")
+
+            self.batches += 1
+            self.writes += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def _apply(self, batch: list[tuple[Callable, Future]]):
+        with self.session_factory() as db:
+            try:
+                results = [operation(db) for operation, _ in batch]
+                db.commit()
+            except Exception as error:
+                db.rollback()
+                if len(batch) == 1:
+                    batch[0][1].set_exception(error)
+                    return
+                # Una operación ha fallado: se repite cada una por separado
+                for item in batch:
+                    self._apply([item])
+                return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+review_writes = WriteBatcher(
+    SessionLocal,
+    window=WRITE_BATCH_WINDOW_MS / 1000,
+    max_batch=WRITE_BATCH_MAX,
+    queue_size=WRITE_QUEUE_SIZE,
+    submit_timeout=WRITE_QUEUE_TIMEOUT
+)
+
+
+# -------------------------
+# Uso desde los routers
+# -------------------------
+def write_review(db: Session, operation: Callable[[Session], T], conflict_detail: str = CONFLICT_DETAIL) -> T:
+    """
+    Ejecuta operation(db) sin hacer commit dentro: con REVIEW_WRITE_BEHIND va
+    al escritor por lotes y si no se ejecuta y confirma con la sesión db.
+
+    Una restricción de la base de datos que salte en la operación o en el
+    commit (p. ej. dos peticiones creando a la vez la misma reseña) es un 409
+    con conflict_detail, no un error del servidor.
+    """
+    try:
+        if REVIEW_WRITE_BEHIND:
+            return review_writes.submit(operation)
+
+        result = operation(db)
+        db.commit()
+        return result
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
+
+
+async def write_review_async(db: AsyncSession, operation: Callable[[Session], T], conflict_detail: str = CONFLICT_DETAIL) -> T:
+    """
+    write_review para los routers asíncronos: la espera del lote va en un hilo
+    para no bloquear el bucle de eventos y la escritura directa con run_sync.
+    """
+    if not REVIEW_WRITE_BEHIND:
+        return await db.run_sync(write_review, operation, conflict_detail)
+
+    try:
+        return await run_in_threadpool(review_writes.submit, operation)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
@@ -0,0 +1,6 @@
+"""
+Benchmarks de rendimiento (no forman parte de la aplicación)
+
+Se ejecutan desde la raíz del proyecto, por ejemplo:
+    python -m benchmarks.sqlite_profiles
+"""
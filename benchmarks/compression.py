@@ -0,0 +1,156 @@
+"""
+Compara bytes enviados y latencia de cada codificación y nivel de compresión
+
+Usa respuestas reales de la aplicación sobre una base de datos temporal (la
+lista de videojuegos con reviews en JSON, el mismo listado en NDJSON por
+streaming y la página de inicio en HTML). Para cada codificación mide el
+tiempo de CPU de CompressionMiddleware por respuesta, los bytes resultantes y
+el tiempo total estimado con un enlace de --mbps megabits por segundo
+(mediana de --repeat repeticiones).
+
+    python -m benchmarks.compression --games 500 --mbps 10 --repeat 50
+
+Brotli y Zstandard solo aparecen si están instalados los paquetes brotli y zstandard.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Líneas por trozo al simular el streaming NDJSON
+STREAM_LINES = 50
+
+
+def prepare_payloads(games: int) -> dict[str, tuple[str, list[bytes]]]:
+    """Arranca la aplicación sobre una base de datos temporal y guarda las respuestas sin comprimir."""
+    from fastapi.testclient import TestClient
+
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models import ReviewORM, UserORM, VideogameORM
+    from app.startup import prepare_database
+
+    prepare_database(seed=True)
+    random.seed(1)
+    with SessionLocal() as db:
+        seeded = db.query(VideogameORM).all()
+        users = [UserORM(nick=f"jugador{i}", email=f"jugador{i}@example.com", password="-") for i in range(20)]
+        db.add_all(users)
+        # Más juegos a partir de las descripciones reales de la semilla
+        for i in range(games - len(seeded)):
+            model = random.choice(seeded)
+            db.add(VideogameORM(
+                title=f"{model.title} {i}",
+                description=model.description,
+                cover_url=model.cover_url,
+                genre_id=model.genre_id,
+                developer_id=model.developer_id
+            ))
+        db.flush()
+        for videogame in db.query(VideogameORM).all():
+            for user in random.sample(users, 3):
+                db.add(ReviewORM(
+                    rating=round(random.uniform(1, 10), 1),
+                    comment=f"Me ha parecido {random.choice(['muy divertido', 'algo corto', 'una obra maestra', 'difícil pero justo'])}",
+                    user_id=user.id,
+                    videogame_id=videogame.id
+                ))
+        db.commit()
+
+    identity = {"Accept-Encoding": "identity"}
+    with TestClient(app) as client:
+        json_body = client.get(f"/api/videogames?limit={min(games, 100)}", headers=identity).content
+        ndjson_body = client.get(f"/api/videogames?limit={games}", headers={**identity, "Accept": "application/x-ndjson"}).content
+        html_body = client.get("/", headers=identity).content
+    # TestClient junta el cuerpo: se vuelve a trocear como lo envía el servidor
+    lines = ndjson_body.splitlines(keepends=True)
+    ndjson_chunks = [b"".join(lines[i:i + STREAM_LINES]) for i in range(0, len(lines), STREAM_LINES)]
+
+    return {
+        "JSON /api/videogames": ("application/json", [json_body]),
+        "NDJSON (streaming)": ("application/x-ndjson", ndjson_chunks),
+        "HTML /": ("text/html; charset=utf-8", [html_body]),
+    }
+
+
+def run_once(middleware, content_type: str, chunks: list[bytes], accept: str) -> int:
+    """Una petición a través del middleware; devuelve los bytes enviados."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type.encode())]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    sent = 0
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept.encode())]}
+    asyncio.run(middleware(app)(scope, receive, send))
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--mbps", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar la aplicación: base de datos temporal y sin echo
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        os.environ.setdefault("DB_PROFILE", "production")
+        os.environ.setdefault("ASSET_BUILD_DIR", os.path.join(tmp, "assets"))
+        os.environ.setdefault("IMAGE_CACHE_DIR", os.path.join(tmp, "media"))
+        payloads = prepare_payloads(args.games)
+
+    from app.compression import CompressionMiddleware, available_encoders
+
+    available = available_encoders(1, 1, 1)
+    levels = {"gzip": [1, 6, 9], "br": [1, 4, 11], "zstd": [1, 3, 19]}
+    configurations = [("identity", None)] + [
+        (encoding, level) for encoding in ("gzip", "br", "zstd") if encoding in available for level in levels[encoding]
+    ]
+
+    for name, (content_type, chunks) in payloads.items():
+        original = sum(len(chunk) for chunk in chunks)
+        print(f"\n{name}: {original} bytes en {len(chunks)} trozo(s)")
+        print(f"{'codificación':<14} {'bytes':>9} {'ratio':>7} {'CPU ms':>8} {f'total ms @ {args.mbps:g} Mbit/s':>24}")
+
+        for encoding, level in configurations:
+            if encoding == "identity":
+                def middleware(app):
+                    return CompressionMiddleware(app, encodings=[])
+            else:
+                def middleware(app, encoding=encoding, level=level):
+                    return CompressionMiddleware(
+                        app, encodings=[encoding], minimum_size=0,
+                        gzip_level=level, brotli_quality=level, zstd_level=level
+                    )
+
+            sent = run_once(middleware, content_type, chunks, encoding)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                run_once(middleware, content_type, chunks, encoding)
+                timings.append(time.perf_counter() - start)
+            # Mediana: el primer uso y los hilos de la aplicación no deben distorsionar la media
+            cpu_ms = statistics.median(timings) * 1000
+            wire_ms = sent * 8 / (args.mbps * 1_000_000) * 1000
+
+            label = encoding if level is None else f"{encoding} {level}"
+            print(f"{label:<14} {sent:>9} {original / sent:>6.1f}x {cpu_ms:>8.2f} {cpu_ms + wire_ms:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Compara el coste de serializar listados grandes de la API
+
+Con listas de objetos ORM en memoria (juegos con sus reviews y estadísticas,
+sin base de datos) mide cuántos elementos por segundo serializa cada camino:
+
+- response_model: lo que hacía el listado con response_model=Page[VideogameResponse]
+  (construir Page con los objetos ORM, validarla otra vez en serialize_response
+  y codificarla con JSONResponse)
+- TypeAdapter: validar y volcar con Pydantic en un paso (app.cache.serialize)
+- confianza + json: dicts de app.serialization codificados con json
+- confianza + orjson: lo mismo con FastJSONResponse (si orjson está instalado)
+
+Antes de medir comprueba que todos producen el mismo JSON.
+
+    python -m benchmarks.serialization --items 100 1000 10000 --reviews 5 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+
+def build_videogames(count: int, reviews: int) -> list:
+    """Juegos ORM sin sesión con el mismo aspecto que los que devuelve el listado."""
+    from app.models import ReviewORM, VideogameORM
+    from app.models.videogame_stats import VideogameStatsORM
+
+    random.seed(1)
+    videogames = []
+    for i in range(1, count + 1):
+        ratings = [round(random.uniform(1, 10), 1) for _ in range(reviews)]
+        stats = VideogameStatsORM(
+            videogame_id=i,
+            review_count=len(ratings),
+            rating_sum=sum(ratings),
+            rating_sum_sq=sum(rating * rating for rating in ratings),
+            rating_min=min(ratings, default=None),
+            rating_max=max(ratings, default=None),
+            **{f"rating_{bucket}": sum(1 for rating in ratings if round(rating) == bucket) for bucket in range(1, 11)}
+        )
+        videogames.append(VideogameORM(
+            id=i,
+            title=f"Videojuego {i}",
+            description="Aventura de acción en un mundo abierto con misiones secundarias y jefes opcionales",
+            cover_url=f"https://example.com/portadas/{i}.jpg",
+            genre_id=i % 12 + 1,
+            developer_id=i % 30 + 1,
+            reviews=[
+                ReviewORM(id=i * 100 + j, user_id=j + 1, videogame_id=i, rating=rating, comment="Muy recomendable, aunque algo corto")
+                for j, rating in enumerate(ratings)
+            ],
+            stats=stats
+        ))
+    return videogames
+
+
+def paths() -> dict:
+    """Nombre -> función(lista de juegos) -> bytes."""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    from app.cache import type_adapter
+    from app.schemas.pagination import Page
+    from app.schemas.videogame import VideogameResponse
+    from app.serialization import FastJSONResponse, orjson, page_dict, videogame_dict
+
+    field = create_model_field("Response", Page[VideogameResponse], mode="serialization")
+    adapter = type_adapter(Page[VideogameResponse])
+
+    loop = asyncio.new_event_loop()
+
+    def response_model(videogames):
+        page = Page(items=videogames, next_cursor=None)
+        return JSONResponse(loop.run_until_complete(serialize_response(field=field, response_content=page))).body
+
+    def pydantic_adapter(videogames):
+        return adapter.dump_json(adapter.validate_python({"items": videogames, "next_cursor": None}, from_attributes=True))
+
+    def trusted_json(videogames):
+        content = page_dict([videogame_dict(videogame) for videogame in videogames], None)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def trusted_orjson(videogames):
+        return FastJSONResponse(page_dict([videogame_dict(videogame) for videogame in videogames], None)).body
+
+    selected = {
+        "response_model": response_model,
+        "TypeAdapter": pydantic_adapter,
+        "confianza + json": trusted_json,
+    }
+    if orjson is not None:
+        selected["confianza + orjson"] = trusted_orjson
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--reviews", type=int, default=5, help="reviews por juego")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    selected = paths()
+
+    for count in args.items:
+        videogames = build_videogames(count, args.reviews)
+        bodies = {name: function(videogames) for name, function in selected.items()}
+        reference = json.loads(bodies["response_model"])
+        different = [name for name, body in bodies.items() if json.loads(body) != reference]
+        if different:
+            raise SystemExit(f"JSON distinto al de response_model: {', '.join(different)}")
+
+        print(f"\n{count} juegos con {args.reviews} reviews ({len(bodies['response_model'])} bytes)")
+        print(f"{'camino':<20} {'ms':>9} {'juegos/s':>11} {'mejora':>8}")
+
+        baseline = None
+        for name, function in selected.items():
+            repeat = max(3, args.repeat * 1000 // max(count, 1000))
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                function(videogames)
+                timings.append(time.perf_counter() - start)
+            elapsed = statistics.median(timings)
+            baseline = baseline or elapsed
+            print(f"{name:<20} {elapsed * 1000:>9.2f} {count / elapsed:>11.0f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
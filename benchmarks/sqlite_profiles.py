@@ -0,0 +1,123 @@
+"""
+Compara el rendimiento de lectura/escritura concurrente de los perfiles del motor
+
+Cada perfil se prueba sobre una base de datos temporal con varios hilos
+lectores (GET por id) y un hilo escritor (alta de reviews, un commit por
+review) durante unos segundos. El echo se desactiva en ambos perfiles para
+medir solo el efecto de los PRAGMA.
+
+    python -m benchmarks.sqlite_profiles --readers 8 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, ENGINE_PROFILES, build_engine
+from app.models import DevORM, GenreORM, ReviewORM, UserORM, VideogameORM
+
+N_GAMES = 2000
+
+
+def seed(SessionLocal):
+    db = SessionLocal()
+    db.add(GenreORM(name="Acción", description="Acción"))
+    db.add(DevORM(name="Nintendo"))
+    db.add_all([UserORM(nick=f"user{i}", email=f"user{i}@example.com", password="password") for i in range(1, 51)])
+    db.add_all([
+        VideogameORM(title=f"Juego {i}", description="Descripción " * 20, genre_id=1, developer_id=1)
+        for i in range(N_GAMES)
+    ])
+    db.commit()
+    db.close()
+
+
+def run_profile(profile: str, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile)
+        engine.echo = False
+        Base.metadata.create_all(engine)
+        SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+        seed(SessionLocal)
+
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def reader():
+            done = 0
+            while not stop.is_set():
+                db = SessionLocal()
+                try:
+                    game_id = random.randint(1, N_GAMES)
+                    db.execute(select(VideogameORM).where(VideogameORM.id == game_id)).scalar_one()
+                    db.execute(select(ReviewORM).where(ReviewORM.videogame_id == game_id)).scalars().all()
+                    done += 1
+                except Exception:
+                    with lock:
+                        counts["errors"] += 1
+                finally:
+                    db.close()
+            with lock:
+                counts["reads"] += done
+
+        def writer():
+            done = 0
+            pairs = [(u, g) for u in range(1, 51) for g in range(1, N_GAMES + 1)]
+            random.shuffle(pairs)
+            for user_id, game_id in pairs:
+                if stop.is_set():
+                    break
+                db = SessionLocal()
+                try:
+                    db.add(ReviewORM(rating=random.uniform(1, 10), user_id=user_id, videogame_id=game_id))
+                    db.commit()
+                    done += 1
+                except Exception:
+                    db.rollback()
+                    with lock:
+                        counts["errors"] += 1
+                finally:
+                    db.close()
+            with lock:
+                counts["writes"] += done
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "reads/s": counts["reads"] / seconds,
+        "writes/s": counts["writes"] / seconds,
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'perfil':<12} {'lecturas/s':>12} {'escrituras/s':>14} {'errores':>8}")
+    for profile in ENGINE_PROFILES:
+        result = run_profile(profile, args.readers, args.seconds)
+        print(f"{result['profile']:<12} {result['reads/s']:>12.0f} {result['writes/s']:>14.0f} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
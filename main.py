@@ -3,5 +3,9 @@ Punto de entrada de la aplicación
 """
 import uvicorn
 
+from app.startup import prepare_database
+
 if __name__ == "__main__":
+    # Datos de ejemplo una sola vez, no en cada recarga de uvicorn
+    prepare_database(seed=True)
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
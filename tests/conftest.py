@@ -0,0 +1,46 @@
+"""
+Configuración común de los tests
+
+La aplicación lee su configuración de variables de entorno al importarse, así
+que se fijan aquí, antes de importar nada de app: una base de datos y unos
+directorios temporales, sin límite de peticiones y sin SQL en consola.
+"""
+
+import os
+import shutil
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="videogames-tests-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'videogames.db')}")
+os.environ.setdefault("DB_PROFILE", "production")
+os.environ.setdefault("SESSION_SECRET", "tests")
+os.environ.setdefault("RATE_LIMIT_RATE", "0")
+os.environ.setdefault("IMAGE_CACHE_DIR", os.path.join(_workdir, "media"))
+os.environ.setdefault("ASSET_BUILD_DIR", os.path.join(_workdir, "build", "static"))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Esquema y datos de ejemplo, una vez por sesión de tests."""
+    from app.database import create_schema, seed_db
+
+    create_schema()
+    seed_db()
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    """Cliente de la aplicación con el lifespan ya ejecutado."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_workdir, ignore_errors=True)
@@ -0,0 +1,20 @@
+"""
+Los routers asíncronos declaran las mismas rutas que los síncronos
+"""
+
+from fastapi.routing import APIRoute
+
+from app.routers.api import router as sync_router
+from app.routers.api_async import router as async_router
+
+
+def describe(router) -> set[tuple]:
+    return {
+        (route.path, method, route.status_code, repr(route.response_model))
+        for route in router.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+
+
+def test_async_stack_matches_sync_routes():
+    assert describe(async_router) == describe(sync_router)
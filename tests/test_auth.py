@@ -0,0 +1,140 @@
+"""
+Cookies de sesión firmadas, require_user y el paso a scrypt de las contraseñas en claro
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app import security
+from app.auth import SESSION_COOKIE, authenticate
+from app.database import SessionLocal
+from app.main import app
+from app.models.user import UserORM
+from app.security import is_password_hash, sign, unsign
+
+
+@pytest.fixture
+def browser(client):
+    """Cliente sin cookies (el de la sesión de tests es compartido)."""
+    return TestClient(app)
+
+
+def session_cookie(user_id: int = 1, max_age: int = 3600) -> str:
+    return sign({"uid": user_id, "nick": "admin"}, max_age)
+
+
+# -------------------------
+# Firma
+# -------------------------
+def test_unsign_returns_signed_data():
+    data = unsign(sign({"uid": 7}, 60))
+    assert data["uid"] == 7
+
+
+def test_unsign_rejects_tampered_payload():
+    token = sign({"uid": 7}, 60)
+    forged = sign({"uid": 1}, 60)
+    # Los datos de un token con la firma de otro
+    assert unsign(f"{forged.partition('.')[0]}.{token.partition('.')[2]}") is None
+
+
+@pytest.mark.parametrize("value", ["", "sin-firma", "abc.", ".abc", "abc.def"])
+def test_unsign_rejects_malformed(value):
+    assert unsign(value) is None
+
+
+def test_unsign_rejects_other_secret(monkeypatch):
+    token = sign({"uid": 7}, 60)
+    monkeypatch.setattr(security, "SESSION_SECRET", "otra-clave")
+    assert unsign(token) is None
+
+
+def test_unsign_rejects_expired(monkeypatch):
+    token = sign({"uid": 7}, 60)
+    now = time.time()
+    monkeypatch.setattr(security.time, "time", lambda: now + 61)
+    assert unsign(token) is None
+
+
+# -------------------------
+# require_user
+# -------------------------
+def test_require_user_redirects_to_login(browser):
+    response = browser.get("/videogame/library?limit=5", follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/login?next=%2Fvideogame%2Flibrary"
+
+
+def test_require_user_redirects_back_to_form_after_post(browser):
+    response = browser.post(
+        "/videogame/1/1/download",
+        headers={"Referer": "http://testserver/videogame/1?tab=reviews"},
+        follow_redirects=False
+    )
+    assert response.status_code == 303
+    assert response.headers["location"] == "/login?next=%2Fvideogame%2F1"
+
+
+@pytest.mark.parametrize("cookie", [
+    session_cookie(max_age=-1),
+    session_cookie()[:-3] + "xyz",
+    sign({"nick": "admin"}, 3600),
+])
+def test_require_user_rejects_invalid_cookies(browser, cookie):
+    browser.cookies.set(SESSION_COOKIE, cookie)
+    response = browser.get("/videogame/library", follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"].startswith("/login?next=")
+
+
+def test_require_user_accepts_valid_cookie(browser):
+    browser.cookies.set(SESSION_COOKIE, session_cookie())
+    assert browser.get("/videogame/library", follow_redirects=False).status_code == 200
+
+
+# -------------------------
+# Inicio de sesión
+# -------------------------
+def test_login_sets_session_cookie(browser):
+    response = browser.post("/login", data={"login": "admin", "password": "admin1234", "next": "/videogame/library"}, follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/videogame/library"
+    assert unsign(response.cookies[SESSION_COOKIE])["uid"] == 1
+
+
+def test_login_rejects_wrong_password(browser):
+    response = browser.post("/login", data={"login": "admin", "password": "incorrecta"}, follow_redirects=False)
+    assert response.status_code == 401
+    assert SESSION_COOKIE not in response.cookies
+
+
+@pytest.fixture
+def legacy_user(database):
+    """Usuario con la contraseña todavía en claro, como antes de scrypt."""
+    with SessionLocal() as db:
+        user = UserORM(nick="legacy", email="legacy@example.com", password="antigua123", version=1)
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    yield user_id
+    with SessionLocal() as db:
+        db.execute(delete(UserORM).where(UserORM.id == user_id))
+        db.commit()
+
+
+def test_plain_password_is_rehashed_on_login(legacy_user):
+    with SessionLocal() as db:
+        assert authenticate(db, "legacy", "otra") is None
+        assert db.get(UserORM, legacy_user).password == "antigua123"
+
+        assert authenticate(db, "legacy", "antigua123").id == legacy_user
+
+    with SessionLocal() as db:
+        stored = db.get(UserORM, legacy_user).password
+        assert is_password_hash(stored)
+        # Desde ahora se comprueba con scrypt
+        assert authenticate(db, "legacy@example.com", "antigua123").id == legacy_user
+        assert authenticate(db, "legacy", stored) is None
@@ -0,0 +1,42 @@
+"""
+Compresión y ETag: cada codificación tiene su ETag y las peticiones
+condicionales aceptan cualquiera de ellos
+"""
+
+from app.etag import encoded_etag
+
+PAGE = "/api/videogames?limit=20"
+
+
+def test_compressed_response_has_its_own_etag(client):
+    identity = client.get(PAGE, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(PAGE, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in identity.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == encoded_etag(identity.headers["etag"], "gzip")
+    assert compressed.json() == identity.json()
+
+
+def test_if_none_match_accepts_either_etag(client):
+    etag = client.get(PAGE, headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert etag.endswith('-gzip"')
+
+    response = client.get(PAGE, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    identity_etag = client.get(PAGE, headers={"Accept-Encoding": "identity"}).headers["etag"]
+    response = client.get(PAGE, headers={"Accept-Encoding": "identity", "If-None-Match": identity_etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == identity_etag
+
+
+def test_if_match_accepts_compressed_etag(client):
+    etag = client.get("/api/videogames/1", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    stale = client.patch("/api/videogames/1", json={}, headers={"If-Match": encoded_etag('"otro"', "gzip")})
+    assert stale.status_code == 412
+
+    response = client.patch("/api/videogames/1", json={}, headers={"If-Match": encoded_etag(etag, "gzip")})
+    assert response.status_code == 200
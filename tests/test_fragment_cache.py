@@ -0,0 +1,39 @@
+"""
+Fragmentos cacheados de las plantillas: la lista de reseñas es una sola
+entrada para todos los usuarios y los botones propios se pintan aparte
+"""
+
+from fastapi.testclient import TestClient
+
+from app.auth import SESSION_COOKIE
+from app.cache import response_cache
+from app.main import app
+from app.security import sign
+
+# En los datos de ejemplo el usuario 1 (admin) tiene una reseña del juego 1
+VIDEOGAME_ID = 1
+
+
+def browser_for(user_id: int, nick: str) -> TestClient:
+    browser = TestClient(app)
+    browser.cookies.set(SESSION_COOKIE, sign({"uid": user_id, "nick": nick}, 3600))
+    return browser
+
+
+def review_fragments() -> list[str]:
+    prefix = f"fragment:videogame-reviews:{VIDEOGAME_ID}:"
+    return [key for key in response_cache.backend._entries if key.startswith(prefix)]
+
+
+def test_review_list_is_cached_once_for_every_user(client):
+    author = browser_for(1, "admin").get(f"/videogame/{VIDEOGAME_ID}")
+    other = browser_for(3, "player2").get(f"/videogame/{VIDEOGAME_ID}")
+    anonymous = TestClient(app).get(f"/videogame/{VIDEOGAME_ID}")
+
+    assert author.status_code == other.status_code == anonymous.status_code == 200
+    assert len(review_fragments()) == 1
+
+    # Solo el autor ve sus botones, aunque la lista venga de la caché
+    assert "Tu reseña" in author.text and "editReviewModal" in author.text
+    assert "editReviewModal" not in other.text
+    assert "editReviewModal" not in anonymous.text
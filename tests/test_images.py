@@ -0,0 +1,193 @@
+"""
+ImageStore y la ruta /images contra un origen local que hace de web de terceros
+"""
+
+import base64
+import os
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import images
+from app.images import ImageError, ImageStore, fetch_source, image_store
+from app.security import sign
+
+# PNG de 1x1 píxeles
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=="
+)
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    last_host = None
+
+    def do_GET(self):
+        # Para comprobar que la petición lleva el nombre y no la dirección
+        OriginHandler.last_host = self.headers["Host"]
+        path = self.path.partition("?")[0]
+        if path == "/cover.png":
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(PNG)))
+            self.end_headers()
+            self.wfile.write(PNG)
+        elif path == "/redirect":
+            # Otra dirección de loopback: la redirección también se tiene que comprobar
+            self.send_response(302)
+            self.send_header("Location", f"http://127.0.0.2:{self.server.server_port}/cover.png")
+            self.end_headers()
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def allow_origin(monkeypatch):
+    """El origen local cuenta como público; el resto de loopback sigue prohibido."""
+    is_public_address = images.is_public_address
+    monkeypatch.setattr(images, "is_public_address", lambda address: str(address) == "127.0.0.1" or is_public_address(address))
+
+
+def proxy_path(source: str, width: int = 320) -> str:
+    return f"{images.PROXY_PREFIX}/{width}/{sign({'u': source}, images.PROXY_LINK_MAX_AGE)}"
+
+
+# -------------------------
+# Ruta /images
+# -------------------------
+def test_proxy_ingests_and_redirects_to_media(client, origin, allow_origin):
+    source = f"{origin}/cover.png?test=proxy"
+
+    response = client.get(proxy_path(source), follow_redirects=False)
+    assert response.status_code == 302
+    location = response.headers["location"]
+    assert location.startswith(f"{images.MEDIA_PREFIX}/")
+
+    stored = image_store.lookup(source)
+    assert location == f"{images.MEDIA_PREFIX}/{image_store.variant(stored, 320)}"
+    for width in image_store.widths:
+        assert os.path.isfile(os.path.join(image_store.directory, image_store.variant(stored, width)))
+
+    media = client.get(location)
+    assert media.status_code == 200
+    assert media.headers["content-type"].startswith("image/")
+    assert "immutable" in media.headers["cache-control"]
+
+    # Ya descargada: el filtro de las plantillas da la URL de /media directamente
+    assert image_store.url(source, 320) == location
+
+
+def test_proxy_redirects_to_original_when_fetch_fails(client, origin, allow_origin):
+    source = f"{origin}/missing.png"
+
+    response = client.get(proxy_path(source), follow_redirects=False)
+    assert response.status_code == 302
+    assert response.headers["location"] == source
+    assert response.headers["cache-control"] == "no-cache"
+    # Durante un tiempo los filtros dan la URL original sin reintentar
+    assert image_store.url(source, 320) == source
+
+
+def test_proxy_rejects_bad_token(client):
+    assert client.get(f"{images.PROXY_PREFIX}/320/no-es-un-token").status_code == 404
+
+    token = sign({"u": "https://example.com/a.png"}, images.PROXY_LINK_MAX_AGE)
+    assert client.get(f"{images.PROXY_PREFIX}/320/{token[:-2]}xx").status_code == 404
+
+
+# -------------------------
+# ImageStore
+# -------------------------
+def test_store_without_pillow_keeps_original(tmp_path, origin, allow_origin, monkeypatch):
+    monkeypatch.setattr(images, "Image", None)
+    store = ImageStore(str(tmp_path), (160, 320), "webp", 80)
+    assert not store.resize
+
+    stored = store.ingest(f"{origin}/cover.png")
+    assert stored.endswith(".png")
+    assert (tmp_path / stored).read_bytes() == PNG
+    # Sin miniaturas: todos los anchos dan el original y no hay srcset
+    assert store.variant(stored, 160) == store.variant(stored, 320) == stored
+    assert store.srcset(f"{origin}/cover.png") == ""
+
+
+def test_store_creates_resized_variants(tmp_path, origin, allow_origin):
+    pytest.importorskip("PIL")
+    store = ImageStore(str(tmp_path), (160, 320), "webp", 80)
+    assert store.resize
+
+    stored = store.ingest(f"{origin}/cover.png")
+    assert stored.endswith(".webp")
+    for width in (160, 320):
+        assert (tmp_path / store.variant(stored, width)).is_file()
+
+
+def test_store_uses_replaced_fetch(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "Image", None)
+    fetched = []
+    store = ImageStore(str(tmp_path), (320,), "webp", 80, fetch=lambda source: fetched.append(source) or PNG)
+
+    assert store.ingest("https://example.com/a.png") == store.ingest("https://example.com/a.png")
+    assert fetched == ["https://example.com/a.png"]
+    assert store.stats()["ingested"] == 1
+
+
+# -------------------------
+# Solo direcciones públicas
+# -------------------------
+@pytest.mark.parametrize("host", ["127.0.0.1", "localhost", "10.0.0.1", "192.168.1.1", "169.254.169.254", "[::1]", "0.0.0.0"])
+def test_fetch_refuses_non_public_hosts(host):
+    with pytest.raises(ImageError):
+        fetch_source(f"http://{host}/cover.png")
+
+
+def test_fetch_refuses_local_origin_without_allowance(origin):
+    with pytest.raises(ImageError, match="no pública"):
+        fetch_source(f"{origin}/cover.png")
+
+
+def test_fetch_checks_every_redirect(origin, allow_origin):
+    assert fetch_source(f"{origin}/cover.png") == PNG
+    with pytest.raises(ImageError, match="127.0.0.2"):
+        fetch_source(f"{origin}/redirect")
+
+
+def test_fetch_connects_to_checked_address(origin, allow_origin, monkeypatch):
+    """DNS rebinding: el nombre da una dirección pública al comprobarlo y otra después."""
+    port = int(origin.rpartition(":")[2])
+    getaddrinfo = socket.getaddrinfo
+    answers = iter(["127.0.0.1", "10.0.0.1"])
+    resolved = []
+
+    def rebinding_getaddrinfo(host, *args, **kwargs):
+        if host != "covers.test":
+            return getaddrinfo(host, *args, **kwargs)
+        address = next(answers)
+        resolved.append(address)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", rebinding_getaddrinfo)
+
+    assert fetch_source(f"http://covers.test:{port}/cover.png") == PNG
+    assert resolved == ["127.0.0.1"]
+    assert OriginHandler.last_host == f"covers.test:{port}"
+
+
+def test_fetch_refuses_other_schemes():
+    with pytest.raises(ImageError):
+        fetch_source("file:///etc/passwd")
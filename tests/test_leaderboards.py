@@ -0,0 +1,74 @@
+"""
+Clasificaciones: vistas publicadas inmutables, altas con su fecha real y recarga por antigüedad
+"""
+
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, insert
+
+from app.database import SessionLocal, utcnow
+from app.leaderboards import Leaderboards
+from app.models.user_game import user_game_table
+
+# El usuario 3 de los datos de ejemplo no tiene biblioteca
+USER_ID = 3
+
+
+@pytest.fixture
+def library_rows(database):
+    added = []
+
+    def add(videogame_id: int, age: timedelta):
+        with SessionLocal() as db:
+            db.execute(insert(user_game_table), {"user_id": USER_ID, "videogame_id": videogame_id, "added_at": utcnow() - age})
+            db.commit()
+        added.append(videogame_id)
+
+    yield add
+
+    with SessionLocal() as db:
+        db.execute(delete(user_game_table).where(user_game_table.c.user_id == USER_ID, user_game_table.c.videogame_id.in_(added)))
+        db.commit()
+
+
+def trending_counts(view, window: str) -> dict[int, int]:
+    return {card["id"]: card["count"] for card in view.top_trending(window, None, None, 100)}
+
+
+def test_additions_use_row_date_and_keep_published_view(library_rows):
+    boards = Leaderboards(prior_weight=10, prior_drift=0.05)
+    boards.refresh()
+    first = boards.view
+    before = trending_counts(first, "7d")
+
+    # Alta de hace dos días, hecha por otro worker: sin invalidación en este proceso
+    library_rows(40, timedelta(days=2))
+    library_rows(41, timedelta(minutes=1))
+    boards.refresh()
+
+    assert trending_counts(boards.view, "7d").get(40) == before.get(40, 0) + 1
+    assert 40 not in trending_counts(boards.view, "24h")
+    assert 41 in trending_counts(boards.view, "24h")
+    # La vista que ya tenían los lectores no cambia
+    assert boards.view is not first
+    assert trending_counts(first, "7d") == before
+    assert boards.loads == 1
+
+
+def test_reloads_after_max_age(database):
+    boards = Leaderboards(prior_weight=10, prior_drift=0.05, max_age=0.01)
+    boards.refresh()
+    time.sleep(0.02)
+    boards.refresh()
+    assert boards.loads == 2
+
+
+def test_top_is_503_until_first_load(monkeypatch):
+    boards = Leaderboards(prior_weight=10, prior_drift=0.05)
+    monkeypatch.setattr(boards, "start", lambda: None)
+    with pytest.raises(HTTPException) as error:
+        boards.current()
+    assert error.value.status_code == 503
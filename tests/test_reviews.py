@@ -0,0 +1,75 @@
+"""
+Una reseña por usuario y juego: los choques con el índice único son 409, no 500
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+
+from app import write_queue
+from app.database import SessionLocal
+from app.models.review import ReviewORM
+from app.rating_stats import add_rating
+from app.routers.api import reviews as reviews_router
+from app.write_queue import WriteBatcher, write_review
+
+# En los datos de ejemplo el usuario 1 tiene reviews de los juegos 1 y 2
+USER_ID = 1
+
+
+@pytest.fixture
+def new_review_ids(database):
+    created = []
+    yield created
+    with SessionLocal() as db:
+        db.execute(delete(ReviewORM).where(ReviewORM.id.in_(created)))
+        db.commit()
+
+
+def duplicate_insert(db):
+    """Simula una petición que pasó la comprobación antes de que la otra confirmara."""
+    db.add(ReviewORM(user_id=USER_ID, videogame_id=1, rating=5.0, version=1))
+    add_rating(db, 1, 5.0)
+    db.flush()
+
+
+def test_write_review_maps_duplicate_to_409(database):
+    with SessionLocal() as db:
+        with pytest.raises(HTTPException) as error:
+            write_review(db, duplicate_insert, "duplicada")
+    assert error.value.status_code == 409
+    assert error.value.detail == "duplicada"
+
+
+def test_write_behind_maps_duplicate_to_409(database, monkeypatch):
+    batcher = WriteBatcher(SessionLocal, window=0.01, max_batch=10, queue_size=10, submit_timeout=1)
+    monkeypatch.setattr(write_queue, "REVIEW_WRITE_BEHIND", True)
+    monkeypatch.setattr(write_queue, "review_writes", batcher)
+
+    with SessionLocal() as db:
+        with pytest.raises(HTTPException) as error:
+            write_review(db, duplicate_insert)
+    assert error.value.status_code == 409
+
+
+@pytest.mark.parametrize("method", ["put", "patch"])
+def test_update_into_duplicate_is_409_even_after_check(client, monkeypatch, new_review_ids, method):
+    response = client.post("/api/reviews", json={"user_id": USER_ID, "videogame_id": 3, "rating": 6, "comment": "ok"})
+    assert response.status_code == 201
+    review_id = response.json()["id"]
+    new_review_ids.append(review_id)
+
+    # Sin la comprobación previa (como si la otra review llegara justo después)
+    monkeypatch.setattr(reviews_router, "check_duplicate_review", lambda db, review, videogame_id: None)
+    body = {"user_id": USER_ID, "videogame_id": 1, "rating": 7, "comment": "ok"}
+    response = getattr(client, method)(f"/api/reviews/{review_id}", json=body)
+    assert response.status_code == 409
+    assert response.json()["detail"] == reviews_router.DUPLICATE_REVIEW_DETAIL
+
+    # La review no se ha movido
+    assert client.get(f"/api/reviews/{review_id}").json()["videogame_id"] == 3
+
+
+def test_create_duplicate_is_409(client):
+    response = client.post("/api/reviews", json={"user_id": USER_ID, "videogame_id": 1, "rating": 6, "comment": "otra"})
+    assert response.status_code == 409
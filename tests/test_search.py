@@ -0,0 +1,42 @@
+"""
+Resaltado de la búsqueda: el título y el fragmento son HTML seguro
+"""
+
+import pytest
+from sqlalchemy import delete
+
+from app.database import SessionLocal
+from app.models.videogame import VideogameORM
+from app.search import mark_html, search_videogames
+
+
+@pytest.fixture
+def hostile_videogame(database):
+    """Un juego con HTML en el título y en la descripción."""
+    with SessionLocal() as db:
+        videogame = VideogameORM(
+            title="Zyxwar <script>alert(1)</script>",
+            description='Zyxwar & <img src=x onerror="alert(1)"> <mark>falso</mark>',
+        )
+        db.add(videogame)
+        db.commit()
+        videogame_id = videogame.id
+    yield videogame_id
+    with SessionLocal() as db:
+        db.execute(delete(VideogameORM).where(VideogameORM.id == videogame_id))
+        db.commit()
+
+
+def test_highlight_escapes_title_and_snippet(hostile_videogame):
+    with SessionLocal() as db:
+        [result] = search_videogames(db, "zyxwar", 5)
+
+    assert result["id"] == hostile_videogame
+    assert result["title_highlight"] == "<mark>Zyxwar</mark> &lt;script&gt;alert(1)&lt;/script&gt;"
+    assert "<img" not in result["snippet"]
+    assert result["snippet"].startswith("<mark>Zyxwar</mark> &amp; &lt;img")
+    assert "&lt;mark&gt;falso&lt;/mark&gt;" in result["snippet"]
+
+
+def test_mark_html_keeps_missing_snippet():
+    assert mark_html(None) is None
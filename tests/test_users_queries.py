@@ -0,0 +1,87 @@
+"""
+build_user_responses hace siempre el mismo número de consultas, sin importar
+cuántos usuarios haya en la página (sin N+1).
+"""
+
+import pytest
+from sqlalchemy import delete, event, insert, select
+
+from app.database import SessionLocal
+from app.models.review import ReviewORM
+from app.models.user import UserORM
+from app.models.user_game import user_game_table
+from app.models.videogame import VideogameORM
+from app.routers.api.users import build_user_responses
+
+NICK_PREFIX = "consultas-"
+
+
+@pytest.fixture
+def seeded_users(database):
+    """Crea count usuarios con tres juegos en su biblioteca y una review de cada uno."""
+    created = []
+
+    def seed(count: int) -> list[int]:
+        with SessionLocal() as db:
+            videogame_ids = db.scalars(select(VideogameORM.id).order_by(VideogameORM.id).limit(3)).all()
+            users = [
+                UserORM(nick=f"{NICK_PREFIX}{i}", email=f"{NICK_PREFIX}{i}@example.com", password="-", version=1)
+                for i in range(count)
+            ]
+            db.add_all(users)
+            db.flush()
+            user_ids = [user.id for user in users]
+            db.execute(insert(user_game_table), [
+                {"user_id": user_id, "videogame_id": videogame_id}
+                for user_id in user_ids for videogame_id in videogame_ids
+            ])
+            db.execute(insert(ReviewORM), [
+                {"user_id": user_id, "videogame_id": videogame_id, "rating": 7.5, "comment": "ok", "version": 1}
+                for user_id in user_ids for videogame_id in videogame_ids
+            ])
+            db.commit()
+        created.extend(user_ids)
+        return user_ids
+
+    yield seed
+
+    with SessionLocal() as db:
+        db.execute(delete(ReviewORM).where(ReviewORM.user_id.in_(created)))
+        db.execute(delete(user_game_table).where(user_game_table.c.user_id.in_(created)))
+        db.execute(delete(UserORM).where(UserORM.id.in_(created)))
+        db.commit()
+
+
+def count_queries(db, function) -> tuple[int, object]:
+    """Solo las consultas de esta sesión: los hilos en segundo plano usan el mismo motor."""
+    statements = []
+    connection = db.connection()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = function()
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    return len(statements), result
+
+
+@pytest.mark.parametrize("count", [1, 10, 100])
+def test_user_list_queries_do_not_grow_with_users(seeded_users, count):
+    user_ids = seeded_users(count)
+
+    with SessionLocal() as db:
+        def build():
+            users = db.scalars(select(UserORM).where(UserORM.id.in_(user_ids)).order_by(UserORM.id)).all()
+            return build_user_responses(db, users)
+
+        queries, responses = count_queries(db, build)
+
+    # Usuarios, biblioteca y reviews
+    assert queries == 3
+    assert len(responses) == count
+    for response in responses:
+        assert len(response["videogames"]) == 3
+        assert all(len(videogame["reviews"]) == 1 for videogame in response["videogames"])
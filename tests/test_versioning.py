@@ -0,0 +1,55 @@
+"""
+Concurrencia optimista fuera de commit_versioned: una escritura que llega tarde
+es un conflicto (412 en la API, 409 con una página en la web), no un 500
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, update
+
+from app.auth import SESSION_COOKIE
+from app.database import SessionLocal
+from app.main import app
+from app.models.user import UserORM
+from app.models.user_game import user_game_table
+from app.routers.web import videogames as web_videogames
+from app.security import sign
+
+USER_ID = 3
+VIDEOGAME_ID = 43
+
+
+@pytest.fixture
+def concurrent_user_edit(client, monkeypatch):
+    """Otra petición cambia la versión del usuario justo después de que esta lo lea."""
+    owns_game = web_videogames.owns_game
+
+    def owns_game_then_edit(db, user_id, videogame_id):
+        result = owns_game(db, user_id, videogame_id)
+        with SessionLocal() as other:
+            other.execute(update(UserORM).where(UserORM.id == user_id).values(version=UserORM.version + 1))
+            other.commit()
+        return result
+
+    monkeypatch.setattr(web_videogames, "owns_game", owns_game_then_edit)
+    yield
+    with SessionLocal() as db:
+        db.execute(delete(user_game_table).where(user_game_table.c.user_id == USER_ID, user_game_table.c.videogame_id == VIDEOGAME_ID))
+        db.commit()
+
+
+def test_web_write_on_stale_row_renders_conflict(concurrent_user_edit):
+    browser = TestClient(app)
+    browser.cookies.set(SESSION_COOKIE, sign({"uid": USER_ID, "nick": "player2"}, 3600))
+
+    response = browser.post(
+        f"/videogame/{VIDEOGAME_ID}/download",
+        headers={"Referer": f"http://testserver/videogame/{VIDEOGAME_ID}"}
+    )
+    assert response.status_code == 409
+    assert "text/html" in response.headers["content-type"]
+    assert f'href="/videogame/{VIDEOGAME_ID}"' in response.text
+
+    # No se ha guardado nada
+    with SessionLocal() as db:
+        assert not db.execute(user_game_table.select().where(user_game_table.c.user_id == USER_ID)).first()
@@ -0,0 +1,101 @@
+"""
+Escritor por lotes: un fallo solo afecta a su operación y la cola llena es un 503
+"""
+
+import threading
+import time
+
+import pytest
+from sqlalchemy import delete, select
+
+from app import write_queue
+from app.database import SessionLocal
+from app.models.genre import GenreORM
+from app.write_queue import WriteBatcher
+
+PREFIX = "write-queue-test"
+
+
+@pytest.fixture
+def cleanup_genres(database):
+    yield
+    with SessionLocal() as db:
+        db.execute(delete(GenreORM).where(GenreORM.name.startswith(PREFIX)))
+        db.commit()
+
+
+def add_genre(name: str):
+    def operation(db):
+        genre = GenreORM(name=name, description="", image_url="/static/x.png")
+        db.add(genre)
+        db.flush()
+        return genre.id
+    return operation
+
+
+def failing_operation(db):
+    # Escribe algo antes de fallar: no se debe confirmar
+    add_genre(f"{PREFIX}-failed")(db)
+    raise ValueError("falla esta operación")
+
+
+def submit_all(batcher: WriteBatcher, operations: list) -> list:
+    """Envía las operaciones a la vez desde varios hilos; devuelve resultado o excepción de cada una."""
+    outcomes = [None] * len(operations)
+
+    def run(index, operation):
+        try:
+            outcomes[index] = batcher.submit(operation)
+        except Exception as error:
+            outcomes[index] = error
+
+    threads = [threading.Thread(target=run, args=item) for item in enumerate(operations)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return outcomes
+
+
+def test_failing_operation_only_fails_its_caller(cleanup_genres):
+    batcher = WriteBatcher(SessionLocal, window=0.5, max_batch=3, queue_size=10, submit_timeout=1)
+
+    first, failed, last = submit_all(batcher, [add_genre(f"{PREFIX}-1"), failing_operation, add_genre(f"{PREFIX}-2")])
+
+    assert batcher.largest_batch == 3
+    assert isinstance(failed, ValueError)
+    assert isinstance(first, int) and isinstance(last, int)
+    with SessionLocal() as db:
+        names = db.execute(select(GenreORM.name).where(GenreORM.name.startswith(PREFIX))).scalars().all()
+    assert sorted(names) == [f"{PREFIX}-1", f"{PREFIX}-2"]
+
+
+def test_full_queue_is_503_with_retry_after(client, monkeypatch):
+    batcher = WriteBatcher(SessionLocal, window=0, max_batch=1, queue_size=1, submit_timeout=0.05)
+    monkeypatch.setattr(write_queue, "REVIEW_WRITE_BEHIND", True)
+    monkeypatch.setattr(write_queue, "review_writes", batcher)
+
+    # Una operación ocupa el escritor y otra llena la cola
+    started, release = threading.Event(), threading.Event()
+
+    def hold_writer(db):
+        started.set()
+        release.wait(10)
+
+    busy = threading.Thread(target=batcher.submit, args=(hold_writer,))
+    queued = threading.Thread(target=batcher.submit, args=(lambda db: None,))
+    busy.start()
+    assert started.wait(10)
+    queued.start()
+    while not batcher.stats()["pending"]:
+        time.sleep(0.01)
+
+    try:
+        response = client.post("/api/reviews", json={"user_id": 1, "videogame_id": 3, "rating": 5})
+    finally:
+        release.set()
+        busy.join(timeout=10)
+        queued.join(timeout=10)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"